@@ -0,0 +1,217 @@
+"""
+Namespaced, version-stamped caching on top of a shared Django cache backend.
+
+Every key is built from the current version of one or more namespaces, so
+invalidating a whole namespace is a single increment (see `bump`), done after
+commit from model signals in product.signals / orders.signals. Backend failures are
+logged and treated as misses: the cache must never take a request down.
+
+Versions are read at most once per namespace inside `pinned_versions()` (one
+request), and get_or_set reads them once for both the get and the set. With
+the dummy backend (no shared cache configured) everything is a miss and no
+version is ever read.
+"""
+import hashlib
+import logging
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.db import transaction
+
+from ErmaxShop.timing import note_cache
+
+logger = logging.getLogger(__name__)
+
+NAMESPACES = ('products', 'variants', 'featured_categories', 'orders', 'users', 'dashboard')
+
+
+class VersionedCache:
+    def __init__(self, alias='default', prefix='yene', flush_every=50):
+        self.alias = alias
+        self.prefix = prefix
+        self.flush_every = flush_every
+        self._pending = Counter()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @property
+    def backend(self):
+        return caches[self.alias]
+
+    @property
+    def enabled(self):
+        return not isinstance(self.backend, DummyCache)
+
+    # ----------------------------- Versions
+    def _version_key(self, namespace):
+        return f'{self.prefix}:v:{namespace}'
+
+    @contextmanager
+    def pinned_versions(self):
+        # Inside the block each namespace version is read from the backend
+        # once; our own bumps still drop the pinned value.
+        if getattr(self._local, 'versions', None) is not None:
+            yield
+            return
+        self._local.versions = {}
+        try:
+            yield
+        finally:
+            self._local.versions = None
+
+    def versions(self, namespaces):
+        if not self.enabled:
+            return None
+        pinned = getattr(self._local, 'versions', None)
+        known = pinned if pinned is not None else {}
+        keys = {self._version_key(ns): ns for ns in namespaces if ns not in known}
+        if keys:
+            try:
+                found = self.backend.get_many(list(keys))
+                for key in keys:
+                    if key not in found:
+                        # Seed from the clock rather than 1 so an evicted version
+                        # can never come back and revive old entries.
+                        seed = time.time_ns()
+                        found[key] = seed if self.backend.add(key, seed, timeout=None) else self.backend.get(key)
+            except Exception:
+                logger.warning('Cache unavailable while reading versions', exc_info=True)
+                return None
+            fresh = {ns: found[key] for key, ns in keys.items()}
+            if pinned is not None:
+                pinned.update(fresh)
+            known = {**known, **fresh}
+        return [known[ns] for ns in namespaces]
+
+    def bump(self, namespace):
+        pinned = getattr(self._local, 'versions', None)
+        if pinned is not None:
+            pinned.pop(namespace, None)
+        key = self._version_key(namespace)
+        try:
+            try:
+                self.backend.incr(key)
+            except ValueError:
+                self.backend.set(key, time.time_ns(), timeout=None)
+        except Exception:
+            logger.warning('Cache unavailable while bumping %s', namespace, exc_info=True)
+
+    def bump_on_commit(self, namespace):
+        # Bump once the current transaction's writes are visible (right away in
+        # autocommit). Bumping earlier lets a concurrent read cache the old
+        # data under the new version until the entry expires.
+        transaction.on_commit(partial(self.bump, namespace))
+
+    def make_key(self, namespaces, key, versions=None):
+        if versions is None:
+            versions = self.versions(namespaces)
+        if versions is None:
+            return None
+        stamp = ','.join(f'{ns}{v}' for ns, v in zip(namespaces, versions))
+        if len(key) > 150 or not key.isprintable() or not key.isascii() or ' ' in key:
+            # Long URLs (cursors) would break memcached-style key limits
+            key = 'h:' + hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return f'{self.prefix}:{stamp}:{key}'
+
+    # ----------------------------- Values
+    def get(self, namespaces, key, default=None, versions=None, stats_namespace=None):
+        full_key = self.make_key(namespaces, key, versions)
+        value = default
+        if full_key is not None:
+            try:
+                value = self.backend.get(full_key, default)
+            except Exception:
+                logger.warning('Cache unavailable while reading %s', full_key, exc_info=True)
+        self._count(stats_namespace or namespaces[0], 'hits' if value is not default else 'misses')
+        return value
+
+    def set(self, namespaces, key, value, timeout=None, versions=None):
+        full_key = self.make_key(namespaces, key, versions)
+        if full_key is None:
+            return
+        if timeout is None:
+            timeout = settings.YENE_CACHE_TIMEOUT
+        try:
+            self.backend.set(full_key, value, timeout)
+        except Exception:
+            logger.warning('Cache unavailable while writing %s', full_key, exc_info=True)
+
+    def get_or_set(self, namespaces, key, producer, timeout=None, stats_namespace=None):
+        # Hits/misses are counted under stats_namespace, by default the first
+        # namespace (per-object namespaces would each get their own counter)
+        sentinel = object()
+        # Read once: keying the set on versions read after the producer ran
+        # could file stale data under a newer version
+        versions = self.versions(namespaces)
+        if versions is None:
+            self._count(stats_namespace or namespaces[0], 'misses')
+            return producer()
+        value = self.get(namespaces, key, sentinel, versions, stats_namespace)
+        if value is sentinel:
+            value = producer()
+            self.set(namespaces, key, value, timeout, versions)
+        return value
+
+    # ----------------------------- Hit / miss counters
+    def _stats_key(self, namespace, kind):
+        return f'{self.prefix}:stats:{namespace}:{kind}'
+
+    def _count(self, namespace, kind):
+        note_cache(kind)  # per-request Server-Timing, when enabled
+        with self._lock:
+            self._pending[(namespace, kind)] += 1
+            due = sum(self._pending.values()) >= self.flush_every
+        if due:
+            self.flush_stats()
+
+    def flush_stats(self):
+        # Counters are batched per process and pushed to the shared backend
+        # so that a hit does not cost an extra write.
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+        for (namespace, kind), count in pending.items():
+            key = self._stats_key(namespace, kind)
+            try:
+                if not self.backend.add(key, count, timeout=None):
+                    self.backend.incr(key, count)
+            except Exception:
+                logger.warning('Cache unavailable while flushing stats', exc_info=True)
+
+    def stats(self):
+        self.flush_stats()
+        keys = [self._stats_key(ns, kind) for ns in NAMESPACES for kind in ('hits', 'misses')]
+        try:
+            found = self.backend.get_many(keys)
+        except Exception:
+            logger.warning('Cache unavailable while reading stats', exc_info=True)
+            found = {}
+        result = {}
+        for ns in NAMESPACES:
+            hits = found.get(self._stats_key(ns, 'hits'), 0)
+            misses = found.get(self._stats_key(ns, 'misses'), 0)
+            total = hits + misses
+            result[ns] = {
+                'hits': hits,
+                'misses': misses,
+                'hit_ratio': round(hits / total, 4) if total else None,
+            }
+        return result
+
+    def reset_stats(self):
+        with self._lock:
+            self._pending.clear()
+        try:
+            self.backend.delete_many([
+                self._stats_key(ns, kind) for ns in NAMESPACES for kind in ('hits', 'misses')
+            ])
+        except Exception:
+            logger.warning('Cache unavailable while resetting stats', exc_info=True)
+
+
+versioned_cache = VersionedCache()
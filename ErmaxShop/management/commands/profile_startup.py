@@ -0,0 +1,45 @@
+import statistics
+
+from django.core.management.base import BaseCommand
+
+from ErmaxShop.startup import measure_cold_start, package_costs
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure a serverless cold start: fresh interpreter, import ErmaxShop.wsgi, serve one GET. '
+        'Reports time-to-first-response and the per-package / per-module import cost.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/yene_api/products/', help='Path of the first request')
+        parser.add_argument('--mode', choices=('full', 'slim', 'both'), default='both')
+        parser.add_argument('--runs', type=int, default=5, help='Cold starts timed per mode (median reported)')
+        parser.add_argument('--top', type=int, default=15, help='Rows in the import breakdown')
+
+    def handle(self, *args, **options):
+        modes = ('full', 'slim') if options['mode'] == 'both' else (options['mode'],)
+        for mode in modes:
+            slim = mode == 'slim'
+            # Timed runs without -X importtime, which has overhead of its own
+            runs = [measure_cold_start(options['path'], slim=slim) for _ in range(max(options['runs'], 1))]
+            profiled = measure_cold_start(options['path'], slim=slim, importtime=True)
+
+            def median(key):
+                return statistics.median(run[key] for run in runs) * 1000
+
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"{mode}: process {median('wall'):.0f} ms  wsgi import {median('load'):.0f} ms  "
+                f"first response {median('first_response'):.0f} ms (HTTP {runs[0]['status']})  "
+                f"{len(runs[0]['modules'])} modules"
+            ))
+
+            total = sum(own for _, own, _ in profiled['imports']) or 1
+            self.stdout.write(f'  {"package":<40} {"self ms":>9} {"share":>6}')
+            for package, own in package_costs(profiled['imports'])[:options['top']]:
+                self.stdout.write(f'  {package:<40} {own / 1000:>9.1f} {own / total:>6.1%}')
+
+            self.stdout.write(f'  {"module":<40} {"self ms":>9} {"cumul ms":>9}')
+            costliest = sorted(profiled['imports'], key=lambda row: row[1], reverse=True)
+            for module, own, cumulative in costliest[:options['top']]:
+                self.stdout.write(f'  {module:<40} {own / 1000:>9.1f} {cumulative / 1000:>9.1f}')
@@ -0,0 +1,192 @@
+import json
+import operator
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+from functools import reduce
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db import connections
+from django.db.models import Q
+from django.http import HttpResponse
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, _positive_int
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def _split(ordering_field):
+    if ordering_field.startswith('-'):
+        return ordering_field[1:], True
+    return ordering_field, False
+
+
+def invert_ordering(ordering):
+    return tuple(f[1:] if f.startswith('-') else '-' + f for f in ordering)
+
+
+def keyset_filter(ordering, position, backwards=False):
+    """
+    Build the row-value comparison "key comes after `position`" for `ordering`
+    as an OR of prefix-equal terms, so the database can answer it with a range
+    scan on the matching composite index.
+    """
+    terms = []
+    for i, ordering_field in enumerate(ordering):
+        name, descending = _split(ordering_field)
+        lookup = 'lt' if descending != backwards else 'gt'
+        prefix = {_split(ordering[j])[0]: position[j] for j in range(i)}
+        prefix[f'{name}__{lookup}'] = position[i]
+        terms.append(Q(**prefix))
+    return reduce(operator.or_, terms)
+
+
+def prerendered_page(next_link, previous_link, documents, extra=None):
+    """
+    The {"next", "previous", "results"} envelope around `documents`, which are
+    already-rendered JSON strings spliced in without re-parsing. Keys in
+    `extra` are rendered normally and appended after "results".
+    """
+    links = JSONRenderer().render(OrderedDict([
+        ('next', next_link),
+        ('previous', previous_link),
+    ]))
+    body = links[:-1] + b',"results":[' + ','.join(documents).encode('utf-8') + b']'
+    if extra:
+        body += b',' + JSONRenderer().render(extra)[1:-1]
+    body += b'}'
+    return HttpResponse(body, content_type='application/json')
+
+
+def estimated_count(queryset, exact_below=10000):
+    """
+    Return (count, is_estimate). On PostgreSQL the planner's row estimate is
+    used when it is at least `exact_below`, which avoids a full COUNT(*) over
+    a large table; small results and other databases get an exact count.
+    """
+    queryset = queryset.order_by().values('pk')
+    connection = connections[queryset.db]
+    if connection.vendor == 'postgresql':
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        estimate = int(plan[0]['Plan']['Plan Rows'])
+        if estimate >= exact_below:
+            return estimate, True
+    return queryset.count(), False
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination keyed on a unique tuple of columns, e.g. (created_at, id).
+
+    The cursor carries the full key of the boundary row, so every page is one
+    indexed range scan of `page_size + 1` rows however deep the client goes.
+    All ordering fields must be non-null and the last one must be unique.
+    """
+    ordering = ('-created_at', '-id')
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.model = queryset.model
+
+        position, backwards = self.decode_cursor(request)
+        if position is not None:
+            queryset = queryset.filter(keyset_filter(self.ordering, position, backwards))
+        ordering = invert_ordering(self.ordering) if backwards else self.ordering
+
+        results = list(queryset.order_by(*ordering)[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if backwards:
+            results.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+
+        self.page = results
+        return results
+
+    def get_page_size(self, request):
+        if self.page_size_query_param:
+            try:
+                return _positive_int(
+                    request.query_params[self.page_size_query_param],
+                    strict=True,
+                    cutoff=self.max_page_size
+                )
+            except (KeyError, ValueError):
+                pass
+        return self.page_size
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_prerendered_response(self, documents, extra=None):
+        # Same envelope as get_paginated_response() around pre-rendered JSON
+        return prerendered_page(self.get_next_link(), self.get_previous_link(), documents, extra)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.get_position(self.page[-1]), backwards=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.get_position(self.page[0]), backwards=True)
+
+    # ----------------------------- Cursor encoding
+    def _fields(self):
+        return [self.model._meta.get_field(_split(f)[0]) for f in self.ordering]
+
+    def get_position(self, instance):
+        return [field.value_to_string(instance) for field in self._fields()]
+
+    def encode_cursor(self, position, backwards):
+        payload = json.dumps({'p': position, 'b': int(backwards)}, separators=(',', ':'))
+        cursor = urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+        return replace_query_param(self.base_url, self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            payload = json.loads(urlsafe_b64decode(padded.encode('ascii')).decode('utf-8'))
+            raw = payload['p']
+            fields = self._fields()
+            if len(raw) != len(fields):
+                raise ValueError
+            position = [field.to_python(value) for field, value in zip(fields, raw)]
+            return position, bool(payload.get('b'))
+        except (TypeError, ValueError, KeyError, ValidationError, FieldDoesNotExist):
+            raise NotFound(self.invalid_cursor_message)
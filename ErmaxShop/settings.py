@@ -35,6 +35,7 @@ CORS_ALLOWED_ORIGINS = [
 
 CORS_ALLOW_HEADERS = list(default_headers) + [
     'cache-control',
+    'idempotency-key',
 ]
 
 ALLOWED_HOSTS = ['127.0.0.1', 'localhost', 'yenebackend.vercel.app', 'yenecloset.vercel.app']
@@ -54,6 +55,8 @@ INSTALLED_APPS = [
     'dashboard',
     'rest_framework.authtoken',
     'engagement',
+    'jobs',
+    'ErmaxShop',  # project-wide management commands (profile_startup)
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
@@ -65,14 +68,42 @@ AUTH_USER_MODEL = 'user.User'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'user.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.AllowAny',
     ),
 }
 
+# How long an order Idempotency-Key is remembered
+ORDER_IDEMPOTENCY_TTL = timedelta(hours=24)
+
+# Background job queue (jobs app, `manage.py run_jobs`)
+JOBS_MAX_ATTEMPTS = 5
+JOBS_BACKOFF_BASE = 10      # seconds before the first retry, doubled each time
+JOBS_BACKOFF_MAX = 3600
+JOBS_LOCK_TIMEOUT = 600     # a running job older than this is assumed orphaned
+
+# Seconds the admin dashboard summary may be served from cache
+DASHBOARD_SUMMARY_TTL = int(os.environ.get('DASHBOARD_SUMMARY_TTL', 30))
+
+# Public catalog pagination (keyset on created_at, id)
+PRODUCT_PAGE_SIZE = 20
+PRODUCT_MAX_PAGE_SIZE = 100
+
+# Text search configuration for the PostgreSQL product search vector; 'simple'
+# because names mix English and Amharic (migration 0007 backfills with it too)
+PRODUCT_SEARCH_CONFIG = 'simple'
+
+# Lower bounds (ETB) of the effective-price facet buckets; the last is open-ended
+PRODUCT_PRICE_BUCKETS = (0, 500, 1000, 2500, 5000)
+
 # JWT Settings (Optional, customize these as per your needs)
+# Seconds an authenticated user may be served from cache (user.authentication)
+JWT_USER_CACHE_TIMEOUT = int(os.environ.get('JWT_USER_CACHE_TIMEOUT', 60))
+# Build request.user from the token's signed is_staff/is_active claims, no lookup
+JWT_TRUST_USER_CLAIMS = os.environ.get('JWT_TRUST_USER_CLAIMS', '') == '1'
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=15),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
@@ -82,6 +113,7 @@ SIMPLE_JWT = {
 
 
 MIDDLEWARE = [
+    'ErmaxShop.timing.RequestTimingMiddleware',  # outermost, so the total covers the stack
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -92,6 +124,13 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Per-request query/DB/render/cache timings (ErmaxShop.timing): Server-Timing
+# header plus slow_request / slow_query warnings on the 'yene.*' loggers.
+# Disabled, the middleware removes itself from the stack.
+REQUEST_TIMING_ENABLED = os.environ.get('REQUEST_TIMING_ENABLED', '') == '1'
+REQUEST_TIMING_SLOW_REQUEST_MS = int(os.environ.get('REQUEST_TIMING_SLOW_REQUEST_MS', 500))
+REQUEST_TIMING_SLOW_QUERY_MS = int(os.environ.get('REQUEST_TIMING_SLOW_QUERY_MS', 100))
+
 ROOT_URLCONF = 'ErmaxShop.urls'
 
 TEMPLATES = [
@@ -110,6 +149,37 @@ TEMPLATES = [
     },
 ]
 
+# Slim serving mode (YENE_SLIM=1) for the serverless entry point: a cold lambda
+# only loads what the public API needs. The admin site, authtoken, sessions and
+# messages are left out (DRF authenticates with JWT on its own), so serve the
+# admin and run migrations from a normal process. `manage.py profile_startup`
+# compares both modes.
+YENE_SLIM = os.environ.get('YENE_SLIM', '') == '1'
+
+SLIM_EXCLUDED_APPS = (
+    'django.contrib.admin',
+    'rest_framework.authtoken',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+)
+SLIM_EXCLUDED_MIDDLEWARE = (
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',  # needs sessions
+    'django.contrib.messages.middleware.MessageMiddleware',
+)
+
+if YENE_SLIM:
+    INSTALLED_APPS = [app for app in INSTALLED_APPS if app not in SLIM_EXCLUDED_APPS]
+    MIDDLEWARE = [mw for mw in MIDDLEWARE if mw not in SLIM_EXCLUDED_MIDDLEWARE]
+    TEMPLATES[0]['OPTIONS']['context_processors'].remove(
+        'django.contrib.messages.context_processors.messages'
+    )
+
+# Seconds a slim cold start (interpreter start to first response) may take;
+# checked by ErmaxShop.tests.ColdStartTests when COLD_START_CHECK=1 (wall-clock
+# numbers are only meaningful on an otherwise idle machine, so not by default)
+COLD_START_BUDGET = float(os.environ.get('COLD_START_BUDGET', 3))
+
 WSGI_APPLICATION = 'ErmaxShop.wsgi.application'
 
 
@@ -134,16 +204,71 @@ DATABASES = {
     }
 }
 
-CACHES = {
-    'default': {
+# Cache used by ErmaxShop.cache.versioned_cache. Invalidation is a version bump
+# in the cache itself, so every process serving traffic must share it. Pick the
+# backend with YENE_CACHE_BACKEND:
+#   redis    - YENE_CACHE_URL, e.g. redis://localhost:6379/0 (needs `redis`);
+#              the default when YENE_CACHE_URL is set
+#   none     - no caching: reads go straight to the snapshot tables (one query
+#              for a catalog page). Default on Vercel / with DEBUG off when no
+#              YENE_CACHE_URL is set, since nothing else is shared there
+#   database - the 'yene_cache' table in the main database (created by
+#              product migration 0010). Shared, but each hit is a round trip
+#              to the same database, so usually slower than `none`
+#   file     - files under YENE_CACHE_DIR: only shared by the processes of one
+#              host, NOT across lambdas (each has its own /tmp); local default
+#   locmem   - per-process, for development only
+if os.environ.get('YENE_CACHE_URL'):
+    _DEFAULT_CACHE_BACKEND = 'redis'
+elif os.environ.get('VERCEL') or not DEBUG:
+    _DEFAULT_CACHE_BACKEND = 'none'
+else:
+    _DEFAULT_CACHE_BACKEND = 'file'
+YENE_CACHE_BACKEND = os.environ.get('YENE_CACHE_BACKEND', _DEFAULT_CACHE_BACKEND)
+YENE_CACHE_TIMEOUT = int(os.environ.get('YENE_CACHE_TIMEOUT', 300))
+
+_CACHE_BACKENDS = {
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('YENE_CACHE_DIR', '/tmp/yene-cache'),
+    },
+    'database': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'yene_cache',
+    },
+    'redis': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ.get('YENE_CACHE_URL', 'redis://127.0.0.1:6379/0'),
+    },
+    'locmem': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'order-variants',
-    }
+        'LOCATION': 'yene',
+    },
+    'none': {
+        'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+    },
+}
+
+CACHES = {
+    'default': dict(_CACHE_BACKENDS[YENE_CACHE_BACKEND], TIMEOUT=YENE_CACHE_TIMEOUT),
 }
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
+# Password hashing work factor (see user.hashers): PASSWORD_HASH_PROFILE is
+# django | balanced | fast; PASSWORD_HASH_ITERATIONS overrides it outright.
+# Stored hashes are upgraded/downgraded to the configured cost on next login.
+PASSWORD_HASHERS = [
+    'user.hashers.ProfiledPBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+PASSWORD_HASH_PROFILE = os.environ.get('PASSWORD_HASH_PROFILE', 'django')
+PASSWORD_HASH_ITERATIONS = os.environ.get('PASSWORD_HASH_ITERATIONS')
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
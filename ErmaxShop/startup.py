@@ -0,0 +1,101 @@
+"""
+Cold-start measurement for the serverless entry point (ErmaxShop/wsgi.py).
+
+`measure_cold_start` launches a fresh interpreter, as a new lambda would,
+imports the WSGI application and serves one GET straight through it. With
+`importtime` it also runs under `python -X importtime` so the import cost can
+be attributed per module. Used by `manage.py profile_startup` and the budget
+test in ErmaxShop.tests.
+"""
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+# Runs in the child interpreter; prints one JSON line with its timings
+_CHILD = r'''
+import json, sys, time
+from wsgiref.util import setup_testing_defaults
+
+start = time.perf_counter()
+from ErmaxShop.wsgi import application
+loaded = time.perf_counter()
+
+environ = {'PATH_INFO': sys.argv[1], 'REQUEST_METHOD': 'GET'}
+setup_testing_defaults(environ)
+status = []
+response = application(environ, lambda s, headers, exc_info=None: status.append(s))
+b''.join(response)
+if hasattr(response, 'close'):
+    response.close()
+done = time.perf_counter()
+
+print(json.dumps({
+    'load': loaded - start,
+    'first_response': done - loaded,
+    'status': int(status[0].split()[0]),
+    'modules': sorted(sys.modules),
+}))
+'''
+
+
+def parse_importtime(stderr):
+    """[(module, self_us, cumulative_us)] from `-X importtime` output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        try:
+            own, cumulative, name = line[len('import time:'):].split('|')
+            rows.append((name.strip(), int(own), int(cumulative)))
+        except ValueError:
+            continue  # the header line
+    return rows
+
+
+def package_of(module):
+    # django.contrib.admin.options -> django.contrib.admin, rest_framework.views -> rest_framework
+    parts = module.split('.')
+    if parts[0] == 'django' and len(parts) > 1:
+        return '.'.join(parts[:3] if parts[1] == 'contrib' else parts[:2])
+    return parts[0]
+
+
+def package_costs(rows):
+    """Self import time in microseconds summed per package, costliest first."""
+    totals = Counter()
+    for module, own, _ in rows:
+        totals[package_of(module)] += own
+    return totals.most_common()
+
+
+def measure_cold_start(path='/yene_api/products/', slim=None, importtime=False, timeout=120):
+    """
+    Returns {'wall', 'load', 'first_response', 'status', 'modules', 'imports'}
+    (seconds). `wall` includes interpreter start-up; `load` is importing
+    ErmaxShop.wsgi (settings, app registry); `first_response` covers the URLconf
+    and view imports triggered by the first request. `slim` forces
+    settings.YENE_SLIM on or off, None keeps the environment's choice.
+    """
+    env = dict(os.environ)
+    env.setdefault('DJANGO_SETTINGS_MODULE', 'ErmaxShop.settings')
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [str(BASE_DIR), env.get('PYTHONPATH')]))
+    if slim is not None:
+        env['YENE_SLIM'] = '1' if slim else ''
+
+    command = [sys.executable, *(['-X', 'importtime'] if importtime else []), '-c', _CHILD, path]
+    start = time.perf_counter()
+    proc = subprocess.run(command, env=env, cwd=BASE_DIR, capture_output=True, text=True, timeout=timeout)
+    wall = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError('Cold start failed:\n' + proc.stderr[-2000:])
+
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    result['wall'] = wall
+    result['imports'] = parse_importtime(proc.stderr) if importtime else []
+    return result
@@ -0,0 +1,250 @@
+import json
+import os
+import re
+import time
+import unittest
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from rest_framework.test import APIClient
+
+from dashboard.tests import make_order
+from engagement.models import AdminNotification, Review, UserHistory
+from ErmaxShop.startup import measure_cold_start, package_of, parse_importtime
+from orders.tests import make_variants, order_payload
+from product.models import FeaturedCategory, ProductVariantImage
+from product.serializers import FeaturedCategorySerializer
+from product.tests import make_product
+from user.models import User
+from user.tokens import issue_tokens
+
+
+class ColdStartTests(SimpleTestCase):
+    # 405 from the login view: goes through the whole stack without a database
+    path = '/yene_api/user/login/'
+
+    @unittest.skipUnless(os.environ.get('COLD_START_CHECK') == '1', 'wall-clock budget; set COLD_START_CHECK=1')
+    def test_slim_cold_start_budget(self):
+        result = measure_cold_start(self.path, slim=True)
+        self.assertEqual(result['status'], 405)
+        self.assertLess(
+            result['wall'], settings.COLD_START_BUDGET,
+            f"Cold start took {result['wall']:.2f}s (budget {settings.COLD_START_BUDGET}s); "
+            f"see `manage.py profile_startup`",
+        )
+
+    def test_slim_mode_leaves_out_unused_apps(self):
+        # DRF imports the django.contrib.admin package itself (schemas -> admindocs),
+        # but the admin app, its autodiscovery and the session stack stay out
+        modules = set(measure_cold_start(self.path, slim=True)['modules'])
+        for module in ('django.contrib.admin.apps', 'product.admin', 'orders.admin',
+                       'django.contrib.sessions.middleware', 'django.contrib.messages.middleware',
+                       'rest_framework.authtoken'):
+            self.assertNotIn(module, modules)
+        self.assertIn('user.authentication', modules)
+
+    def test_parse_importtime(self):
+        rows = parse_importtime(
+            'import time: self [us] | cumulative | imported package\n'
+            'import time:       120 |        120 |     django.contrib.admin.options\n'
+            'import time:        80 |        200 |   django.contrib.admin\n'
+            'some other stderr line\n'
+        )
+        self.assertEqual(rows, [('django.contrib.admin.options', 120, 120), ('django.contrib.admin', 80, 200)])
+        self.assertEqual(package_of('django.contrib.admin.options'), 'django.contrib.admin')
+        self.assertEqual(package_of('django.db.models.query'), 'django.db')
+        self.assertEqual(package_of('rest_framework.views'), 'rest_framework')
+
+
+@override_settings(REQUEST_TIMING_ENABLED=True, REQUEST_TIMING_SLOW_REQUEST_MS=60000, REQUEST_TIMING_SLOW_QUERY_MS=60000)
+class RequestTimingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.url = f'/yene_api/products/{make_product().pk}/'
+
+    def test_server_timing_header(self):
+        with CaptureQueriesContext(connection) as queries:
+            first = self.client.get(self.url)
+        self.assertIn('db;dur=', first['Server-Timing'])
+        self.assertIn(f'desc="{len(queries)} queries"', first['Server-Timing'])
+        self.assertIn('cache;desc="0 hits, 1 misses"', first['Server-Timing'])
+
+        with CaptureQueriesContext(connection) as queries:
+            second = self.client.get(self.url)
+        self.assertIn(f'desc="{len(queries)} queries"', second['Server-Timing'])
+        self.assertIn('cache;desc="1 hits, 0 misses"', second['Server-Timing'])
+        self.assertIn('total;dur=', second['Server-Timing'])
+
+    def test_serialization_is_its_own_bucket(self):
+        FeaturedCategory.objects.create(title='New', description='d', image='https://example.com/c.jpg')
+        original = FeaturedCategorySerializer.to_representation
+
+        def slow(serializer, instance):
+            time.sleep(0.05)
+            return original(serializer, instance)
+
+        with mock.patch.object(FeaturedCategorySerializer, 'to_representation', slow):
+            timing = self.client.get('/yene_api/products/featured-categories/')['Server-Timing']
+        self.assertGreaterEqual(float(re.search(r'serialize;dur=([\d.]+)', timing)[1]), 50)
+        # snapshot-backed reads don't serialize at all
+        self.assertIn('serialize;dur=0.0', self.client.get(self.url)['Server-Timing'])
+
+    @override_settings(REQUEST_TIMING_SLOW_REQUEST_MS=0, REQUEST_TIMING_SLOW_QUERY_MS=0)
+    def test_slow_logs(self):
+        with self.assertLogs('yene.slow_query', 'WARNING') as slow_queries, \
+                self.assertLogs('yene.slow_request', 'WARNING') as slow_requests:
+            self.client.get(self.url)
+        query = json.loads(slow_queries.output[0].split('slow_query ', 1)[1])
+        self.assertIn('SELECT', query['sql'])
+        request = json.loads(slow_requests.output[0].split('slow_request ', 1)[1])
+        self.assertEqual((request['path'], request['status'], request['cache_misses']), (self.url, 200, 1))
+        self.assertEqual(request['slow_queries'], request['queries'])
+
+    @override_settings(REQUEST_TIMING_ENABLED=False)
+    def test_disabled_middleware_drops_out(self):
+        self.assertNotIn('Server-Timing', self.client.get(self.url))
+
+
+# ----------------------------- Query budgets
+class QueryBudgetTests(TestCase):
+    """
+    Maximum queries per route in ErmaxShop/urls.py, checked at a realistic
+    fixture volume and again after the volume grows: a count that moves with
+    the number of rows returned is an N+1.
+    """
+    batch = 8
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='budget@example.com', password='pw', full_name='Bo')
+        self.admin = User.objects.create_user(email='boss@example.com', password='pw', is_staff=True)
+        self.anon = APIClient()
+        self.customer = APIClient()
+        self.customer.force_authenticate(self.user)
+        self.staff = APIClient()
+        self.staff.force_authenticate(self.admin)
+        self.seed()
+        self.product = self.products[0]
+        self.variant = self.product.variants.first()
+        self.image = self.variant.images.first()
+        self.order = self.orders[0]
+
+    def seed(self):
+        start = len(getattr(self, 'products', []))
+        self.products = getattr(self, 'products', []) + [
+            make_product(f'Dress {start + i}', variants=3, images=2) for i in range(self.batch)
+        ]
+        self.orders = getattr(self, 'orders', []) + [
+            make_order(items=3, user=self.user) for _ in range(self.batch)
+        ]
+        for i in range(start, start + self.batch):
+            FeaturedCategory.objects.create(title=f'Look {i}', description='d', image='https://example.com/f.jpg')
+            User.objects.create_user(email=f'shopper{i}@example.com', password='pw')
+            Review.objects.create(user=self.user, product=self.products[0], rating=1 + i % 5, comment='Nice')
+            AdminNotification.objects.create(user=self.user, title=f'Note {i}', message='m')
+            UserHistory.objects.create(user=self.user, order=self.orders[i], action_type='order_created', description='d')
+
+    def read_routes(self):
+        review = Review.objects.filter(user=self.user).first()
+        notification = AdminNotification.objects.filter(user=self.user).first()
+        history = UserHistory.objects.filter(user=self.user).first()
+        admin = '/yene_api/dashboard/yene_admin'
+        return [
+            # Public catalog (snapshot documents; a miss may rebuild them)
+            (self.anon, '/yene_api/products/', 8),
+            (self.anon, '/yene_api/products/?facets=1', 7),
+            (self.anon, '/yene_api/products/?ordering=rating', 4),
+            (self.anon, '/yene_api/products/search/?q=dress', 5),
+            (self.anon, f'/yene_api/products/{self.product.pk}/', 4),
+            (self.anon, '/yene_api/products/featured-categories/', 2),
+            # Customer orders, items included
+            (self.customer, '/yene_api/orders/', 2),
+            # Dashboard
+            (self.staff, f'{admin}/products/', 3),
+            (self.staff, f'{admin}/products/{self.product.pk}/', 3),
+            (self.staff, f'{admin}/product-variants/', 2),
+            (self.staff, f'{admin}/product-variants/{self.variant.pk}/', 2),
+            (self.staff, f'{admin}/product-variant-images/', 1),
+            (self.staff, f'{admin}/product-variant-images/{self.image.pk}/', 1),
+            (self.staff, f'{admin}/orders/', 2),
+            (self.staff, f'{admin}/orders/{self.order.order_code}/', 2),
+            (self.staff, f'{admin}/exports/orders/', 3),
+            (self.staff, f'{admin}/exports/order-items/', 3),
+            (self.staff, f'{admin}/users/', 1),
+            (self.staff, f'{admin}/users/{self.user.pk}/', 1),
+            (self.staff, f'{admin}/summary/', 2),
+            (self.staff, f'{admin}/sales-series/', 1),
+            (self.staff, f'{admin}/cache-stats/', 0),
+            # Engagement
+            (self.anon, '/yene_api/engagement/reviews/', 1),
+            (self.anon, f'/yene_api/engagement/reviews/{review.pk}/', 1),
+            (self.anon, f'/yene_api/engagement/products/{self.product.pk}/reviews/', 1),
+            (self.customer, '/yene_api/engagement/notifications/', 1),
+            (self.customer, '/yene_api/engagement/notifications/unread-count/', 1),
+            (self.customer, f'/yene_api/engagement/notifications/{notification.pk}/', 1),
+            (self.customer, '/yene_api/engagement/user-history/', 1),
+            (self.customer, f'/yene_api/engagement/user-history/{history.pk}/', 1),
+        ]
+
+    def measure(self, client, url):
+        cache.clear()  # budgets are for a cold cache
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+            if response.streaming:
+                b''.join(response.streaming_content)
+        self.assertEqual(response.status_code, 200, url)
+        return len(queries)
+
+    def test_read_budgets_hold_as_data_grows(self):
+        before = {url: self.measure(client, url) for client, url, _ in self.read_routes()}
+        self.seed()
+        for client, url, budget in self.read_routes():
+            with self.subTest(url=url):
+                count = self.measure(client, url)
+                self.assertLessEqual(count, budget)
+                self.assertEqual(count, before[url], 'query count grows with the data')
+
+    def test_order_create_budget_does_not_grow_with_items(self):
+        counts = []
+        for size in (2, 6):
+            payload = order_payload(make_variants(size))
+            cache.clear()
+            with CaptureQueriesContext(connection) as queries:
+                response = self.customer.post('/yene_api/orders/', payload, format='json')
+            self.assertEqual(response.status_code, 201)
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+        self.assertLessEqual(counts[1], 11)
+
+    def test_write_budgets(self):
+        refresh = issue_tokens(self.user)['refresh']
+        routes = [
+            (self.anon, '/yene_api/user/register/',
+             {'full_name': 'New', 'email': 'new@example.com', 'password': 'pw-12345',
+              'phone': '0911000001', 'city': 'Adama', 'address': 'Main St'}, 2),
+            (self.anon, '/yene_api/user/login/', {'email': 'budget@example.com', 'password': 'pw'}, 1),
+            (self.anon, '/yene_api/user/token/refresh/', {'refresh': refresh}, 1),
+            (self.customer, '/yene_api/engagement/reviews/',
+             {'user': self.user.pk, 'product': str(self.product.pk), 'rating': 5, 'comment': 'Great'}, 10),
+            (self.customer, '/yene_api/engagement/notifications/mark-read/', {'all': True}, 1),
+        ]
+        for client, url, data, budget in routes:
+            with self.subTest(url=url):
+                cache.clear()
+                with CaptureQueriesContext(connection) as queries:
+                    response = client.post(url, data, format='json')
+                self.assertLess(response.status_code, 300, response.content)
+                self.assertLessEqual(len(queries), budget)
+
+    def test_variant_image_str_does_not_query(self):
+        image = ProductVariantImage.objects.get(pk=self.image.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(str(image), f'Image {image.pk} of variant {self.variant.pk}')
+        image = ProductVariantImage.objects.select_related('variant__product').get(pk=self.image.pk)
+        with self.assertNumQueries(0):
+            self.assertTrue(str(image).startswith(self.product.name))
@@ -0,0 +1,177 @@
+"""
+Per-request instrumentation: query count and DB time (via
+`connection.execute_wrapper`), serialization time (DRF `Serializer.data`,
+see `serializing`), response rendering time (the renderer turning the data
+into bytes) and versioned-cache hits/misses, sent back as a `Server-Timing`
+header and logged when a request or a single query crosses its threshold.
+The buckets don't overlap: queries run while serializing count as db.
+
+Off unless REQUEST_TIMING_ENABLED is set; the middleware then raises
+MiddlewareNotUsed and drops out of the stack entirely.
+"""
+import json
+import logging
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+request_logger = logging.getLogger('yene.slow_request')
+query_logger = logging.getLogger('yene.slow_query')
+
+_current = ContextVar('yene_request_metrics', default=None)
+
+
+class RequestMetrics:
+    def __init__(self, slow_query_s):
+        self.slow_query_s = slow_query_s
+        self.queries = 0
+        self.db_time = 0.0
+        self.render_time = 0.0
+        self.serialize_time = 0.0
+        self.serialize_depth = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.slow_queries = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        # connection.execute_wrapper hook
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.queries += 1
+            self.db_time += elapsed
+            if elapsed >= self.slow_query_s:
+                self.slow_queries += 1
+                # SQL only: parameters can carry personal data
+                fields = {
+                    'ms': round(elapsed * 1000, 1),
+                    'alias': context['connection'].alias,
+                    'many': many,
+                    'sql': sql[:2000],
+                }
+                query_logger.warning('slow_query %s', json.dumps(fields), extra={'timing': fields})
+
+
+@contextmanager
+def serializing():
+    """Count the time spent in the block as serialization for the current request, if timed."""
+    metrics = _current.get()
+    if metrics is None or metrics.serialize_depth:
+        # Not timed, or nested in an outer serializer that already is
+        yield
+        return
+    metrics.serialize_depth += 1
+    start, db_before = time.perf_counter(), metrics.db_time
+    try:
+        yield
+    finally:
+        metrics.serialize_depth -= 1
+        metrics.serialize_time += time.perf_counter() - start - (metrics.db_time - db_before)
+
+
+def _timed_data(prop):
+    @wraps(prop.fget)
+    def data(self):
+        with serializing():
+            return prop.fget(self)
+    return property(data)
+
+
+_serializers_patched = False
+
+
+def time_serializers():
+    """Route DRF Serializer.data / ListSerializer.data through `serializing` (once per process)."""
+    global _serializers_patched
+    if _serializers_patched:
+        return
+    from rest_framework.serializers import ListSerializer, Serializer
+
+    for cls in (Serializer, ListSerializer):
+        cls.data = _timed_data(cls.__dict__['data'])
+    _serializers_patched = True
+
+
+def note_cache(kind):
+    """Count a versioned_cache 'hits' / 'misses' against the current request, if timed."""
+    metrics = _current.get()
+    if metrics is not None:
+        if kind == 'hits':
+            metrics.cache_hits += 1
+        else:
+            metrics.cache_misses += 1
+
+
+class RequestTimingMiddleware:
+    def __init__(self, get_response):
+        if not getattr(settings, 'REQUEST_TIMING_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.slow_request_s = settings.REQUEST_TIMING_SLOW_REQUEST_MS / 1000
+        self.slow_query_s = settings.REQUEST_TIMING_SLOW_QUERY_MS / 1000
+        time_serializers()
+
+    def __call__(self, request):
+        metrics = RequestMetrics(self.slow_query_s)
+        token = _current.set(metrics)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(metrics))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        total = time.perf_counter() - start
+
+        response['Server-Timing'] = self.server_timing(metrics, total)
+        if total >= self.slow_request_s:
+            fields = self.log_fields(request, response, metrics, total)
+            request_logger.warning('slow_request %s', json.dumps(fields), extra={'timing': fields})
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF Responses render right after this hook; time it with a callback
+        metrics = _current.get()
+        if metrics is not None:
+            start = time.perf_counter()
+
+            def rendered(response):
+                metrics.render_time += time.perf_counter() - start
+            response.add_post_render_callback(rendered)
+        return response
+
+    @staticmethod
+    def server_timing(metrics, total):
+        app = max(total - metrics.db_time - metrics.serialize_time - metrics.render_time, 0)
+        return ', '.join([
+            f'db;dur={metrics.db_time * 1000:.1f};desc="{metrics.queries} queries"',
+            f'serialize;dur={metrics.serialize_time * 1000:.1f}',
+            f'render;dur={metrics.render_time * 1000:.1f}',
+            f'app;dur={app * 1000:.1f}',
+            f'cache;desc="{metrics.cache_hits} hits, {metrics.cache_misses} misses"',
+            f'total;dur={total * 1000:.1f}',
+        ])
+
+    @staticmethod
+    def log_fields(request, response, metrics, total):
+        return {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'ms': round(total * 1000, 1),
+            'queries': metrics.queries,
+            'db_ms': round(metrics.db_time * 1000, 1),
+            'serialize_ms': round(metrics.serialize_time * 1000, 1),
+            'render_ms': round(metrics.render_time * 1000, 1),
+            'cache_hits': metrics.cache_hits,
+            'cache_misses': metrics.cache_misses,
+            'slow_queries': metrics.slow_queries,
+        }
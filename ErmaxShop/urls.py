@@ -14,14 +14,20 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
-from django.contrib import admin
+from django.apps import apps
 from django.urls import path, include
 
 urlpatterns = [
-    path('admin/', admin.site.urls),
     path('yene_api/user/', include('user.urls')),
     path('yene_api/products/', include('product.urls')),
     path('yene_api/orders/', include('orders.urls')),
     path('yene_api/dashboard/', include('dashboard.urls')),
     path('yene_api/engagement/', include('engagement.urls')),
 ]
+
+# Not installed in slim serving mode (settings.YENE_SLIM); importing
+# django.contrib.admin alone is a noticeable part of a cold start
+if apps.is_installed('django.contrib.admin'):
+    from django.contrib import admin
+
+    urlpatterns.insert(0, path('admin/', admin.site.urls))
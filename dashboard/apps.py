@@ -4,3 +4,16 @@ from django.apps import AppConfig
 class DashboardConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'dashboard'
+
+    def ready(self):
+        from django.db.models.signals import post_delete, post_save
+
+        from dashboard import rollups
+        from orders.models import Order, OrderItem
+
+        # Model signals, so every write path (API, dashboard, Django admin)
+        # keeps the rollup current
+        post_save.connect(rollups.order_changed, sender=Order, dispatch_uid='sales-rollup-order-saved')
+        post_delete.connect(rollups.order_changed, sender=Order, dispatch_uid='sales-rollup-order-deleted')
+        post_save.connect(rollups.order_item_changed, sender=OrderItem, dispatch_uid='sales-rollup-item-saved')
+        post_delete.connect(rollups.order_item_changed, sender=OrderItem, dispatch_uid='sales-rollup-item-deleted')
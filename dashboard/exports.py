@@ -0,0 +1,91 @@
+import csv
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+
+from orders.models import Order, OrderItem
+
+ORDER_COLUMNS = [
+    'order_code', 'status', 'payment_method', 'paid_amount', 'total_price', 'user_id',
+    'guest_name', 'guest_phone', 'guest_city', 'created_at', 'updated_at',
+]
+ORDER_ITEM_COLUMNS = [
+    'order__order_code', 'order__status', 'order__created_at', 'product_id', 'product_variant_id',
+    'product_name', 'color', 'size', 'quantity', 'price_per_unit', 'total_price',
+]
+
+
+def order_rows(status=None, created_from=None, created_to=None):
+    # status + created_at range/order is exactly the (status, created_at) index
+    queryset = Order.objects.all()
+    if status:
+        queryset = queryset.filter(status__in=status)
+    if created_from:
+        queryset = queryset.filter(created_at__gte=created_from)
+    if created_to:
+        queryset = queryset.filter(created_at__lt=created_to)
+    return ORDER_COLUMNS, queryset.order_by('created_at').values_list(*ORDER_COLUMNS)
+
+
+def order_item_rows(status=None, created_from=None, created_to=None):
+    queryset = OrderItem.objects.all()
+    if status:
+        queryset = queryset.filter(order__status__in=status)
+    if created_from:
+        queryset = queryset.filter(order__created_at__gte=created_from)
+    if created_to:
+        queryset = queryset.filter(order__created_at__lt=created_to)
+    return ORDER_ITEM_COLUMNS, queryset.order_by('order__created_at', 'id').values_list(*ORDER_ITEM_COLUMNS)
+
+
+# Spreadsheet apps run cells starting with these as formulas (guest names
+# and product names are customer input), so quote them the OWASP way
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def _safe_cell(value):
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def _iterate(queryset, chunk_size):
+    # A named (server-side) cursor only lives inside a transaction when the
+    # connection goes through a transaction-mode pooler, so keep one open
+    # for the whole stream.
+    with transaction.atomic():
+        yield from queryset.iterator(chunk_size=chunk_size)
+
+
+def stream_csv(columns, queryset, chunk_size=2000):
+    writer = csv.writer(_Echo())
+    yield writer.writerow([c.replace('__', '_') for c in columns])
+    batch = []
+    for row in _iterate(queryset, chunk_size):
+        batch.append(writer.writerow([_safe_cell(value) for value in row]))
+        if len(batch) >= chunk_size:
+            yield ''.join(batch)
+            batch = []
+    if batch:
+        yield ''.join(batch)
+
+
+def stream_jsonl(columns, queryset, chunk_size=2000):
+    keys = [c.replace('__', '_') for c in columns]
+    encoder = DjangoJSONEncoder(separators=(',', ':'))
+    # Nothing to say before the first row in JSONL, so send an empty chunk to
+    # flush the headers straight away
+    yield ''
+    batch = []
+    for row in _iterate(queryset, chunk_size):
+        batch.append(encoder.encode(dict(zip(keys, row))) + '\n')
+        if len(batch) >= chunk_size:
+            yield ''.join(batch)
+            batch = []
+    if batch:
+        yield ''.join(batch)
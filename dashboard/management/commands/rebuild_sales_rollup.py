@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from dashboard import rollups
+
+
+class Command(BaseCommand):
+    help = 'Recompute the daily sales rollup from all orders and order items'
+
+    def handle(self, *args, **options):
+        count = rollups.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {count} sales rollup rows'))
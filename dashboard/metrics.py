@@ -0,0 +1,80 @@
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db.models import Count, DecimalField, F, Func, IntegerField, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from orders.models import Order
+from user.models import User
+
+# Orders that are part-paid and still owe the rest of total_price
+OUTSTANDING_STATUSES = ('half_paid', 'awaiting_full')
+
+_money = DecimalField(max_digits=12, decimal_places=2)
+_zero = Value(Decimal('0.00'), output_field=_money)
+
+
+def _day_starts(now):
+    today = timezone.localdate(now)
+    tz = timezone.get_current_timezone()
+    start_of_today = timezone.make_aware(datetime.combine(today, time.min), tz)
+    start_of_week = start_of_today - timedelta(days=today.weekday())
+    return start_of_today, start_of_week
+
+
+def _money_sum(expression, condition):
+    return Coalesce(Sum(expression, filter=condition, output_field=_money), _zero)
+
+
+class _ScalarSubquery(Subquery):
+    # An uncorrelated one-row subquery is a constant, so the database takes it
+    # next to the aggregates; aggregate() only needs to be told so.
+    contains_aggregate = True
+
+
+def _user_count(since):
+    # A plain COUNT() call (no GROUP BY), so it yields one row even when empty
+    count = Func('pk', function='COUNT', output_field=IntegerField())
+    return _ScalarSubquery(User.objects.filter(created_at__gte=since).order_by().annotate(n=count).values('n'))
+
+
+def order_summary(now=None):
+    """
+    Headline dashboard numbers in a single query: conditional Count/Sum over
+    orders plus two scalar subqueries counting new users.
+
+    Revenue is order value: the sum of total_price over orders that are not
+    cancelled, the same definition as DailySalesRollup.revenue. Money still
+    owed on part-paid orders is half_paid_outstanding.
+    """
+    start_of_today, start_of_week = _day_starts(now or timezone.now())
+    paying = ~Q(status='cancelled')
+
+    aggregates = {f'status_{status}': Count('pk', filter=Q(status=status)) for status, _ in Order.STATUS_CHOICES}
+    aggregates.update(
+        orders_total=Count('pk'),
+        orders_today=Count('pk', filter=Q(created_at__gte=start_of_today)),
+        orders_this_week=Count('pk', filter=Q(created_at__gte=start_of_week)),
+        revenue_today=_money_sum('total_price', paying & Q(created_at__gte=start_of_today)),
+        revenue_this_week=_money_sum('total_price', paying & Q(created_at__gte=start_of_week)),
+        half_paid_outstanding=_money_sum(
+            F('total_price') - Coalesce('paid_amount', _zero), Q(status__in=OUTSTANDING_STATUSES)
+        ),
+        new_users_today=_user_count(start_of_today),
+        new_users_this_week=_user_count(start_of_week),
+    )
+    row = Order.objects.aggregate(**aggregates)
+
+    return {
+        'orders_by_status': {status: row[f'status_{status}'] for status, _ in Order.STATUS_CHOICES},
+        'orders_total': row['orders_total'],
+        'orders_today': row['orders_today'],
+        'orders_this_week': row['orders_this_week'],
+        'revenue_today': f"{row['revenue_today']:.2f}",
+        'revenue_this_week': f"{row['revenue_this_week']:.2f}",
+        'half_paid_outstanding': f"{row['half_paid_outstanding']:.2f}",
+        'new_users_today': row['new_users_today'],
+        'new_users_this_week': row['new_users_this_week'],
+        'generated_at': timezone.now().isoformat(),
+    }
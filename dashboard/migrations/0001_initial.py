@@ -0,0 +1,32 @@
+# Generated by Django 5.1.7 on 2026-10-18 10:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('product', '0006_productvariant_stock'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('status', models.CharField(max_length=20)),
+                ('order_count', models.IntegerField(default=0)),
+                ('items_sold', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('product', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='product.product')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['product', 'date'], name='dashboard_d_product_39dcb0_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('product__isnull', True)), fields=('date', 'status'), name='sales_rollup_day_status_uniq'), models.UniqueConstraint(condition=models.Q(('product__isnull', False)), fields=('date', 'status', 'product'), name='sales_rollup_day_status_product_uniq')],
+            },
+        ),
+    ]
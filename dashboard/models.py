@@ -1,3 +1,42 @@
 from django.db import models
+from django.db.models import Q
 
-# Create your models here.
+from product.models import Product
+
+
+class DailySalesRollup(models.Model):
+    """
+    Pre-aggregated sales per (day, order status[, product]), kept up to date
+    by dashboard.rollups. Rows without a product hold the order-level totals
+    (order count and order total_price); rows with a product hold that
+    product's share of the items. Revenue is order value (total_price), as in
+    dashboard.metrics.order_summary, not paid_amount. Rebuild with
+    `manage.py rebuild_sales_rollup`.
+    """
+    date = models.DateField()
+    status = models.CharField(max_length=20)
+    # OrderItem.product_id is a plain copy that may outlive the product, so
+    # no database constraint here either
+    product = models.ForeignKey(
+        Product, on_delete=models.CASCADE, null=True, blank=True, related_name='+', db_constraint=False
+    )
+    order_count = models.IntegerField(default=0)
+    items_sold = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['date', 'status'], condition=Q(product__isnull=True), name='sales_rollup_day_status_uniq'
+            ),
+            models.UniqueConstraint(
+                fields=['date', 'status', 'product'], condition=Q(product__isnull=False),
+                name='sales_rollup_day_status_product_uniq'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['product', 'date']),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.status} {self.product_id or 'all'}: {self.order_count} orders, {self.revenue}"
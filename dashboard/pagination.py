@@ -0,0 +1,34 @@
+from collections import OrderedDict
+
+from django.conf import settings
+from rest_framework.response import Response
+
+from ErmaxShop.pagination import KeysetPagination, estimated_count
+
+
+class OrderAdminPagination(KeysetPagination):
+    # Newest first, matching the (status, created_at) and created_at indexes
+    ordering = ('-created_at', '-id')
+    page_size = getattr(settings, 'ADMIN_ORDER_PAGE_SIZE', 50)
+    max_page_size = 200
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count, self.count_is_estimate = estimated_count(queryset)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('count', self.count),
+            ('count_is_estimate', self.count_is_estimate),
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema['properties'].update(
+            count={'type': 'integer'},
+            count_is_estimate={'type': 'boolean'},
+        )
+        return response_schema
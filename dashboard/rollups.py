@@ -0,0 +1,164 @@
+"""
+Maintenance of DailySalesRollup.
+
+An order contributes to one order-level row for (day, status) and to one row
+per product it contains. Rather than applying deltas, the rows of every day
+touched by a transaction are recomputed from that day's orders: Order and
+OrderItem post_save/post_delete (dashboard.apps) collect the days, and once
+the transaction commits a single 'dashboard.refresh_sales_rollup' job is
+enqueued (dashboard.tasks), so the request pays one INSERT whatever the
+order looks like and every write path (API, dashboard, Django admin) is
+covered. Recomputing is idempotent, so a retried or duplicated job is
+harmless. If a job is ever lost, `rebuild_sales_rollup` recomputes the
+table from scratch.
+"""
+import threading
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from dashboard.models import DailySalesRollup
+from jobs.queue import enqueue
+from orders.models import Order, OrderItem
+
+_pending = threading.local()
+
+
+def _rows(orders, items):
+    """Rollup rows for the given Order / OrderItem querysets."""
+    tz = timezone.get_current_timezone()
+    items_sold = {
+        (row['day'], row['order__status']): row['quantity']
+        for row in items.annotate(day=TruncDate('order__created_at', tzinfo=tz)).values(
+            'day', 'order__status'
+        ).annotate(quantity=Sum('quantity')).order_by()
+    }
+    rows = [
+        DailySalesRollup(
+            date=row['day'], status=row['status'], order_count=row['orders'],
+            items_sold=items_sold.get((row['day'], row['status']), 0), revenue=row['revenue'],
+        )
+        for row in orders.annotate(day=TruncDate('created_at', tzinfo=tz)).values('day', 'status').annotate(
+            orders=Count('pk'), revenue=Coalesce(Sum('total_price'), Decimal('0.00')),
+        ).order_by()
+    ]
+    rows += [
+        DailySalesRollup(
+            date=row['day'], status=row['order__status'], product_id=row['product_id'],
+            items_sold=row['quantity'], revenue=row['revenue'],
+        )
+        for row in items.filter(product_id__isnull=False).annotate(
+            day=TruncDate('order__created_at', tzinfo=tz)
+        ).values('day', 'order__status', 'product_id').annotate(
+            quantity=Sum('quantity'), revenue=Sum('total_price'),
+        ).order_by()
+    ]
+    return rows
+
+
+# ----------------------------- Recompute
+def rebuild():
+    """Recompute every rollup row from orders and order items; returns the row count."""
+    rows = _rows(Order.objects.all(), OrderItem.objects.all())
+    with transaction.atomic():
+        DailySalesRollup.objects.all().delete()
+        DailySalesRollup.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def rebuild_days(days):
+    """Recompute the rollup rows of the given local dates; returns the row count."""
+    days = sorted(set(days))
+    if not days:
+        return 0
+    tz = timezone.get_current_timezone()
+    in_days = Q()
+    for day in days:
+        start = timezone.make_aware(datetime.combine(day, time.min), tz)
+        in_days |= Q(created_at__gte=start, created_at__lt=start + timedelta(days=1))
+    rows = _rows(
+        Order.objects.filter(in_days),
+        OrderItem.objects.filter(order__in=Order.objects.filter(in_days).values('pk')),
+    )
+    with transaction.atomic():
+        DailySalesRollup.objects.filter(date__in=days).delete()
+        DailySalesRollup.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+# ----------------------------- Signal receivers (see dashboard.apps)
+class _PendingRefresh:
+    def __init__(self):
+        self.days = set()
+        self.order_ids = set()
+
+    def is_queued(self):
+        # Its on_commit callback is still waiting in the current transaction
+        return connection.in_atomic_block and any(func == self.run for _, func, _ in connection.run_on_commit)
+
+    def run(self):
+        if getattr(_pending, 'refresh', None) is self:
+            del _pending.refresh
+        enqueue('dashboard.refresh_sales_rollup', {
+            'days': sorted(day.isoformat() for day in self.days),
+            'order_ids': sorted(str(pk) for pk in self.order_ids),
+        })
+
+
+def refresh_on_commit(days=(), order_ids=()):
+    """
+    Refresh the rollup for these days (and the days of these orders) in the
+    background once the current transaction commits. Everything requested
+    within one transaction goes into one job.
+    """
+    pending = getattr(_pending, 'refresh', None)
+    queued = pending is not None and pending.is_queued()
+    if not queued:
+        pending = _PendingRefresh()
+        _pending.refresh = pending
+    pending.days.update(days)
+    pending.order_ids.update(pk for pk in order_ids if pk is not None)
+    if not queued:
+        transaction.on_commit(pending.run)
+
+
+def order_changed(sender, instance, **kwargs):
+    refresh_on_commit(days=[timezone.localdate(instance.created_at)])
+
+
+def order_item_changed(sender, instance, **kwargs):
+    refresh_on_commit(order_ids=[instance.order_id])
+
+
+# ----------------------------- Reads
+def daily_series(start, end, statuses=None, product_id=None):
+    """
+    One entry per day in [start, end] (zeros where nothing was sold), read
+    from the rollup only.
+    """
+    rows = DailySalesRollup.objects.filter(date__gte=start, date__lte=end)
+    rows = rows.filter(product_id=product_id) if product_id else rows.filter(product__isnull=True)
+    if statuses:
+        rows = rows.filter(status__in=statuses)
+    by_day = {
+        row['date']: row for row in rows.values('date').annotate(
+            orders=Sum('order_count'), items=Sum('items_sold'), total=Sum('revenue'),
+        ).order_by()
+    }
+
+    series = []
+    day = start
+    while day <= end:
+        row = by_day.get(day)
+        series.append({
+            'date': day.isoformat(),
+            'order_count': row['orders'] if row else 0,
+            'items_sold': row['items'] if row else 0,
+            'revenue': f"{row['total'] if row else Decimal('0.00'):.2f}",
+        })
+        day += timedelta(days=1)
+    return series
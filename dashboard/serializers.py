@@ -1,3 +1,4 @@
+from django.db import transaction
 from rest_framework import serializers
 from product.models import Product, ProductVariant, ProductVariantImage
 
@@ -12,7 +13,7 @@ class ProductVariantAdminSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = ProductVariant
-        fields = ['id', 'product', 'color', 'size', 'extra_price', 'images']
+        fields = ['id', 'product', 'color', 'size', 'extra_price', 'stock', 'images']
         extra_kwargs = {'product': {'required': True}}
 
 class ProductAdminSerializer(serializers.ModelSerializer):
@@ -22,6 +23,8 @@ class ProductAdminSerializer(serializers.ModelSerializer):
         model = Product
         fields = ['id', 'name', 'description', 'image_url', 'base_price', 'variants']
 
+    # Atomic so the product.signals receivers re-render the snapshot once, on commit
+    @transaction.atomic
     def create(self, validated_data):
         variants_data = validated_data.pop('variants', [])
     
@@ -42,12 +45,13 @@ class ProductAdminSerializer(serializers.ModelSerializer):
             images_data = variant_data.pop('images', [])
             variant = ProductVariant.objects.create(product=product, **variant_data)
             ProductVariantImage.objects.bulk_create([
-                ProductVariantImage(product_variant=variant, **img_data)
+                ProductVariantImage(variant=variant, **img_data)
                 for img_data in images_data
             ])
     
         return product
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         variants_data = validated_data.pop('variants', [])
         instance = super().update(instance, validated_data)
@@ -68,13 +72,13 @@ class ProductAdminSerializer(serializers.ModelSerializer):
                 # Update images
                 variant.images.all().delete()
                 ProductVariantImage.objects.bulk_create([
-                    ProductVariantImage(product_variant=variant, **img_data)
+                    ProductVariantImage(variant=variant, **img_data)
                     for img_data in images_data
                 ])
             else:
                 new_variant = ProductVariant.objects.create(product=instance, **variant_data)
                 ProductVariantImage.objects.bulk_create([
-                    ProductVariantImage(product_variant=new_variant, **img_data)
+                    ProductVariantImage(variant=new_variant, **img_data)
                     for img_data in images_data
                 ])
         
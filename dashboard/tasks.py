@@ -0,0 +1,22 @@
+"""
+Dashboard jobs (see jobs.queue), enqueued by dashboard.rollups.
+"""
+from datetime import date
+
+from django.utils import timezone
+
+from dashboard import rollups
+from jobs.queue import job
+from orders.models import Order
+
+
+@job('dashboard.refresh_sales_rollup')
+def refresh_sales_rollup(days=(), order_ids=()):
+    days = {date.fromisoformat(day) for day in days}
+    if order_ids:
+        # Orders deleted since were already reported by their own day
+        days.update(
+            timezone.localdate(created_at)
+            for created_at in Order.objects.filter(pk__in=order_ids).values_list('created_at', flat=True)
+        )
+    rollups.rebuild_days(days)
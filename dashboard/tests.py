@@ -1,3 +1,260 @@
+import csv
+import io
+import json
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from dashboard import metrics
+from dashboard.models import DailySalesRollup
+from jobs.models import Job
+from jobs.queue import run_pending
+from orders.models import Order, OrderItem
+from orders.tests import make_variants, order_payload
+from user.models import User
+
+
+def make_order(status='draft', created_at=None, total='100.00', items=1, **fields):
+    order = Order.objects.create(delivery_eta_days=3, status=status, total_price=Decimal(total), **fields)
+    if created_at is not None:
+        Order.objects.filter(pk=order.pk).update(created_at=created_at)
+        order.refresh_from_db()
+    OrderItem.objects.bulk_create([
+        OrderItem(
+            order=order, quantity=1, price_per_unit=Decimal(total), total_price=Decimal(total),
+            product_name=f'Item {i}', color='Red', size='M',
+        )
+        for i in range(items)
+    ])
+    return order
+
+
+class AdminTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.admin = User.objects.create_user(email='admin@example.com', password='pw', is_staff=True)
+        self.client.force_authenticate(self.admin)
+
+
+class OrderExportTests(AdminTestCase):
+    url = '/yene_api/dashboard/yene_admin/exports/'
+
+    def setUp(self):
+        super().setUp()
+        now = timezone.now()
+        self.old = make_order('completed', created_at=now - timedelta(days=10), items=2)
+        self.paid = make_order('half_paid', created_at=now - timedelta(days=1), items=3)
+        self.draft = make_order('draft', created_at=now)
+
+    def stream(self, response):
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode('utf-8')
+
+    def test_orders_csv_filtered_by_status_and_date(self):
+        since = (timezone.now() - timedelta(days=5)).date().isoformat()
+        response = self.client.get(f'{self.url}orders/?status=half_paid,completed&created_from={since}')
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        rows = list(csv.reader(io.StringIO(self.stream(response))))
+        self.assertEqual(rows[0][:2], ['order_code', 'status'])
+        self.assertEqual([r[0] for r in rows[1:]], [self.paid.order_code])
+
+    def test_csv_neutralizes_formulas(self):
+        Order.objects.filter(pk=self.paid.pk).update(guest_name='=HYPERLINK("http://evil")', guest_city='@SUM(A1)')
+        OrderItem.objects.filter(order=self.paid).update(product_name='+1-2')
+        orders = list(csv.reader(io.StringIO(self.stream(self.client.get(f'{self.url}orders/?status=half_paid')))))
+        header, row = orders
+        self.assertEqual(row[header.index('guest_name')], '\'=HYPERLINK("http://evil")')
+        self.assertEqual(row[header.index('guest_city')], "'@SUM(A1)")
+        items = list(csv.reader(io.StringIO(self.stream(self.client.get(f'{self.url}order-items/?status=half_paid')))))
+        self.assertEqual({r[items[0].index('product_name')] for r in items[1:]}, {"'+1-2"})
+
+    def test_order_items_jsonl(self):
+        response = self.client.get(f'{self.url}order-items/?export_format=jsonl')
+        lines = [json.loads(line) for line in self.stream(response).splitlines()]
+        self.assertEqual(len(lines), 6)
+        self.assertEqual(lines[0]['order_order_code'], self.old.order_code)
+        self.assertEqual(lines[0]['price_per_unit'], '100.00')
+
+    def test_bad_parameters(self):
+        self.assertEqual(self.client.get(f'{self.url}orders/?export_format=xml').status_code, 400)
+        self.assertEqual(self.client.get(f'{self.url}orders/?created_from=yesterday').status_code, 400)
+        self.assertEqual(self.client.get(f'{self.url}payments/').status_code, 404)
+
+    def test_requires_staff(self):
+        self.client.force_authenticate(None)
+        self.assertIn(self.client.get(f'{self.url}orders/').status_code, (401, 403))
+
+
+class DashboardSummaryTests(AdminTestCase):
+    url = '/yene_api/dashboard/yene_admin/summary/'
+
+    def test_summary_numbers(self):
+        now = timezone.now()
+        make_order('half_paid', total='300.00', paid_amount=Decimal('150.00'))
+        make_order('awaiting_full', total='100.00', paid_amount=Decimal('50.00'))
+        make_order('cancelled', total='80.00', paid_amount=Decimal('80.00'))
+        make_order('completed', created_at=now - timedelta(days=30), total='40.00', paid_amount=Decimal('40.00'))
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+        data = response.json()
+        self.assertEqual(data['orders_by_status']['half_paid'], 1)
+        self.assertEqual(data['orders_by_status']['completed'], 1)
+        self.assertEqual(data['orders_total'], 4)
+        self.assertEqual(data['orders_today'], 3)
+        # order value (total_price) of orders that aren't cancelled
+        self.assertEqual(data['revenue_today'], '400.00')
+        self.assertEqual(data['half_paid_outstanding'], '200.00')
+        self.assertEqual(data['new_users_today'], 1)
+
+    def test_cached_for_the_ttl_even_when_orders_change(self):
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            make_order('draft')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(self.url).json()['orders_total'], 0)
+
+    def test_empty_tables(self):
+        User.objects.all().delete()
+        data = metrics.order_summary()
+        self.assertEqual((data['orders_total'], data['new_users_today'], data['revenue_today']), (0, 0, '0.00'))
+
+
+class SalesRollupTests(AdminTestCase):
+    series_url = '/yene_api/dashboard/yene_admin/sales-series/'
+
+    def setUp(self):
+        super().setUp()
+        self.variants = make_variants(2, images=0)
+        self.product = self.variants[0].product
+
+    def create_order(self, quantity=2):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/yene_api/orders/', order_payload(self.variants, quantity), format='json')
+        self.assertEqual(response.status_code, 201)
+        run_pending('w')
+        return response.json()['order_code']
+
+    def rollup(self):
+        return sorted(
+            DailySalesRollup.objects.values_list('status', 'product_id', 'order_count', 'items_sold', 'revenue'),
+            key=lambda row: (row[0], str(row[1])),
+        )
+
+    def test_refresh_matches_rebuild(self):
+        self.create_order(quantity=2)
+        code = self.create_order(quantity=1)
+        self.assertEqual(self.rollup(), sorted([
+            ('draft', None, 2, 6, Decimal('630.00')),
+            ('draft', self.product.pk, 0, 6, Decimal('630.00')),
+        ], key=lambda row: (row[0], str(row[1]))))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                f'/yene_api/dashboard/yene_admin/orders/{code}/', {'status': 'cancelled'}, format='json'
+            )
+        self.assertEqual(response.status_code, 200)
+        run_pending('w')
+        incremental = self.rollup()
+        self.assertIn(('cancelled', None, 1, 2, Decimal('210.00')), incremental)
+        self.assertIn(('draft', None, 1, 4, Decimal('420.00')), incremental)
+
+        call_command('rebuild_sales_rollup', stdout=io.StringIO())
+        self.assertEqual(self.rollup(), [row for row in incremental if row[2] or row[3]])
+
+    def test_model_writes_refresh_the_rollup(self):
+        # e.g. the Django admin: plain saves and deletes, no custom signals
+        code = self.create_order(quantity=1)
+        self.create_order(quantity=2)
+        order = Order.objects.get(order_code=code)
+        order.status = 'completed'
+        with self.captureOnCommitCallbacks(execute=True):
+            order.save()
+        run_pending('w')
+        self.assertIn(('completed', None, 1, 2, Decimal('210.00')), self.rollup())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Order.objects.get(order_code=code).delete()
+        run_pending('w')
+        self.assertCountEqual(self.rollup(), [
+            ('draft', None, 1, 4, Decimal('420.00')),
+            ('draft', self.product.pk, 0, 4, Decimal('420.00')),
+        ])
+
+    def test_order_create_cost_does_not_grow_with_products(self):
+        counts = []
+        for products in (1, 6):
+            variants = [make_variants(1, images=0)[0] for _ in range(products)]
+            with CaptureQueriesContext(connection) as queries:
+                with self.captureOnCommitCallbacks(execute=True):
+                    response = self.client.post('/yene_api/orders/', order_payload(variants, 1), format='json')
+            self.assertEqual(response.status_code, 201)
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+        self.assertEqual(Job.objects.filter(name='dashboard.refresh_sales_rollup').count(), 2)
+
+    def test_series_reads_only_the_rollup(self):
+        self.create_order()
+        today = timezone.localdate()
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                f'{self.series_url}?date_from={(today - timedelta(days=2)).isoformat()}&date_to={today.isoformat()}'
+            )
+        series = response.json()
+        self.assertEqual([day['order_count'] for day in series], [0, 0, 1])
+        self.assertEqual(series[-1]['revenue'], '420.00')
+
+        product_series = self.client.get(f'{self.series_url}?product={self.product.pk}').json()
+        self.assertEqual(len(product_series), 30)
+        self.assertEqual(product_series[-1]['items_sold'], 4)
+        self.assertEqual(self.client.get(f'{self.series_url}?status=cancelled').json()[-1]['order_count'], 0)
+        self.assertEqual(self.client.get(f'{self.series_url}?date_from=2020-01-01').status_code, 400)
+
+
+class OrderAdminListTests(AdminTestCase):
+    url = '/yene_api/dashboard/yene_admin/orders/'
+
+    def setUp(self):
+        super().setUp()
+        now = timezone.now()
+        self.orders = [
+            make_order(
+                'half_paid' if i % 2 else 'draft', created_at=now - timedelta(hours=i), items=2,
+                payment_method='telebirr' if i % 3 == 0 else 'bank', guest_phone=f'09{i:08d}',
+            )
+            for i in range(7)
+        ]
+
+    def test_keyset_pages_without_items(self):
+        with self.assertNumQueries(2):
+            page = self.client.get(f'{self.url}?page_size=3').json()
+        self.assertEqual(page['count'], 7)
+        self.assertFalse(page['count_is_estimate'])
+        self.assertNotIn('items', page['results'][0])
+        self.assertNotIn('admin_note', page['results'][0])
+
+        seen = [o['order_code'] for o in page['results']]
+        while page['next']:
+            page = self.client.get(page['next']).json()
+            seen += [o['order_code'] for o in page['results']]
+        self.assertEqual(seen, [o.order_code for o in self.orders])
+
+    def test_filters(self):
+        def codes(query):
+            return [o['order_code'] for o in self.client.get(f'{self.url}?{query}').json()['results']]
 
-# Create your tests here.
+        self.assertEqual(codes('status=half_paid'), [o.order_code for o in self.orders[1::2]])
+        self.assertEqual(codes('payment_method=telebirr'), [self.orders[0].order_code, self.orders[3].order_code, self.orders[6].order_code])
+        since = (timezone.now() - timedelta(hours=2, minutes=30)).isoformat()
+        self.assertEqual(codes(f'status=draft,half_paid&created_from={since.replace("+", "%2B")}'), [o.order_code for o in self.orders[:3]])
+        self.assertEqual(codes('guest_phone=0900000004'), [self.orders[4].order_code])
+        self.assertEqual(codes(f'order_code={self.orders[5].order_code[:-2].lower()}'), [self.orders[5].order_code])
+        self.assertEqual(self.client.get(f'{self.url}?created_to=soon').status_code, 400)
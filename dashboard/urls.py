@@ -10,13 +10,22 @@ urlpatterns = [
     path('yene_admin/product-variants/<uuid:pk>/', views.ProductVariantAdminViewSet.as_view({'get': 'retrieve', 'put': 'update', 'delete': 'destroy'}), name='product-variant-detail'),
     
     path('yene_admin/product-variant-images/', views.ProductVariantImageAdminViewSet.as_view({'get': 'list', 'post': 'create'}), name='product-variant-image-list'),
-    path('yene_admin/product-variant-images/<uuid:pk>/', views.ProductVariantImageAdminViewSet.as_view({'get': 'retrieve', 'put': 'update', 'delete': 'destroy'}), name='product-variant-image-detail'),
+    path('yene_admin/product-variant-images/<int:pk>/', views.ProductVariantImageAdminViewSet.as_view({'get': 'retrieve', 'put': 'update', 'delete': 'destroy'}), name='product-variant-image-detail'),
     
     # Order Admin Views
+    path('yene_admin/exports/<str:dataset>/', views.OrderExportView.as_view(), name='order-export'),
     path('yene_admin/orders/', views.OrderAdminViewSet.as_view({'get': 'list', 'post': 'create'}), name='order-list'),
-    path('yene_admin/orders/<str:order_code>/', views.OrderAdminViewSet.as_view({'get': 'retrieve', 'put': 'update', 'delete': 'destroy'}), name='order-detail'),
+    path('yene_admin/orders/<str:order_code>/', views.OrderAdminViewSet.as_view({'get': 'retrieve', 'put': 'update', 'patch': 'partial_update', 'delete': 'destroy'}), name='order-detail'),
     
     # Registered User Admin Views
     path('yene_admin/users/', views.RegisteredUserViewSet.as_view({'get': 'list'}), name='user-list'),
     path('yene_admin/users/<uuid:pk>/', views.RegisteredUserViewSet.as_view({'get': 'retrieve'}), name='user-detail'),
+
+    # Dashboard KPIs
+    path('yene_admin/summary/', views.DashboardSummaryView.as_view(), name='dashboard-summary'),
+
+    path('yene_admin/sales-series/', views.SalesSeriesView.as_view(), name='sales-series'),
+
+    # Cache statistics
+    path('yene_admin/cache-stats/', views.CacheStatsView.as_view(), name='cache-stats'),
 ]
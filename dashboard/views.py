@@ -1,15 +1,38 @@
 from rest_framework import viewsets, permissions
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from datetime import datetime, time, timedelta
+import uuid
+from django.conf import settings
+from dashboard import exports, metrics, rollups
+from dashboard.pagination import OrderAdminPagination
+from ErmaxShop.cache import versioned_cache
 from product.models import Product, ProductVariant, ProductVariantImage
 from orders.models import Order
-from orders.serializers import OrderSerializer, OrderDetailSerializer
+from orders.signals import order_status_changed
+from orders.serializers import OrderListSerializer, OrderSerializer, OrderDetailSerializer
 from dashboard.serializers import (
     ProductAdminSerializer,
     ProductVariantAdminSerializer,
     ProductVariantImageAdminSerializer
 )
+from product.snapshots import rebuild_on_commit
+from product.inventory import quantities_by_variant, release_stock
 from user.models import User
 from user.serializers import UserSerializer
 
+def parse_moment(value):
+    # ISO datetime, or a date meaning the start of that day; aware either way
+    parsed = parse_datetime(value) or (parse_date(value) and datetime.combine(parse_date(value), time.min))
+    if not parsed:
+        raise ValueError(value)
+    return timezone.make_aware(parsed) if timezone.is_naive(parsed) else parsed
+
 class IsAdminUser(permissions.BasePermission):
     def has_permission(self, request, view):
         return bool(request.user and request.user.is_staff)
@@ -25,6 +48,14 @@ class ProductVariantAdminViewSet(viewsets.ModelViewSet):
     serializer_class = ProductVariantAdminSerializer
     permission_classes = [IsAdminUser]
 
+    # The product.signals receivers re-render the snapshot of the variant's
+    # product; one moved to another product leaves its old one stale too
+    @transaction.atomic
+    def perform_update(self, serializer):
+        previous_product_id = serializer.instance.product_id
+        serializer.save()
+        rebuild_on_commit(product_ids=[previous_product_id])
+
 class ProductVariantImageAdminViewSet(viewsets.ModelViewSet):
     queryset = ProductVariantImage.objects.select_related('variant')
     serializer_class = ProductVariantImageAdminSerializer
@@ -35,6 +66,32 @@ class OrderAdminViewSet(viewsets.ModelViewSet):
     queryset = Order.objects.prefetch_related('items').select_related('user').order_by('-created_at')
     permission_classes = [IsAdminUser]
     lookup_field = 'order_code'
+    pagination_class = OrderAdminPagination
+
+    def get_queryset(self):
+        if self.action != 'list':
+            return super().get_queryset()
+
+        # No prefetch: the list serializer has no items. An exact status plus
+        # a created_at range (and the created_at ordering) is served by the
+        # (status, created_at) index; the prefixes use plain LIKE 'x%'.
+        params = self.request.query_params
+        queryset = Order.objects.all()
+        if params.get('status'):
+            queryset = queryset.filter(status__in=params['status'].split(','))
+        if params.get('payment_method'):
+            queryset = queryset.filter(payment_method=params['payment_method'])
+        for param, lookup in (('created_from', 'created_at__gte'), ('created_to', 'created_at__lt')):
+            if params.get(param):
+                try:
+                    queryset = queryset.filter(**{lookup: parse_moment(params[param])})
+                except ValueError:
+                    raise ValidationError({param: 'Must be an ISO date or datetime'})
+        if params.get('guest_phone'):
+            queryset = queryset.filter(guest_phone__startswith=params['guest_phone'])
+        if params.get('order_code'):
+            queryset = queryset.filter(order_code__startswith=params['order_code'].upper())
+        return queryset
 
     def partial_update(self, request, *args, **kwargs):
         order = self.get_object()
@@ -58,11 +115,115 @@ class OrderAdminViewSet(viewsets.ModelViewSet):
         
         return super().partial_update(request, *args, **kwargs)
 
+    @transaction.atomic
+    def perform_update(self, serializer):
+        old_status = serializer.instance.status
+        order = serializer.save()
+        order_status_changed.send(sender=Order, order=order, old_status=old_status)
+        if order.status == 'cancelled':
+            # The conditional flip makes the release happen once, even for
+            # concurrent cancellations of the same order
+            if Order.objects.filter(pk=order.pk, stock_reserved=True).update(stock_reserved=False):
+                release_stock(quantities_by_variant(
+                    order.items.values_list('product_variant_id', 'quantity')
+                ))
+                order.stock_reserved = False
+
     def get_serializer_class(self):
         if self.action == 'retrieve':
             return OrderDetailSerializer
+        if self.action == 'list':
+            return OrderListSerializer
         return OrderSerializer
 
+# Streaming CSV / JSONL exports for payment reconciliation (admin only)
+class OrderExportView(APIView):
+    permission_classes = [IsAdminUser]
+    datasets = {
+        'orders': exports.order_rows,
+        'order-items': exports.order_item_rows,
+    }
+    formats = {
+        'csv': (exports.stream_csv, 'text/csv'),
+        'jsonl': (exports.stream_jsonl, 'application/x-ndjson'),
+    }
+
+    def get(self, request, dataset):
+        if dataset not in self.datasets:
+            return Response({"detail": "Unknown export"}, status=404)
+        export_format = request.query_params.get('export_format', 'csv')
+        if export_format not in self.formats:
+            return Response({"detail": "export_format must be csv or jsonl"}, status=400)
+
+        filters = {}
+        if request.query_params.get('status'):
+            filters['status'] = request.query_params['status'].split(',')
+        for param in ('created_from', 'created_to'):
+            value = request.query_params.get(param)
+            if value:
+                try:
+                    filters[param] = parse_moment(value)
+                except ValueError:
+                    return Response({"detail": f"{param} must be an ISO date or datetime"}, status=400)
+
+        columns, queryset = self.datasets[dataset](**filters)
+        stream, content_type = self.formats[export_format]
+        response = StreamingHttpResponse(stream(columns, queryset), content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{dataset}.{export_format}"'
+        return response
+
+# Headline KPIs for the dashboard home (admin only). Cached for
+# DASHBOARD_SUMMARY_TTL under a namespace nothing bumps: order writes don't
+# drop it, so busy periods still hit the cache.
+class DashboardSummaryView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        summary = versioned_cache.get_or_set(
+            ('dashboard',), 'summary', metrics.order_summary,
+            timeout=settings.DASHBOARD_SUMMARY_TTL,
+        )
+        return Response(summary)
+
+# Daily revenue / order-count series for charts, read from the rollup only (admin only)
+class SalesSeriesView(APIView):
+    permission_classes = [IsAdminUser]
+    max_days = 731
+
+    def get(self, request):
+        today = timezone.localdate()
+        try:
+            end = parse_date(request.query_params['date_to']) if request.query_params.get('date_to') else today
+            start = parse_date(request.query_params['date_from']) if request.query_params.get('date_from') \
+                else end - timedelta(days=29)
+            if not start or not end:
+                raise ValueError
+        except ValueError:
+            return Response({"detail": "date_from and date_to must be ISO dates"}, status=400)
+        if start > end or (end - start).days >= self.max_days:
+            return Response({"detail": f"Pick a range of 1 to {self.max_days} days"}, status=400)
+
+        statuses = request.query_params.get('status')
+        statuses = statuses.split(',') if statuses else [s for s, _ in Order.STATUS_CHOICES if s != 'cancelled']
+        product_id = request.query_params.get('product')
+        try:
+            product_id = uuid.UUID(product_id) if product_id else None
+        except ValueError:
+            return Response({"detail": "product must be a UUID"}, status=400)
+
+        return Response(rollups.daily_series(start, end, statuses, product_id))
+
+# Shared cache hit/miss counters per namespace (admin only)
+class CacheStatsView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(versioned_cache.stats())
+
+    def delete(self, request):
+        versioned_cache.reset_stats()
+        return Response(status=204)
+
 # Registered users listing (admin only)
 class RegisteredUserViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = User.objects.filter(is_active=True)
@@ -0,0 +1,76 @@
+"""
+Buffered UserHistory writes.
+
+record_event() does not INSERT right away: events are collected per
+transaction and written with one bulk_create when it commits (via
+transaction.on_commit), so an order action that logs several events costs
+one statement, issued after the order's own locks are gone. Outside a
+transaction the event is written immediately. If the transaction rolls
+back its events are discarded with it. Each savepoint gets its own buffer,
+so rolling back a savepoint drops just the events recorded inside it.
+"""
+import threading
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from engagement.models import UserHistory
+
+_buffers = threading.local()
+
+
+def _pending_buffers():
+    if not hasattr(_buffers, 'by_savepoint'):
+        _buffers.by_savepoint = {}
+    return _buffers.by_savepoint
+
+
+class _Buffer:
+    def __init__(self, key):
+        self.key = key
+        self.using = key[0]
+        self.events = []
+
+    def is_pending(self):
+        # Still queued in the current transaction (a rollback, of the
+        # transaction or of our savepoint, drops it)
+        connection = connections[self.using]
+        return connection.in_atomic_block and any(func == self.flush for _, func, _ in connection.run_on_commit)
+
+    def flush(self):
+        buffers = _pending_buffers()
+        if buffers.get(self.key) is self:
+            del buffers[self.key]
+        UserHistory.objects.using(self.using).bulk_create(self.events)
+
+
+def record_event(user, order, action_type, description='', using=DEFAULT_DB_ALIAS):
+    """Queue one UserHistory row (user/order may be instances or primary keys)."""
+    event = UserHistory(
+        user_id=getattr(user, 'pk', user),
+        order_id=getattr(order, 'pk', order),
+        action_type=action_type,
+        description=description,
+    )
+    buffers = _pending_buffers()
+    key = (using, tuple(connections[using].savepoint_ids))
+    buffer = buffers.get(key)
+    if buffer is not None and buffer.is_pending():
+        buffer.events.append(event)
+        return
+    # Forget buffers whose savepoint or transaction was rolled back
+    for stale in [k for k, b in buffers.items() if k[0] == using and not b.is_pending()]:
+        del buffers[stale]
+    buffer = _Buffer(key)
+    buffer.events.append(event)
+    buffers[key] = buffer
+    transaction.on_commit(buffer.flush, using=using)
+
+
+def history_for(user, since=None, until=None):
+    """A user's events in [since, until), newest first; a range scan of (user, created_at)."""
+    events = UserHistory.objects.filter(user=user)
+    if since is not None:
+        events = events.filter(created_at__gte=since)
+    if until is not None:
+        events = events.filter(created_at__lt=until)
+    return events.order_by('-created_at', '-id')
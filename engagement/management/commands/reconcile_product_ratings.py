@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from engagement.ratings import reconcile
+
+
+class Command(BaseCommand):
+    help = 'Recompute Product.rating_sum/count/avg from visible reviews and fix any drift'
+
+    def handle(self, *args, **options):
+        fixed = reconcile()
+        for pk in fixed:
+            self.stdout.write(f'Fixed {pk}')
+        self.stdout.write(self.style.SUCCESS(f'{len(fixed)} products corrected'))
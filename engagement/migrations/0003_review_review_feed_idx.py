@@ -0,0 +1,20 @@
+# Generated by Django 5.1.7 on 2026-10-18 10:43
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('engagement', '0002_initial'),
+        ('product', '0009_product_ratings'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['product', 'is_visible', 'created_at', 'id'], name='review_feed_idx'),
+        ),
+    ]
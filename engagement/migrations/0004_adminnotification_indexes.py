@@ -0,0 +1,23 @@
+# Generated by Django 5.1.7 on 2026-10-18 10:44
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('engagement', '0003_review_review_feed_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='adminnotification',
+            index=models.Index(fields=['user', 'created_at', 'id'], name='notification_feed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='adminnotification',
+            index=models.Index(condition=models.Q(('is_read', False)), fields=['user'], name='notification_unread_idx'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.1.7 on 2026-10-18 10:47
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('engagement', '0004_adminnotification_indexes'),
+        ('orders', '0008_order_prefix_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='userhistory',
+            index=models.Index(fields=['user', 'created_at', 'id'], name='user_history_range_idx'),
+        ),
+    ]
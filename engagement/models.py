@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 
 class Review(models.Model):
     user = models.ForeignKey('user.User', on_delete=models.CASCADE)
@@ -9,6 +9,22 @@ class Review(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # The product rating update (engagement.signals) commits or rolls back
+    # together with the review itself
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            return super().delete(*args, **kwargs)
+
+    class Meta:
+        indexes = [
+            # Per-product visible feed, newest first (engagement.views.ProductReviewFeedView)
+            models.Index(fields=['product', 'is_visible', 'created_at', 'id'], name='review_feed_idx'),
+        ]
+
 class AdminNotification(models.Model):
     user = models.ForeignKey('user.User', on_delete=models.CASCADE)
     title = models.CharField(max_length=255)
@@ -16,9 +32,24 @@ class AdminNotification(models.Model):
     is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Per-user feed, newest first
+            models.Index(fields=['user', 'created_at', 'id'], name='notification_feed_idx'),
+            # Unread badge and mark-read only ever touch unread rows, which
+            # stay few however many notifications pile up
+            models.Index(fields=['user'], condition=models.Q(is_read=False), name='notification_unread_idx'),
+        ]
+
 class UserHistory(models.Model):
     user = models.ForeignKey('user.User', on_delete=models.CASCADE)
     order = models.ForeignKey('orders.Order', on_delete=models.CASCADE)
     action_type = models.CharField(max_length=50)
     description = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Time-range reads per user (engagement.history.history_for)
+            models.Index(fields=['user', 'created_at', 'id'], name='user_history_range_idx'),
+        ]
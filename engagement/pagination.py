@@ -0,0 +1,22 @@
+from ErmaxShop.pagination import KeysetPagination
+
+
+class ReviewFeedPagination(KeysetPagination):
+    # Matches the (product, is_visible, created_at, id) review_feed_idx
+    ordering = ('-created_at', '-id')
+    page_size = 20
+    max_page_size = 100
+
+
+class UserHistoryPagination(KeysetPagination):
+    # Matches the (user, created_at, id) user_history_range_idx
+    ordering = ('-created_at', '-id')
+    page_size = 50
+    max_page_size = 200
+
+
+class NotificationPagination(KeysetPagination):
+    # Matches the (user, created_at, id) notification_feed_idx
+    ordering = ('-created_at', '-id')
+    page_size = 20
+    max_page_size = 100
@@ -0,0 +1,95 @@
+"""
+Denormalized rating aggregates on Product (rating_sum, rating_count and
+rating_avg), covering visible reviews only.
+
+Review saves and deletes run in a transaction (see engagement.models); the
+signals in engagement.signals turn each change into a (sum, count) delta
+that is applied here with a single relative UPDATE per product, so
+concurrent reviews of the same product never overwrite each other. Bulk
+queryset writes skip the signals; `manage.py reconcile_product_ratings`
+repairs any drift.
+"""
+from collections import Counter
+
+from django.db.models import Case, Count, DecimalField, F, FloatField, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Cast, Coalesce, Now, Round
+from django.db.models.lookups import GreaterThan
+
+from product.models import Product
+from product.snapshots import rebuild_product_snapshots
+
+
+def average(rating_sum, rating_count):
+    """SQL for round(sum / count, 2), or 0 when there are no reviews."""
+    # Divide as float (SQLite's NUMERIC cast keeps integers integral); Round
+    # casts back to numeric on PostgreSQL
+    return Case(
+        When(GreaterThan(rating_count, 0), then=Round(Cast(rating_sum, FloatField()) / rating_count, 2)),
+        default=Value(0),
+        output_field=DecimalField(max_digits=6, decimal_places=2),
+    )
+
+
+def contribution(product_id, rating, is_visible):
+    """What one review adds to its product: {product_id: (sum, count)}."""
+    if product_id is None or not is_visible:
+        return {}
+    return {product_id: (rating, 1)}
+
+
+def diff(old, new):
+    """Per-product (sum, count) change going from contribution `old` to `new`."""
+    sums, counts = Counter(), Counter()
+    for sign, part in ((-1, old), (1, new)):
+        for product_id, (rating_sum, rating_count) in part.items():
+            sums[product_id] += sign * rating_sum
+            counts[product_id] += sign * rating_count
+    return {pk: (sums[pk], counts[pk]) for pk in set(sums) | set(counts) if sums[pk] or counts[pk]}
+
+
+def apply_deltas(deltas):
+    """Apply {product_id: (sum delta, count delta)} and re-render those products."""
+    if not deltas:
+        return
+    for product_id, (sum_delta, count_delta) in deltas.items():
+        new_sum = F('rating_sum') + sum_delta
+        new_count = F('rating_count') + count_delta
+        Product.objects.filter(pk=product_id).update(
+            rating_sum=new_sum,
+            rating_count=new_count,
+            rating_avg=average(new_sum, new_count),
+            updated_at=Now(),
+        )
+    # update() skips post_save, so refresh what the catalog serves by hand
+    # (the rebuild bumps the 'products' cache namespace after commit)
+    rebuild_product_snapshots(deltas)
+
+
+def reconcile(product_ids=None):
+    """
+    Recompute the aggregates from visible reviews and fix products that
+    drifted. Returns the ids that were corrected.
+    """
+    from engagement.models import Review
+
+    visible = Review.objects.filter(product=OuterRef('pk'), is_visible=True).order_by().values('product')
+    actual_sum = Coalesce(Subquery(visible.annotate(s=Sum('rating')).values('s')), 0)
+    actual_count = Coalesce(Subquery(visible.annotate(c=Count('pk')).values('c')), 0)
+
+    products = Product.objects.all()
+    if product_ids is not None:
+        products = products.filter(pk__in=product_ids)
+    drifted = list(
+        products.annotate(actual_sum=actual_sum, actual_count=actual_count)
+        .filter(~Q(rating_sum=F('actual_sum')) | ~Q(rating_count=F('actual_count')) | ~Q(rating_avg=average(F('actual_sum'), F('actual_count'))))
+        .values_list('pk', flat=True)
+    )
+    if drifted:
+        Product.objects.filter(pk__in=drifted).update(
+            rating_sum=actual_sum,
+            rating_count=actual_count,
+            rating_avg=average(actual_sum, actual_count),
+            updated_at=Now(),
+        )
+        rebuild_product_snapshots(drifted)
+    return drifted
@@ -6,10 +6,30 @@ class ReviewSerializer(serializers.ModelSerializer):
         model = Review
         fields = ['id', 'user', 'product', 'rating', 'comment', 'is_visible', 'created_at', 'updated_at']
 
+# Public review feed: reviewer's display name only, never their contact details
+class ReviewFeedSerializer(serializers.ModelSerializer):
+    reviewer_name = serializers.CharField(source='user.full_name', read_only=True)
+
+    class Meta:
+        model = Review
+        fields = ['id', 'reviewer_name', 'rating', 'comment', 'created_at']
+
 class AdminNotificationSerializer(serializers.ModelSerializer):
     class Meta:
         model = AdminNotification
         fields = ['id', 'user', 'title', 'message', 'is_read', 'created_at']
+        # Always the requesting user (AdminNotificationViewSet.perform_create)
+        read_only_fields = ['user']
+
+# Bulk mark-read: explicit ids, or every unread notification
+class MarkReadSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(), required=False, max_length=1000)
+    all = serializers.BooleanField(default=False)
+
+    def validate(self, attrs):
+        if not attrs['all'] and not attrs.get('ids'):
+            raise serializers.ValidationError('Pass "ids" or "all": true')
+        return attrs
 
 class UserHistorySerializer(serializers.ModelSerializer):
     class Meta:
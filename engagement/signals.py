@@ -0,0 +1,32 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from engagement import ratings
+from engagement.models import Review
+
+
+# ----------------------------- Product rating aggregates
+@receiver(pre_save, sender=Review)
+def remember_rating(sender, instance, raw=False, **kwargs):
+    # What the stored row contributed before this save (nothing if new)
+    instance._rating_before = {}
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    before = Review.objects.select_for_update().filter(pk=instance.pk).values_list(
+        'product_id', 'rating', 'is_visible'
+    ).first()
+    if before:
+        instance._rating_before = ratings.contribution(*before)
+
+@receiver(post_save, sender=Review)
+def update_rating_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    after = ratings.contribution(instance.product_id, instance.rating, instance.is_visible)
+    ratings.apply_deltas(ratings.diff(getattr(instance, '_rating_before', {}), after))
+    instance._rating_before = after
+
+@receiver(post_delete, sender=Review)
+def update_rating_on_delete(sender, instance, **kwargs):
+    before = ratings.contribution(instance.product_id, instance.rating, instance.is_visible)
+    ratings.apply_deltas(ratings.diff(before, {}))
@@ -1,3 +1,241 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import transaction
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from engagement.history import record_event
+from engagement.models import AdminNotification, Review, UserHistory
+from orders.models import Order
+from product.models import Product
+from product.tests import make_product
+from user.models import User
+
+
+class ProductRatingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(email='reviewer@example.com', password='pw')
+        self.product = make_product('Dress')
+
+    def review(self, rating, product=None, **fields):
+        return Review.objects.create(user=self.user, product=product or self.product, rating=rating, comment='ok', **fields)
+
+    def ratings(self, product=None):
+        product = Product.objects.get(pk=(product or self.product).pk)
+        return product.rating_sum, product.rating_count, product.rating_avg
+
+    def test_create_edit_hide_delete(self):
+        first = self.review(5)
+        second = self.review(4)
+        self.review(1, is_visible=False)
+        self.assertEqual(self.ratings(), (9, 2, Decimal('4.50')))
+
+        second.rating = 2
+        second.save()
+        self.assertEqual(self.ratings(), (7, 2, Decimal('3.50')))
+
+        first.is_visible = False
+        first.save()
+        self.assertEqual(self.ratings(), (2, 1, Decimal('2.00')))
+
+        second.delete()
+        self.assertEqual(self.ratings(), (0, 0, Decimal('0.00')))
+
+    def test_moving_a_review_between_products(self):
+        other = make_product('Shirt')
+        review = self.review(3)
+        review.product = other
+        review.save()
+        self.assertEqual(self.ratings(), (0, 0, Decimal('0.00')))
+        self.assertEqual(self.ratings(other), (3, 1, Decimal('3.00')))
+
+    def test_catalog_exposes_and_sorts_by_rating(self):
+        best = make_product('Best')
+        self.review(3)
+        self.review(5, product=best)
+        self.review(4, product=best)
+        unrated = make_product('Unrated')
+
+        detail = self.client.get(f'/yene_api/products/{best.pk}/').json()
+        self.assertEqual((detail['rating_avg'], detail['rating_count']), ('4.50', 2))
+
+        first = self.client.get('/yene_api/products/?ordering=rating&page_size=2').json()
+        self.assertEqual([p['name'] for p in first['results']], ['Best', 'Dress'])
+        rest = self.client.get(first['next']).json()
+        self.assertEqual([p['name'] for p in rest['results']], [unrated.name])
+
+    def test_reconcile_fixes_drift(self):
+        self.review(4)
+        Review.objects.update(rating=2)  # bypasses the signals
+        Product.objects.filter(pk=self.product.pk).update(rating_count=7)
+        out = StringIO()
+        call_command('reconcile_product_ratings', stdout=out)
+        self.assertIn('1 products corrected', out.getvalue())
+        self.assertEqual(self.ratings(), (2, 1, Decimal('2.00')))
+        self.assertEqual(self.client.get(f'/yene_api/products/{self.product.pk}/').json()['rating_avg'], '2.00')
+
+        out = StringIO()
+        call_command('reconcile_product_ratings', stdout=out)
+        self.assertIn('0 products corrected', out.getvalue())
+
+
+class ReviewFeedTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.product = make_product('Dress')
+        self.other = make_product('Shirt')
+        self.users = [
+            User.objects.create_user(email=f'u{i}@example.com', password='pw', full_name=f'User {i}')
+            for i in range(5)
+        ]
+        self.visible = [
+            Review.objects.create(user=user, product=self.product, rating=4, comment=f'Review {i}')
+            for i, user in enumerate(self.users)
+        ]
+        Review.objects.create(user=self.users[0], product=self.product, rating=1, comment='Hidden', is_visible=False)
+        Review.objects.create(user=self.users[0], product=self.other, rating=2, comment='Other product')
+        self.url = f'/yene_api/engagement/products/{self.product.pk}/reviews/'
+
+    def test_visible_newest_first_in_pages(self):
+        with self.assertNumQueries(1):
+            page = self.client.get(f'{self.url}?page_size=2').json()
+        self.assertEqual(page['results'][0]['reviewer_name'], 'User 4')
+        self.assertNotIn('email', str(page['results'][0]))
+
+        comments = [r['comment'] for r in page['results']]
+        while page['next']:
+            page = self.client.get(page['next']).json()
+            comments += [r['comment'] for r in page['results']]
+        self.assertEqual(comments, [f'Review {i}' for i in reversed(range(5))])
+
+    def test_review_detail_uses_integer_ids(self):
+        response = self.client.get(f'/yene_api/engagement/reviews/{self.visible[0].pk}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['comment'], 'Review 0')
+
+
+class NotificationTests(TestCase):
+    url = '/yene_api/engagement/notifications/'
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(email='staff@example.com', password='pw')
+        self.other = User.objects.create_user(email='other@example.com', password='pw')
+        self.notes = AdminNotification.objects.bulk_create([
+            AdminNotification(user=self.user, title=f'N{i}', message='m', is_read=i < 2) for i in range(6)
+        ])
+        AdminNotification.objects.create(user=self.other, title='Not mine', message='m')
+        self.client.force_authenticate(self.user)
+
+    def test_list_is_scoped_and_paginated(self):
+        page = self.client.get(f'{self.url}?page_size=4').json()
+        titles = [n['title'] for n in page['results']]
+        titles += [n['title'] for n in self.client.get(page['next']).json()['results']]
+        self.assertEqual(titles, [f'N{i}' for i in reversed(range(6))])
+        other_note = AdminNotification.objects.get(user=self.other)
+        self.assertEqual(self.client.get(f'{self.url}{other_note.pk}/').status_code, 404)
+
+    def test_unread_count_and_bulk_mark_read(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(f'{self.url}unread-count/').json(), {'unread': 4})
+
+        other_note = AdminNotification.objects.get(user=self.other)
+        with self.assertNumQueries(1):
+            response = self.client.post(
+                f'{self.url}mark-read/', {'ids': [self.notes[2].pk, self.notes[3].pk, other_note.pk]}, format='json'
+            )
+        self.assertEqual(response.json(), {'updated': 2})
+        self.assertFalse(AdminNotification.objects.get(pk=other_note.pk).is_read)
+
+        self.assertEqual(self.client.post(f'{self.url}mark-read/', {'all': True}, format='json').json(), {'updated': 2})
+        self.assertEqual(self.client.get(f'{self.url}unread-count/').json(), {'unread': 0})
+        self.assertEqual(self.client.post(f'{self.url}mark-read/', {}, format='json').status_code, 400)
+
+    def test_requires_login(self):
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get(f'{self.url}unread-count/').status_code, 401)
+
+    def test_cannot_write_for_another_user(self):
+        response = self.client.post(self.url, {'user': self.other.pk, 'title': 'Hi', 'message': 'm'}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(AdminNotification.objects.get(pk=response.json()['id']).user, self.user)
+
+        mine = self.notes[0]
+        response = self.client.put(
+            f'{self.url}{mine.pk}/', {'user': self.other.pk, 'title': 'N0', 'message': 'm'}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(AdminNotification.objects.get(pk=mine.pk).user, self.user)
+
+
+class UserHistoryTests(TestCase):
+    url = '/yene_api/engagement/user-history/'
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(email='buyer@example.com', password='pw')
+        self.order = Order.objects.create(delivery_eta_days=3)
+
+    def test_events_are_written_in_one_insert_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with transaction.atomic():
+                for i in range(5):
+                    record_event(self.user, self.order, 'viewed', f'Event {i}')
+                self.assertFalse(UserHistory.objects.exists())
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(UserHistory.objects.count(), 5)
+
+        with self.assertNumQueries(1):
+            with self.captureOnCommitCallbacks(execute=True):
+                for i in range(3):
+                    record_event(self.user.pk, self.order.pk, 'viewed')
+
+    def test_rolled_back_events_are_dropped(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    record_event(self.user, self.order, 'lost')
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+            with transaction.atomic():
+                record_event(self.user, self.order, 'kept')
+        self.assertEqual(list(UserHistory.objects.values_list('action_type', flat=True)), ['kept'])
+
+    def test_rolled_back_savepoint_events_are_dropped(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                record_event(self.user, self.order, 'outer')
+                try:
+                    with transaction.atomic():
+                        record_event(self.user, self.order, 'inner')
+                        raise RuntimeError
+                except RuntimeError:
+                    pass
+                record_event(self.user, self.order, 'after')
+        self.assertEqual(
+            sorted(UserHistory.objects.values_list('action_type', flat=True)), ['after', 'outer'],
+        )
+
+    def test_time_range_read_is_scoped_to_user(self):
+        other = User.objects.create_user(email='other@example.com', password='pw')
+        now = timezone.now()
+        for hours, user in ((1, self.user), (5, self.user), (30, self.user), (2, other)):
+            event = UserHistory.objects.create(user=user, order=self.order, action_type=f'{hours}h', description='')
+            UserHistory.objects.filter(pk=event.pk).update(created_at=now - timedelta(hours=hours))
 
-# Create your tests here.
+        self.client.force_authenticate(self.user)
+        since = (now - timedelta(days=1)).isoformat().replace('+', '%2B')
+        with self.assertNumQueries(1):
+            page = self.client.get(f'{self.url}?since={since}').json()
+        self.assertEqual([e['action_type'] for e in page['results']], ['1h', '5h'])
+        self.assertEqual(self.client.get(f'{self.url}?user={other.pk}').json()['results'][0]['user'], str(self.user.pk))
+        self.assertEqual(self.client.get(f'{self.url}?since=yesterday').status_code, 400)
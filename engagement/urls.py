@@ -1,6 +1,7 @@
 from django.urls import path
 from .views import (
     ReviewViewSet,
+    ProductReviewFeedView,
     AdminNotificationViewSet,
     UserHistoryViewSet
 )
@@ -8,13 +9,16 @@ from .views import (
 urlpatterns = [
     # Review URLs
     path('reviews/', ReviewViewSet.as_view({'get': 'list', 'post': 'create'}), name='review-list'),
-    path('reviews/<uuid:pk>/', ReviewViewSet.as_view({'get': 'retrieve', 'put': 'update', 'delete': 'destroy'}), name='review-detail'),
+    path('reviews/<int:pk>/', ReviewViewSet.as_view({'get': 'retrieve', 'put': 'update', 'delete': 'destroy'}), name='review-detail'),
+    path('products/<uuid:product_id>/reviews/', ProductReviewFeedView.as_view(), name='product-review-feed'),
 
     # Notification URLs
     path('notifications/', AdminNotificationViewSet.as_view({'get': 'list', 'post': 'create'}), name='notification-list'),
-    path('notifications/<uuid:pk>/', AdminNotificationViewSet.as_view({'get': 'retrieve', 'put': 'update', 'delete': 'destroy'}), name='notification-detail'),
+    path('notifications/unread-count/', AdminNotificationViewSet.as_view({'get': 'unread_count'}), name='notification-unread-count'),
+    path('notifications/mark-read/', AdminNotificationViewSet.as_view({'post': 'mark_read'}), name='notification-mark-read'),
+    path('notifications/<int:pk>/', AdminNotificationViewSet.as_view({'get': 'retrieve', 'put': 'update', 'delete': 'destroy'}), name='notification-detail'),
 
     # User History URLs
     path('user-history/', UserHistoryViewSet.as_view({'get': 'list'}), name='user-history-list'),
-    path('user-history/<uuid:pk>/', UserHistoryViewSet.as_view({'get': 'retrieve'}), name='user-history-detail'),
+    path('user-history/<int:pk>/', UserHistoryViewSet.as_view({'get': 'retrieve'}), name='user-history-detail'),
 ]
@@ -1,15 +1,79 @@
-from rest_framework import viewsets
-from .models import Review, AdminNotification, UserHistory
-from .serializers import ReviewSerializer, AdminNotificationSerializer, UserHistorySerializer
+from rest_framework import generics, permissions, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.response import Response
+from .models import Review, AdminNotification
+from .history import history_for
+from .pagination import NotificationPagination, ReviewFeedPagination, UserHistoryPagination
+from .serializers import (
+    ReviewSerializer, ReviewFeedSerializer, AdminNotificationSerializer, MarkReadSerializer, UserHistorySerializer
+)
 
 class ReviewViewSet(viewsets.ModelViewSet):
     queryset = Review.objects.all()
     serializer_class = ReviewSerializer
 
+# Visible reviews of one product, newest first; one indexed range scan per page
+class ProductReviewFeedView(generics.ListAPIView):
+    serializer_class = ReviewFeedSerializer
+    pagination_class = ReviewFeedPagination
+
+    def get_queryset(self):
+        return Review.objects.filter(
+            product_id=self.kwargs['product_id'], is_visible=True
+        ).select_related('user').only(
+            'id', 'rating', 'comment', 'created_at', 'user__full_name'
+        )
+
+# Every action only sees the requesting user's notifications
 class AdminNotificationViewSet(viewsets.ModelViewSet):
-    queryset = AdminNotification.objects.all()
     serializer_class = AdminNotificationSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = NotificationPagination
+
+    def get_queryset(self):
+        return AdminNotification.objects.filter(user=self.request.user)
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
 
-class UserHistoryViewSet(viewsets.ModelViewSet):
-    queryset = UserHistory.objects.all()
+    @action(detail=False, methods=['get'], url_path='unread-count')
+    def unread_count(self, request):
+        # Answered from the partial notification_unread_idx
+        return Response({'unread': self.get_queryset().filter(is_read=False).count()})
+
+    @action(detail=False, methods=['post'], url_path='mark-read')
+    def mark_read(self, request):
+        serializer = MarkReadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        unread = self.get_queryset().filter(is_read=False)
+        if not serializer.validated_data['all']:
+            unread = unread.filter(pk__in=serializer.validated_data['ids'])
+        return Response({'updated': unread.update(is_read=True)})
+
+# A user's own history (staff may pass ?user=<id>), optionally within
+# ?since=<datetime>&until=<datetime>
+class UserHistoryViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = UserHistorySerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = UserHistoryPagination
+
+    def get_queryset(self):
+        params = self.request.query_params
+        user = self.request.user
+        if user.is_staff and params.get('user'):
+            user = params['user']
+        bounds = {}
+        for name in ('since', 'until'):
+            if params.get(name):
+                moment = parse_datetime(params[name])
+                if moment is None:
+                    raise ValidationError({name: 'Must be an ISO datetime'})
+                bounds[name] = timezone.make_aware(moment) if timezone.is_naive(moment) else moment
+        try:
+            return history_for(user, **bounds)
+        except DjangoValidationError:
+            raise ValidationError({'user': 'Must be a user id'})
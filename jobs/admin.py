@@ -0,0 +1,5 @@
+from django.contrib import admin
+from .models import Job
+
+# Dead jobs (status 'dead') are the dead-letter queue; inspect them here
+admin.site.register(Job)
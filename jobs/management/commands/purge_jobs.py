@@ -0,0 +1,27 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from jobs.models import Job
+
+
+class Command(BaseCommand):
+    help = 'Delete finished jobs older than --days (dead jobs are kept for inspection)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=7)
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        deleted = 0
+        while True:
+            ids = list(
+                Job.objects.filter(status=Job.DONE, finished_at__lt=cutoff)
+                .values_list('id', flat=True)[:options['batch_size']]
+            )
+            if not ids:
+                break
+            deleted += Job.objects.filter(id__in=ids).delete()[0]
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} finished jobs'))
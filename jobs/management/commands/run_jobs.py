@@ -0,0 +1,74 @@
+import os
+import signal
+import socket
+import threading
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+
+from jobs.queue import claim, run
+
+
+class Command(BaseCommand):
+    help = 'Run background jobs from the database queue (Ctrl+C / SIGTERM stops after the current jobs)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=2, help='Worker threads')
+        parser.add_argument('--poll-interval', type=float, default=2.0, help='Seconds to sleep when the queue is empty')
+        parser.add_argument('--once', action='store_true', help='Exit once no job is due (e.g. from cron)')
+
+    def handle(self, *args, **options):
+        self.stop = threading.Event()
+        self.once = options['once']
+        self.poll_interval = options['poll_interval']
+        self.processed = 0
+        self.failed = 0
+        self.lock = threading.Lock()
+        prefix = f'{socket.gethostname()}:{os.getpid()}'
+
+        previous_handlers = {}
+        if threading.current_thread() is threading.main_thread():
+            for signum in (signal.SIGINT, signal.SIGTERM):
+                previous_handlers[signum] = signal.signal(signum, lambda *_: self.stop.set())
+
+        concurrency = max(1, options['concurrency'])
+        try:
+            if concurrency == 1:
+                self.work(f'{prefix}:0')
+            else:
+                threads = [
+                    threading.Thread(target=self.work, args=(f'{prefix}:{i}',), daemon=True)
+                    for i in range(concurrency)
+                ]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    while thread.is_alive():
+                        thread.join(timeout=0.5)
+        finally:
+            for signum, handler in previous_handlers.items():
+                signal.signal(signum, handler)
+
+        self.stdout.write(self.style.SUCCESS(f'Ran {self.processed} jobs ({self.failed} failed)'))
+
+    def work(self, worker):
+        try:
+            while not self.stop.is_set():
+                # Called from inside a transaction (call_command in a test, a
+                # shell session) the connection isn't ours to recycle
+                if not connection.in_atomic_block:
+                    close_old_connections()
+                claimed = claim(worker)
+                if not claimed:
+                    if self.once:
+                        break
+                    self.stop.wait(self.poll_interval)
+                    continue
+                for job_row in claimed:
+                    ok = run(job_row)
+                    with self.lock:
+                        self.processed += 1
+                        self.failed += not ok
+        finally:
+            if threading.current_thread() is not threading.main_thread():
+                connection.close()
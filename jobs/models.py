@@ -0,0 +1,43 @@
+from django.db import models
+from django.db.models import Q
+
+
+class Job(models.Model):
+    """
+    One unit of background work, run by `manage.py run_jobs`. Jobs that keep
+    failing end up as 'dead' (the dead-letter queue) with their last error.
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    DEAD = 'dead'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (DEAD, 'Dead'),
+    ]
+
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_at = models.DateTimeField()
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Claim scan: only queued rows, oldest due first
+            models.Index(fields=['run_at', 'id'], condition=Q(status='queued'), name='job_ready_idx'),
+            # Reclaiming jobs from workers that died mid-run
+            models.Index(fields=['locked_at'], condition=Q(status='running'), name='job_running_idx'),
+            models.Index(fields=['status', 'finished_at']),
+        ]
+
+    def __str__(self):
+        return f'{self.name} #{self.pk} ({self.status})'
@@ -0,0 +1,134 @@
+"""
+A small job queue stored in the main database.
+
+    from jobs.queue import enqueue, job
+
+    @job('orders.order_created')        # in <app>/tasks.py
+    def order_created(order_id): ...
+
+    enqueue('orders.order_created', {'order_id': str(order.pk)})
+
+enqueue() is a plain INSERT, so a job enqueued inside a transaction only
+becomes visible (and runnable) if that transaction commits. Workers
+(`manage.py run_jobs`) claim due jobs with SELECT ... FOR UPDATE SKIP LOCKED
+where the database supports it (PostgreSQL), and with a compare-and-swap
+UPDATE otherwise (SQLite). Failed jobs are retried with exponential backoff
+and marked 'dead' after max_attempts. A job whose worker died is claimed
+again once its lock is older than JOBS_LOCK_TIMEOUT, so job functions must
+be safe to run more than once.
+"""
+import logging
+import random
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from jobs.models import Job
+
+logger = logging.getLogger(__name__)
+
+registry = {}
+
+
+def job(name):
+    """Register the decorated function as the handler of jobs called `name`."""
+    def register(func):
+        registry[name] = func
+        return func
+    return register
+
+
+def enqueue(name, payload=None, run_at=None, max_attempts=None):
+    return Job.objects.create(
+        name=name,
+        payload=payload or {},
+        run_at=run_at or timezone.now(),
+        max_attempts=max_attempts or settings.JOBS_MAX_ATTEMPTS,
+    )
+
+
+def backoff(attempts):
+    """Delay before retry number `attempts`: exponential, capped, with jitter."""
+    delay = min(settings.JOBS_BACKOFF_BASE * 2 ** (attempts - 1), settings.JOBS_BACKOFF_MAX)
+    return timedelta(seconds=delay * random.uniform(0.5, 1.0))
+
+
+# ----------------------------- Claiming
+def _claimable(now):
+    stale = now - timedelta(seconds=settings.JOBS_LOCK_TIMEOUT)
+    return Q(status=Job.QUEUED, run_at__lte=now) | Q(status=Job.RUNNING, locked_at__lt=stale)
+
+
+def claim(worker, limit=1):
+    """Atomically take up to `limit` due jobs for `worker`; returns the Job rows."""
+    now = timezone.now()
+    claimed = dict(status=Job.RUNNING, locked_by=worker, locked_at=now, attempts=F('attempts') + 1)
+
+    if connection.features.has_select_for_update_skip_locked:
+        # Rows another worker is claiming are skipped instead of waited on
+        with transaction.atomic():
+            ids = list(
+                Job.objects.select_for_update(skip_locked=True).filter(_claimable(now))
+                .order_by('run_at', 'id').values_list('pk', flat=True)[:limit]
+            )
+            if ids:
+                Job.objects.filter(pk__in=ids).update(**claimed)
+    else:
+        # Compare-and-swap on (status, attempts): attempts goes up on every
+        # claim, so only one worker's UPDATE can match a given candidate
+        ids = []
+        candidates = Job.objects.filter(_claimable(now)).order_by('run_at', 'id').values_list(
+            'pk', 'status', 'attempts'
+        )[:limit * 4]
+        for pk, status, attempts in candidates:
+            if Job.objects.filter(pk=pk, status=status, attempts=attempts).update(**claimed):
+                ids.append(pk)
+                if len(ids) == limit:
+                    break
+
+    return list(Job.objects.filter(pk__in=ids, locked_by=worker).order_by('run_at', 'id'))
+
+
+# ----------------------------- Running
+def run(job_row):
+    """Run one claimed job and record the outcome. Returns True on success."""
+    mine = Job.objects.filter(pk=job_row.pk, locked_by=job_row.locked_by, status=Job.RUNNING)
+    try:
+        func = registry.get(job_row.name)
+        if func is None:
+            raise LookupError(f'No handler registered for job {job_row.name!r}')
+        with transaction.atomic():
+            func(**job_row.payload)
+    except Exception:
+        error = traceback.format_exc()[-5000:]
+        now = timezone.now()
+        if job_row.attempts >= job_row.max_attempts:
+            logger.error('Job %s #%s is dead after %s attempts', job_row.name, job_row.pk, job_row.attempts)
+            mine.update(status=Job.DEAD, last_error=error, locked_by='', locked_at=None, finished_at=now)
+        else:
+            logger.warning('Job %s #%s failed (attempt %s), retrying', job_row.name, job_row.pk, job_row.attempts)
+            mine.update(
+                status=Job.QUEUED, last_error=error, locked_by='', locked_at=None,
+                run_at=now + backoff(job_row.attempts),
+            )
+        return False
+
+    mine.update(status=Job.DONE, last_error='', locked_by='', locked_at=None, finished_at=timezone.now())
+    return True
+
+
+def run_pending(worker, limit=None):
+    """Claim and run due jobs one at a time until none is left (or `limit` ran)."""
+    ran = 0
+    while limit is None or ran < limit:
+        claimed = claim(worker)
+        if not claimed:
+            break
+        for job_row in claimed:
+            run(job_row)
+            ran += 1
+    return ran
@@ -0,0 +1,118 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from engagement.models import AdminNotification, UserHistory
+from jobs.models import Job
+from jobs.queue import claim, enqueue, job, run, run_pending
+from orders.tests import make_variants, order_payload
+from user.models import User
+
+calls = []
+
+
+@job('tests.record')
+def record(value):
+    calls.append(value)
+
+
+@job('tests.fail')
+def fail():
+    raise RuntimeError('boom')
+
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_runs_due_jobs_in_order(self):
+        enqueue('tests.record', {'value': 1})
+        enqueue('tests.record', {'value': 2})
+        enqueue('tests.record', {'value': 3}, run_at=timezone.now() + timedelta(hours=1))
+        self.assertEqual(run_pending('w'), 2)
+        self.assertEqual(calls, [1, 2])
+        self.assertEqual(Job.objects.filter(status=Job.DONE).count(), 2)
+
+    def test_claimed_job_is_not_claimed_again(self):
+        enqueue('tests.record', {'value': 1})
+        first, = claim('w1')
+        self.assertEqual(first.attempts, 1)
+        self.assertEqual(claim('w2'), [])
+
+    def test_orphaned_job_is_reclaimed(self):
+        queued = enqueue('tests.record', {'value': 1})
+        claim('dead-worker')
+        Job.objects.filter(pk=queued.pk).update(locked_at=timezone.now() - timedelta(hours=1))
+        job_row, = claim('w2')
+        self.assertEqual((job_row.locked_by, job_row.attempts), ('w2', 2))
+        self.assertTrue(run(job_row))
+
+    @override_settings(JOBS_BACKOFF_BASE=10, JOBS_BACKOFF_MAX=15)
+    def test_retries_with_backoff_then_dead_letters(self):
+        queued = enqueue('tests.fail', max_attempts=3)
+        delays = []
+        for attempt in range(1, 4):
+            job_row, = claim('w')
+            started = timezone.now()
+            with self.assertLogs('jobs.queue'):
+                self.assertFalse(run(job_row))
+            job_row.refresh_from_db()
+            if attempt < 3:
+                self.assertEqual(job_row.status, Job.QUEUED)
+                delays.append((job_row.run_at - started).total_seconds())
+                Job.objects.filter(pk=queued.pk).update(run_at=timezone.now())
+        self.assertTrue(4 <= delays[0] <= 10.5 and 7 <= delays[1] <= 15.5)
+        self.assertEqual(job_row.status, Job.DEAD)
+        self.assertIn('RuntimeError: boom', job_row.last_error)
+        self.assertEqual(claim('w'), [])
+
+    def test_unknown_job_goes_to_dead_letter(self):
+        enqueue('tests.missing', max_attempts=1)
+        with self.assertLogs('jobs.queue', 'ERROR'):
+            run_pending('w')
+        self.assertIn('No handler registered', Job.objects.get(status=Job.DEAD).last_error)
+
+    def test_worker_command(self):
+        enqueue('tests.record', {'value': 'a'})
+        enqueue('tests.fail', max_attempts=1)
+        out = StringIO()
+        with self.assertLogs('jobs.queue', 'ERROR'):
+            call_command('run_jobs', '--once', '--concurrency=1', stdout=out)
+        self.assertIn('Ran 2 jobs (1 failed)', out.getvalue())
+        self.assertEqual(calls, ['a'])
+
+
+class OrderSideEffectJobTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.staff = User.objects.create_user(email='staff@example.com', password='pw', is_staff=True)
+        self.customer = User.objects.create_user(email='c@example.com', password='pw', full_name='Customer')
+        self.variants = make_variants(1, images=0)
+
+    def test_order_effects_run_in_the_background(self):
+        self.client.force_authenticate(self.customer)
+        response = self.client.post('/yene_api/orders/', order_payload(self.variants), format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertFalse(AdminNotification.objects.exists())
+        self.assertEqual(Job.objects.get().name, 'orders.order_created')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            run_pending('w')
+        code = response.json()['order_code']
+        self.assertEqual(AdminNotification.objects.get(user=self.staff).title, f'New order {code}')
+        self.assertEqual(UserHistory.objects.get(user=self.customer).action_type, 'order_created')
+
+        self.client.force_authenticate(self.staff)
+        self.client.patch(f'/yene_api/dashboard/yene_admin/orders/{code}/', {'status': 'cancelled'}, format='json')
+        with self.captureOnCommitCallbacks(execute=True):
+            run_pending('w')
+        self.assertEqual(
+            AdminNotification.objects.get(user=self.customer).title, f'Order {code} is now Cancelled'
+        )
+        self.assertEqual(UserHistory.objects.filter(user=self.customer).count(), 2)
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.7 on 2026-10-18 11:05
+
+import orders.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0004_orderitem_color_orderitem_product_id_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='order',
+            name='order_code',
+            field=models.CharField(default=orders.models.generate_order_code, editable=False, max_length=30, unique=True),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.1.7 on 2026-10-18 10:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0005_alter_order_order_code'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderIdempotencyKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=255, unique=True)),
+                ('request_hash', models.CharField(max_length=64)),
+                ('order_code', models.CharField(max_length=30)),
+                ('response_status', models.PositiveSmallIntegerField()),
+                ('response_body', models.TextField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('expires_at', models.DateTimeField(db_index=True)),
+            ],
+        ),
+    ]
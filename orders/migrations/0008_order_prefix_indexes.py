@@ -0,0 +1,23 @@
+# Generated by Django 5.1.7 on 2026-10-18 10:38
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0007_order_stock_reserved'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['order_code'], name='order_code_prefix_idx', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['guest_phone'], name='order_guest_phone_prefix_idx', opclasses=['varchar_pattern_ops']),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.1.7 on 2026-10-18 11:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0008_order_prefix_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='orderidempotencykey',
+            name='scope',
+            field=models.CharField(default='', max_length=64),
+        ),
+        migrations.AlterField(
+            model_name='orderidempotencykey',
+            name='key',
+            field=models.CharField(max_length=255),
+        ),
+        migrations.AddConstraint(
+            model_name='orderidempotencykey',
+            constraint=models.UniqueConstraint(fields=('scope', 'key'), name='order_idempotency_scope_key'),
+        ),
+    ]
@@ -1,19 +1,28 @@
 from django.conf import settings
-from django.db import models
+from django.db import IntegrityError, models, transaction
 from product.models import ProductVariant
+import hashlib
+import json
 import uuid
-import random
-import string
+import secrets
+import time
+
+# Order codes: "YENE-" + 8 base-36 chars of the millisecond clock (so codes
+# sort by creation time) + 8 random chars. No lookup is needed; the unique
+# constraint catches the practically impossible collision, see insert_unique().
+ORDER_CODE_ALPHABET = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
 
-# Generate unique order code
 def generate_order_code():
-    return "YENE-" + ''.join(random.choices(string.ascii_uppercase + string.digits, k=16))
+    millis = time.time_ns() // 1_000_000
+    stamp = ''
+    for _ in range(8):
+        millis, digit = divmod(millis, 36)
+        stamp = ORDER_CODE_ALPHABET[digit] + stamp
+    return "YENE-" + stamp + ''.join(secrets.choice(ORDER_CODE_ALPHABET) for _ in range(8))
 
 def generate_unique_order_code():
-    while True:
-        code = generate_order_code()
-        if not Order.objects.filter(order_code=code).exists():
-            return code
+    # Referenced by historical migrations
+    return generate_order_code()
 
 class Order(models.Model):
     STATUS_CHOICES = [
@@ -31,7 +40,7 @@ class Order(models.Model):
     ]
 
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-    order_code = models.CharField(max_length=30, unique=True, default=generate_unique_order_code, editable=False)
+    order_code = models.CharField(max_length=30, unique=True, default=generate_order_code, editable=False)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='draft')
     payment_method = models.CharField(max_length=10, choices=PAYMENT_METHOD_CHOICES, blank=True)
     paid_amount = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
@@ -45,6 +54,8 @@ class Order(models.Model):
     guest_city = models.CharField(max_length=100, null=True, blank=True)
     guest_address = models.TextField(null=True, blank=True)
     total_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    # True while this order holds stock taken by product.inventory.reserve_stock
+    stock_reserved = models.BooleanField(default=False, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -59,12 +70,32 @@ class Order(models.Model):
             self.guest_address = None
         super(Order, self).save(*args, **kwargs)
 
+    def insert_unique(self, max_attempts=5):
+        """
+        INSERT this new order, drawing a fresh order_code if the unique
+        constraint rejects the current one.
+        """
+        for attempt in range(max_attempts):
+            try:
+                with transaction.atomic():
+                    self.save(force_insert=True)
+                return self
+            except IntegrityError:
+                taken = Order.objects.filter(order_code=self.order_code).exists()
+                if not taken or attempt == max_attempts - 1:
+                    raise
+                self.order_code = generate_order_code()
+
     # ADD PROPER INDEXES INSTEAD OF INVALID FIELDS ATTRIBUTE
     class Meta:
         indexes = [
             models.Index(fields=['order_code']),
             models.Index(fields=['created_at']),
             models.Index(fields=['status', 'created_at']),
+            # Prefix searches from the admin order list (LIKE 'x%' on PostgreSQL
+            # needs the pattern opclass unless the database collation is C)
+            models.Index(fields=['order_code'], name='order_code_prefix_idx', opclasses=['varchar_pattern_ops']),
+            models.Index(fields=['guest_phone'], name='order_guest_phone_prefix_idx', opclasses=['varchar_pattern_ops']),
         ]
 
 class OrderItem(models.Model):
@@ -79,3 +110,39 @@ class OrderItem(models.Model):
     product_image = models.URLField(blank=True)
     # Add product ID reference
     product_id = models.UUIDField(editable=False, null=True)
+
+class OrderIdempotencyKey(models.Model):
+    # Result of an order POST sent with an Idempotency-Key header, replayed
+    # for retries until expires_at (purge_idempotency_keys removes old rows).
+    # Keys are only unique per client (scope, see scope_for) so one client
+    # can never be replayed another's order.
+    scope = models.CharField(max_length=64, default='')
+    key = models.CharField(max_length=255)
+    request_hash = models.CharField(max_length=64)
+    order_code = models.CharField(max_length=30)
+    response_status = models.PositiveSmallIntegerField()
+    response_body = models.TextField()  # rendered JSON, replayed byte for byte
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['scope', 'key'], name='order_idempotency_scope_key'),
+        ]
+
+    def __str__(self):
+        return f"{self.key} -> {self.order_code}"
+
+    @staticmethod
+    def scope_for(user, guest_phone):
+        # The signed-in user, or for guests the phone the order is placed with
+        if user is not None and user.is_authenticated:
+            identity = f'user:{user.pk}'
+        else:
+            identity = f'guest:{guest_phone or ""}'
+        return hashlib.sha256(identity.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def hash_request(data):
+        canonical = json.dumps(data, sort_keys=True, separators=(',', ':'), default=str)
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
@@ -32,3 +32,18 @@ class OrderDetailSerializer(serializers.ModelSerializer):
     class Meta:
         model = Order
         fields = '__all__'
+
+# Admin order list: flat order columns only, no items or long text fields
+class OrderListSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Order
+        fields = [
+            'id', 'order_code', 'status', 'payment_method', 'paid_amount', 'total_price',
+            'delivery_eta_days', 'user', 'guest_name', 'guest_phone', 'guest_city',
+            'is_active', 'created_at', 'updated_at',
+        ]
+
+class OrderSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Order
+        fields = '__all__'
@@ -0,0 +1,33 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import Signal, receiver
+
+from ErmaxShop.cache import versioned_cache
+from jobs.queue import enqueue
+from orders.models import Order, OrderItem
+
+
+# ----------------------------- Cache invalidation
+@receiver([post_save, post_delete], sender=Order)
+@receiver([post_save, post_delete], sender=OrderItem)
+def bump_orders(sender, **kwargs):
+    versioned_cache.bump_on_commit('orders')
+
+
+# ----------------------------- Order lifecycle
+# Sent by orders.views once an order and its items are written (bulk_create
+# skips post_save), and by the dashboard when an admin changes the status.
+order_created = Signal()  # order, items
+order_status_changed = Signal()  # order, old_status
+
+
+# ----------------------------- Background side effects (orders.tasks)
+@receiver(order_created, sender=Order)
+def enqueue_order_created(sender, order, **kwargs):
+    enqueue('orders.order_created', {'order_id': str(order.pk)})
+
+@receiver(order_status_changed, sender=Order)
+def enqueue_order_status_changed(sender, order, old_status, **kwargs):
+    if old_status != order.status:
+        enqueue('orders.order_status_changed', {
+            'order_id': str(order.pk), 'old_status': old_status, 'new_status': order.status,
+        })
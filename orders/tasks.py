@@ -0,0 +1,45 @@
+"""
+Order side effects that run in the background (see jobs.queue). They are
+enqueued from orders.signals in the same transaction as the order change.
+"""
+from engagement.history import record_event
+from engagement.models import AdminNotification
+from jobs.queue import job
+from orders.models import Order
+from user.models import User
+
+
+def _status_label(status):
+    return dict(Order.STATUS_CHOICES).get(status, status)
+
+
+@job('orders.order_created')
+def order_created(order_id):
+    order = Order.objects.filter(pk=order_id).first()
+    if order is None:
+        return
+    customer = order.guest_name or (order.user and order.user.full_name) or 'a customer'
+    AdminNotification.objects.bulk_create([
+        AdminNotification(
+            user_id=staff_id,
+            title=f'New order {order.order_code}',
+            message=f'{customer} placed an order of {order.total_price} ETB.',
+        )
+        for staff_id in User.objects.filter(is_staff=True, is_active=True).values_list('pk', flat=True)
+    ])
+    if order.user_id:
+        record_event(order.user_id, order, 'order_created', f'Placed order {order.order_code}')
+
+
+@job('orders.order_status_changed')
+def order_status_changed(order_id, old_status, new_status):
+    order = Order.objects.filter(pk=order_id).first()
+    if order is None or order.user_id is None:
+        return
+    description = f'Order {order.order_code}: {_status_label(old_status)} -> {_status_label(new_status)}'
+    record_event(order.user_id, order, 'status_changed', description)
+    AdminNotification.objects.create(
+        user_id=order.user_id,
+        title=f'Order {order.order_code} is now {_status_label(new_status)}',
+        message=description,
+    )
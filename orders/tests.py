@@ -1,3 +1,297 @@
-from django.test import TestCase
+import math
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, connections, transaction
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from orders.models import Order, OrderItem, OrderIdempotencyKey, generate_order_code
+from product.inventory import InsufficientStock, release_stock, reserve_stock
+from product.models import Product, ProductVariant, ProductVariantImage
+from user.models import User
+
+
+def make_variants(count, images=2, base_price='100.00', extra_price='5.00'):
+    product = Product.objects.create(
+        name='Dress', description='d', image_url='https://example.com/p.jpg', base_price=Decimal(base_price)
+    )
+    variants = ProductVariant.objects.bulk_create([
+        ProductVariant(product=product, color=f'C{i}', size='M', extra_price=Decimal(extra_price))
+        for i in range(count)
+    ])
+    ProductVariantImage.objects.bulk_create([
+        ProductVariantImage(variant=variant, image_url=f'https://example.com/{variant.pk}/{i}.jpg')
+        for variant in variants for i in range(images)
+    ])
+    return variants
+
+
+def order_payload(variants, quantity=2):
+    return {
+        'delivery_eta_days': 3,
+        'guest_name': 'Guest',
+        'guest_phone': '0911000000',
+        'guest_city': 'Addis Ababa',
+        'guest_address': 'Bole',
+        'items': [{'variant_id': str(v.pk), 'quantity': quantity} for v in variants],
+    }
+
+
+class OrderCreateTests(TestCase):
+    url = '/yene_api/orders/'
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.variants = make_variants(100)
+
+    def test_creates_order_with_total_and_primary_images(self):
+        response = self.client.post(self.url, order_payload(self.variants[:2], quantity=3), format='json')
+        self.assertEqual(response.status_code, 201)
+        order = Order.objects.get()
+        self.assertEqual(order.total_price, Decimal('630.00'))
+        self.assertEqual(len(response.data['items']), 2)
+        item = OrderItem.objects.get(product_variant=self.variants[0])
+        first_image = self.variants[0].images.order_by('pk').first()
+        self.assertEqual(item.product_image, first_image.image_url)
+        self.assertEqual(item.price_per_unit, Decimal('105.00'))
+
+    def test_query_count_does_not_grow_with_items(self):
+        item_fields = [f for f in OrderItem._meta.concrete_fields if not f.primary_key]
+        counts = set()
+        for size in (1, 10, 100):
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.post(self.url, order_payload(self.variants[:size]), format='json')
+            self.assertEqual(response.status_code, 201)
+            self.assertEqual(len(response.data['items']), size)
+
+            item_inserts = [q for q in ctx.captured_queries if q['sql'].startswith('INSERT INTO "orders_orderitem"')]
+            # One bulk INSERT, unless the backend caps parameters per statement (SQLite)
+            batch_size = connection.ops.bulk_batch_size(item_fields, [None] * size)
+            self.assertEqual(len(item_inserts), math.ceil(size / batch_size))
+            counts.add(len(ctx.captured_queries) - len(item_inserts))
+        self.assertEqual(len(counts), 1)
+
+    def test_unknown_variant_is_rejected(self):
+        payload = order_payload(self.variants[:1])
+        payload['items'].append({'variant_id': '7d1c2ab4-9a55-4a53-8f1e-000000000000', 'quantity': 1})
+        response = self.client.post(self.url, payload, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Order.objects.exists())
+
+    def test_invalid_quantity_is_rejected(self):
+        response = self.client.post(self.url, order_payload(self.variants[:1], quantity=0), format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+class OrderCodeTests(TestCase):
+    def test_format_and_time_ordering(self):
+        with mock.patch('orders.models.time.time_ns', return_value=1_790_000_000_000 * 10 ** 6):
+            first = generate_order_code()
+        with mock.patch('orders.models.time.time_ns', return_value=1_790_000_000_001 * 10 ** 6):
+            later = generate_order_code()
+        self.assertRegex(first, r'^YENE-[0-9A-Z]{16}$')
+        self.assertLess(first[:13], later[:13])
+
+    def test_unique_across_threads(self):
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            codes = list(pool.map(lambda _: generate_order_code(), range(20000)))
+        self.assertEqual(len(set(codes)), len(codes))
+
+    def test_insert_unique_retries_on_code_collision(self):
+        existing = Order.objects.create(delivery_eta_days=1)
+        order = Order(delivery_eta_days=1, order_code=existing.order_code)
+        order.insert_unique()
+        self.assertNotEqual(order.order_code, existing.order_code)
+        self.assertEqual(Order.objects.count(), 2)
+
+    def test_insert_without_collision_runs_no_lookup(self):
+        with CaptureQueriesContext(connection) as ctx:
+            Order(delivery_eta_days=1).insert_unique()
+        self.assertFalse(any(q['sql'].startswith('SELECT') for q in ctx.captured_queries))
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'needs a database with concurrent writers')
+class ConcurrentOrderCreationTests(TransactionTestCase):
+    def test_parallel_orders_never_fail(self):
+        variants = make_variants(3)
+        payload = order_payload(variants, quantity=1)
+
+        def place(_):
+            try:
+                return APIClient().post('/yene_api/orders/', payload, format='json').status_code
+            finally:
+                connections.close_all()
+
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            statuses = list(pool.map(place, range(2000)))
+        self.assertEqual(statuses.count(201), 2000)
+        codes = Order.objects.values_list('order_code', flat=True)
+        self.assertEqual(len(set(codes)), 2000)
+
+
+class IdempotencyKeyTests(TestCase):
+    url = '/yene_api/orders/'
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.variants = make_variants(2)
+        self.payload = order_payload(self.variants)
+
+    def post(self, key, payload=None):
+        return self.client.post(self.url, payload or self.payload, format='json', HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_replay_returns_stored_response_without_new_order(self):
+        first = self.post('k-1')
+        self.assertEqual(first.status_code, 201)
+        with CaptureQueriesContext(connection) as ctx:
+            replay = self.post('k-1')
+        self.assertEqual(replay.status_code, 201)
+        self.assertEqual(replay['Idempotent-Replayed'], 'true')
+        self.assertEqual(replay.json(), first.json())
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertEqual(len(ctx.captured_queries), 1)
+
+    def test_different_keys_create_different_orders(self):
+        self.post('k-1')
+        self.post('k-2')
+        self.assertEqual(Order.objects.count(), 2)
+
+    def test_key_reused_with_other_body_is_rejected(self):
+        self.post('k-1')
+        response = self.post('k-1', order_payload(self.variants[:1]))
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_failed_requests_are_not_remembered(self):
+        bad = dict(self.payload, items=[])
+        self.assertEqual(self.post('k-1', bad).status_code, 400)
+        self.assertEqual(self.post('k-1').status_code, 201)
+
+    def test_keys_are_scoped_to_the_client(self):
+        self.post('k-1')
+        other_guest = dict(self.payload, guest_phone='0922000000')
+        response = self.post('k-1', other_guest)
+        self.assertEqual(response.status_code, 201)
+        self.assertNotIn('Idempotent-Replayed', response)
+
+        user = User.objects.create_user(email='idem@example.com', password='pw')
+        self.client.force_authenticate(user)
+        response = self.post('k-1')
+        self.assertEqual(response.status_code, 201)
+        self.assertNotIn('Idempotent-Replayed', response)
+        self.assertEqual(self.post('k-1')['Idempotent-Replayed'], 'true')
+        self.assertEqual(Order.objects.count(), 3)
+
+    def test_expired_key_is_purged(self):
+        self.post('k-1')
+        OrderIdempotencyKey.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.post('k-2')
+        call_command('purge_idempotency_keys', stdout=StringIO())
+        self.assertEqual(list(OrderIdempotencyKey.objects.values_list('key', flat=True)), ['k-2'])
+
+
+class StockReservationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.a, self.b = make_variants(2)
+        ProductVariant.objects.filter(pk=self.a.pk).update(stock=5)
+        ProductVariant.objects.filter(pk=self.b.pk).update(stock=1)
+
+    def stock(self, variant):
+        return ProductVariant.objects.values_list('stock', flat=True).get(pk=variant.pk)
+
+    def test_reserve_is_all_or_nothing(self):
+        with self.assertRaises(InsufficientStock) as ctx:
+            reserve_stock({self.a.pk: 2, self.b.pk: 2})
+        self.assertEqual(ctx.exception.variant_ids, [self.b.pk])
+        self.assertEqual((self.stock(self.a), self.stock(self.b)), (5, 1))
+
+        with self.assertNumQueries(1):
+            reserve_stock({self.a.pk: 2, self.b.pk: 1})
+        self.assertEqual((self.stock(self.a), self.stock(self.b)), (3, 0))
+
+        release_stock({self.a.pk: 2, self.b.pk: 1})
+        self.assertEqual((self.stock(self.a), self.stock(self.b)), (5, 1))
+
+    def test_untracked_stock_is_never_short(self):
+        ProductVariant.objects.filter(pk=self.a.pk).update(stock=None)
+        reserve_stock({self.a.pk: 1000})
+        self.assertIsNone(self.stock(self.a))
+
+    def test_mixed_tracked_and_untracked(self):
+        ProductVariant.objects.filter(pk=self.b.pk).update(stock=None)
+        with self.assertRaises(InsufficientStock) as ctx:
+            reserve_stock({self.a.pk: 6, self.b.pk: 1})
+        self.assertEqual(ctx.exception.variant_ids, [self.a.pk])
+
+        # the UPDATE only covers tracked rows; the untracked one is found by a read
+        with CaptureQueriesContext(connection) as queries:
+            reserve_stock({self.a.pk: 2, self.b.pk: 1000})
+        self.assertEqual(len(queries), 2)
+        self.assertIn('IS NOT NULL', queries[0]['sql'])
+        self.assertEqual((self.stock(self.a), self.stock(self.b)), (3, None))
+
+        # ...unless the caller says which ones are untracked
+        with self.assertNumQueries(1):
+            reserve_stock({self.a.pk: 1, self.b.pk: 1000}, untracked={self.b.pk})
+        with self.assertNumQueries(0):
+            reserve_stock({self.b.pk: 1000}, untracked={self.b.pk})
+        self.assertEqual((self.stock(self.a), self.stock(self.b)), (2, None))
+
+    def test_order_out_of_stock_is_409_and_rolls_back(self):
+        payload = order_payload([self.a, self.b], quantity=2)
+        response = self.client.post('/yene_api/orders/', payload, format='json')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['variant_ids'], [str(self.b.pk)])
+        self.assertFalse(Order.objects.exists())
+        self.assertEqual(self.stock(self.a), 5)
+
+    def test_cancel_releases_stock_once(self):
+        response = self.client.post('/yene_api/orders/', order_payload([self.a], quantity=2), format='json')
+        self.assertEqual(self.stock(self.a), 3)
+        code = response.data['order_code']
+
+        admin = User.objects.create_user(email='admin@example.com', password='pw', is_staff=True)
+        self.client.force_authenticate(admin)
+        url = f'/yene_api/dashboard/yene_admin/orders/{code}/'
+        self.assertEqual(self.client.patch(url, {'status': 'cancelled'}, format='json').status_code, 200)
+        self.assertEqual(self.stock(self.a), 5)
+        self.assertFalse(Order.objects.get(order_code=code).stock_reserved)
+
+        # cancelled -> cancelled is rejected and cannot release twice
+        self.assertEqual(self.client.patch(url, {'status': 'cancelled'}, format='json').status_code, 400)
+        self.assertEqual(self.stock(self.a), 5)
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'needs a database with concurrent writers')
+class HotSkuConcurrencyTests(TransactionTestCase):
+    def test_no_oversell_under_contention(self):
+        variant, = make_variants(1)
+        ProductVariant.objects.filter(pk=variant.pk).update(stock=50)
+
+        def buy(_):
+            try:
+                with transaction.atomic():
+                    reserve_stock({variant.pk: 1})
+                return True
+            except InsufficientStock:
+                return False
+            finally:
+                connections.close_all()
+
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            results = list(pool.map(buy, range(200)))
+        self.assertEqual(results.count(True), 50)
+        self.assertEqual(ProductVariant.objects.get(pk=variant.pk).stock, 0)
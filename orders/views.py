@@ -1,13 +1,21 @@
 from rest_framework import viewsets, status
 from rest_framework.response import Response
+from rest_framework.renderers import JSONRenderer
 from rest_framework.permissions import AllowAny
-from .models import Order, OrderItem
+from .models import Order, OrderItem, OrderIdempotencyKey
 from .serializers import OrderCreateSerializer, OrderDetailSerializer  # Updated imports
-from product.models import ProductVariant 
-from django.http import Http404
+from .signals import order_created
+from product.models import ProductVariant, ProductVariantImage
+from product.inventory import InsufficientStock, quantities_by_variant, reserve_stock
+from django.http import Http404, HttpResponse
+from decimal import Decimal
 import logging
-from django.db import transaction
-from django.core.cache import cache
+import uuid
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.db.models import Prefetch
+from ErmaxShop.cache import versioned_cache
 
 
 logger = logging.getLogger(__name__)
@@ -22,40 +30,106 @@ class OrderViewSet(viewsets.ModelViewSet):
             return OrderDetailSerializer
         return OrderCreateSerializer  # Use our new simplified serializer
 
-    @transaction.atomic
     def create(self, request, *args, **kwargs):
+        # Clients may send an Idempotency-Key so a resubmitted POST replays
+        # the stored response instead of placing a second order.
+        key = request.headers.get('Idempotency-Key')
+        if key is None:
+            with transaction.atomic():
+                return self.create_order(request)
+
+        if len(key) > OrderIdempotencyKey._meta.get_field('key').max_length:
+            return Response({"detail": "Idempotency-Key is too long"}, status=status.HTTP_400_BAD_REQUEST)
+        request_hash = OrderIdempotencyKey.hash_request(request.data)
+        scope = OrderIdempotencyKey.scope_for(request.user, request.data.get('guest_phone'))
+
+        replay = self.replay_idempotent(scope, key, request_hash)
+        if replay is not None:
+            return replay
+
+        try:
+            with transaction.atomic():
+                response = self.create_order(request)
+                if response.status_code == status.HTTP_201_CREATED:
+                    OrderIdempotencyKey.objects.create(
+                        scope=scope,
+                        key=key,
+                        request_hash=request_hash,
+                        order_code=response.data['order_code'],
+                        response_status=response.status_code,
+                        response_body=JSONRenderer().render(response.data).decode('utf-8'),
+                        expires_at=timezone.now() + settings.ORDER_IDEMPOTENCY_TTL,
+                    )
+        except IntegrityError:
+            # A concurrent request with the same key committed first; our
+            # order was rolled back with the failed key insert.
+            replay = self.replay_idempotent(scope, key, request_hash)
+            if replay is None:
+                raise
+            return replay
+        return response
+
+    def replay_idempotent(self, scope, key, request_hash):
+        stored = OrderIdempotencyKey.objects.filter(scope=scope, key=key).first()
+        if stored is None:
+            return None
+        if stored.expires_at <= timezone.now():
+            stored.delete()
+            return None
+        if stored.request_hash != request_hash:
+            return Response(
+                {"detail": "Idempotency-Key was already used for a different request"},
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY
+            )
+        replay = HttpResponse(stored.response_body, status=stored.response_status, content_type='application/json')
+        replay['Idempotent-Replayed'] = 'true'
+        return replay
+
+    def create_order(self, request):
+        # Must run inside a transaction (see create).
+        # Fixed statement count whatever the number of items: variants (with
+        # products), their images, one INSERT for the order, one for the items.
+        # The order code needs no lookup; insert_unique() retries on a clash.
+        serializer = OrderCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
         try:
-            # Use our simplified serializer for validation
-            serializer = OrderCreateSerializer(data=request.data)
-            serializer.is_valid(raise_exception=True)
-            data = serializer.validated_data
-            
             user = request.user if request.user.is_authenticated else None
             
             # Validate items
             items = data.get('items', [])
             if not items:
                 return Response({"detail": "No items provided"}, status=status.HTTP_400_BAD_REQUEST)
-            
-            # Extract variant IDs
-            variant_ids = [item.get('variant_id') for item in items]
-            
-            # Validate all items have variant IDs
-            if not all(variant_ids):
-                return Response({"detail": "All items must have a variant_id"}, status=status.HTTP_400_BAD_REQUEST)
-            
-            # Fetch variants
+
+            # Validate variant ids and quantities before touching the database
+            lines = []
+            for item in items:
+                try:
+                    variant_id = uuid.UUID(str(item['variant_id']))
+                except (KeyError, ValueError):
+                    return Response({"detail": "All items must have a valid variant_id"}, status=status.HTTP_400_BAD_REQUEST)
+                try:
+                    quantity = int(item.get('quantity', 1))
+                except (TypeError, ValueError):
+                    quantity = 0
+                if quantity < 1:
+                    return Response({"detail": "Quantity must be a positive integer"}, status=status.HTTP_400_BAD_REQUEST)
+                lines.append((variant_id, quantity))
+
+            # Fetch variants with their product and images ordered so the
+            # first one is the primary image (no per-item images query)
             variants = ProductVariant.objects.select_related('product').prefetch_related(
-                'images'
-            ).in_bulk(variant_ids)
+                Prefetch('images', queryset=ProductVariantImage.objects.order_by('pk'), to_attr='ordered_images')
+            ).in_bulk({variant_id for variant_id, _ in lines})
             
             # Check for missing variants
-            missing_ids = [vid for vid in variant_ids if vid not in variants]
+            missing_ids = [str(vid) for vid, _ in lines if vid not in variants]
             if missing_ids:
                 return Response({"detail": f"Variants not found: {', '.join(missing_ids)}"}, status=status.HTTP_400_BAD_REQUEST)
 
-            # Create order
-            order = Order.objects.create(
+            # Price every line first so the order is inserted once, with its total
+            order = Order(
                 user=user,
                 delivery_eta_days=data.get('delivery_eta_days'),
                 customer_note=data.get('customer_note', ''),
@@ -65,22 +139,18 @@ class OrderViewSet(viewsets.ModelViewSet):
                 guest_address=data.get('guest_address'),
                 status='draft'
             )
-            
-            # Create order items
             order_items = []
             order_total = Decimal('0.00')
             
-            for item in items:
-                variant = variants[item['variant_id']]
-                quantity = int(item['quantity'])
+            for variant_id, quantity in lines:
+                variant = variants[variant_id]
                 
                 # Calculate prices
                 unit_price = variant.product.base_price + (variant.extra_price or Decimal('0.00'))
                 total_price = unit_price * quantity
                 order_total += total_price
                 
-                # Get first image if exists
-                first_image = variant.images.first()
+                first_image = variant.ordered_images[0] if variant.ordered_images else None
                 
                 order_items.append(OrderItem(
                     order=order,
@@ -94,11 +164,25 @@ class OrderViewSet(viewsets.ModelViewSet):
                     product_image=first_image.image_url if first_image else '',
                     product_id=variant.product.id
                 ))
-            
-            # Bulk create items
-            OrderItem.objects.bulk_create(order_items)
+
+            # Take the stock last: the reserved rows stay locked until commit
+            try:
+                reserve_stock(
+                    quantities_by_variant(lines),
+                    untracked={variant_id for variant_id, variant in variants.items() if variant.stock is None},
+                )
+            except InsufficientStock as e:
+                transaction.set_rollback(True)
+                return Response(
+                    {"detail": "Insufficient stock", "variant_ids": [str(vid) for vid in e.variant_ids]},
+                    status=status.HTTP_409_CONFLICT
+                )
+            order.stock_reserved = True
+
             order.total_price = order_total
-            order.save()
+            order.insert_unique()
+            OrderItem.objects.bulk_create(order_items)
+            order_created.send(sender=Order, order=order, items=order_items)
             
             # Return detailed response
             return Response(
@@ -108,16 +192,29 @@ class OrderViewSet(viewsets.ModelViewSet):
             
         except Exception as e:
             logger.exception("Order creation failed")
+            # The exception is swallowed, so make sure nothing half-written commits
+            transaction.set_rollback(True)
             return Response(
                 {"detail": "Internal server error"},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    def list(self, request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return super().list(request, *args, **kwargs)
+
+        def serialize():
+            return super(OrderViewSet, self).list(request, *args, **kwargs).data
+
+        key = f'user:{request.user.pk}:{request.get_full_path()}'
+        return Response(versioned_cache.get_or_set(('orders',), key, serialize))
+
     # Keep your existing get_queryset and retrieve methods
     def get_queryset(self):
         user = self.request.user
         if user.is_authenticated:
-            return Order.objects.filter(user=user)
+            # OrderDetailSerializer nests the items: one query for all of them
+            return Order.objects.filter(user=user).prefetch_related('items')
         return Order.objects.none()
 
     def retrieve(self, request, *args, **kwargs):
@@ -2,6 +2,17 @@ from django.contrib import admin
 from .models import Product, ProductVariant, ProductVariantImage, FeaturedCategory
 # Register your models here.
 admin.site.register(Product)
-admin.site.register(ProductVariant)
-admin.site.register(ProductVariantImage)
+
+
+# The changelists print __str__, which walks variant -> product
+@admin.register(ProductVariant)
+class ProductVariantAdmin(admin.ModelAdmin):
+    list_select_related = ('product',)
+
+
+@admin.register(ProductVariantImage)
+class ProductVariantImageAdmin(admin.ModelAdmin):
+    list_select_related = ('variant__product',)
+
+
 admin.site.register(FeaturedCategory)
\ No newline at end of file
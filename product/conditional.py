@@ -0,0 +1,69 @@
+import hashlib
+from functools import wraps
+
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+
+from ErmaxShop.cache import versioned_cache
+
+# Same namespaces ProductViewSet caches its bodies under
+CATALOG_NAMESPACES = ('products', 'variants')
+
+
+def _etag(request, namespaces):
+    """
+    ETag from the current versions of the cache namespaces the response is
+    built from, so it changes exactly when the cached body does (bumped after
+    commit by the model signals) and costs no database query. The full path
+    is part of it so each page and filter combination validates separately.
+    None, i.e. no conditional handling, while the cache is unavailable.
+
+    No Last-Modified: deletions leave no timestamp behind, so an
+    If-Modified-Since check could wrongly answer 304.
+    """
+    versions = versioned_cache.versions(namespaces)
+    if versions is None:
+        return None
+    digest = hashlib.sha1(
+        '|'.join([request.get_full_path()] + [str(v) for v in versions]).encode('utf-8')
+    ).hexdigest()
+    return quote_etag(digest)
+
+
+def catalog_validators(request, *args, **kwargs):
+    return _etag(request, CATALOG_NAMESPACES)
+
+
+def product_validators(request, *args, **kwargs):
+    return _etag(request, CATALOG_NAMESPACES)
+
+
+def featured_category_validators(request, *args, **kwargs):
+    return _etag(request, ('featured_categories',))
+
+
+def conditional(etag_func):
+    """
+    Like django.views.decorators.http.etag, but for view methods. Matching
+    If-None-Match requests get a 304 without running the view.
+    """
+    def decorator(method):
+        @wraps(method)
+        def inner(self, request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return method(self, request, *args, **kwargs)
+
+            # The ETag and the view's cached body share one version read
+            with versioned_cache.pinned_versions():
+                etag = etag_func(request, *args, **kwargs)
+                response = get_conditional_response(request, etag=etag) if etag else None
+                if response is None:
+                    response = method(self, request, *args, **kwargs)
+
+            if etag and response.status_code in (200, 304):
+                response.headers.setdefault('ETag', etag)
+                # Let clients keep the body but revalidate on every use
+                patch_cache_control(response, no_cache=True)
+            return response
+        return inner
+    return decorator
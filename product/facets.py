@@ -0,0 +1,106 @@
+"""
+Faceted filtering of the catalog on variant color, size and effective price
+(base_price + extra_price).
+
+A product matches when one of its variants satisfies every filter at once.
+Facet counts are "disjunctive": each facet is counted with the filters of
+the *other* facets applied, so picking a color does not hide the other
+colors. That costs one grouped query per facet (three in total), however
+many values there are, and the result is cached per filter combination in
+the products/variants cache namespaces.
+"""
+import hashlib
+import json
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.db.models import Count, DecimalField, Exists, ExpressionWrapper, F, OuterRef, Q
+from rest_framework.exceptions import ValidationError
+
+from ErmaxShop.cache import versioned_cache
+from product.models import ProductVariant
+
+FILTER_PARAMS = ('color', 'size', 'min_price', 'max_price')
+
+
+def _price():
+    return ExpressionWrapper(
+        F('product__base_price') + F('extra_price'),
+        output_field=DecimalField(max_digits=11, decimal_places=2),
+    )
+
+
+def parse_filters(params):
+    """Read facet filters from query params; empty values are ignored."""
+    filters = {}
+    for name in ('color', 'size'):
+        values = sorted({v.strip() for v in params.get(name, '').split(',') if v.strip()})
+        if values:
+            filters[name] = values
+    for name in ('min_price', 'max_price'):
+        if params.get(name):
+            try:
+                filters[name] = Decimal(params[name])
+            except InvalidOperation:
+                raise ValidationError({name: 'Must be a number'})
+            if not filters[name].is_finite():
+                raise ValidationError({name: 'Must be a number'})
+    return filters
+
+
+def _conditions(filters, skip=None):
+    q = Q()
+    if 'color' in filters and skip != 'color':
+        q &= Q(color__in=filters['color'])
+    if 'size' in filters and skip != 'size':
+        q &= Q(size__in=filters['size'])
+    if skip != 'price':
+        if 'min_price' in filters:
+            q &= Q(price__gte=filters['min_price'])
+        if 'max_price' in filters:
+            q &= Q(price__lte=filters['max_price'])
+    return q
+
+
+def _variants(filters, skip=None, with_price=False):
+    variants = ProductVariant.objects.all()
+    if with_price or 'min_price' in filters or 'max_price' in filters:
+        variants = variants.annotate(price=_price())
+    return variants.filter(_conditions(filters, skip))
+
+
+def filter_products(queryset, filters):
+    if not filters:
+        return queryset
+    return queryset.filter(Exists(_variants(filters).filter(product=OuterRef('pk'))))
+
+
+def _price_buckets():
+    bounds = [Decimal(str(b)) for b in getattr(settings, 'PRODUCT_PRICE_BUCKETS', (0, 500, 1000, 2500, 5000))]
+    return list(zip(bounds, bounds[1:] + [None]))
+
+
+def compute_facets(filters):
+    facets = {}
+    for name in ('color', 'size'):
+        rows = _variants(filters, skip=name).values(name).annotate(
+            count=Count('product', distinct=True)
+        ).order_by(name)
+        facets[name] = [{'value': row[name], 'count': row['count']} for row in rows]
+
+    buckets = _price_buckets()
+    counts = _variants(filters, skip='price', with_price=True).aggregate(**{
+        f'bucket{i}': Count('product', distinct=True, filter=Q(price__gte=low) & (Q(price__lt=high) if high else Q()))
+        for i, (low, high) in enumerate(buckets)
+    })
+    facets['price'] = [
+        {'min': str(low), 'max': str(high) if high is not None else None, 'count': counts[f'bucket{i}']}
+        for i, (low, high) in enumerate(buckets)
+    ]
+    return facets
+
+
+def facet_counts(filters):
+    canonical = json.dumps(filters, sort_keys=True, separators=(',', ':'), default=str)
+    key = 'facets:' + hashlib.sha1(canonical.encode('utf-8')).hexdigest()
+    return versioned_cache.get_or_set(('products', 'variants'), key, lambda: compute_facets(filters))
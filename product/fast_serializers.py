@@ -0,0 +1,128 @@
+"""
+Read-only fast path producing exactly what ProductSerializer renders.
+
+Rows come from three `values()` queries (products, variants, images) that
+are grouped in Python. Each field is formatted by a function picked once
+from the matching DRF serializer field. This skips the per-object,
+per-field serializer dispatch that dominates CPU time on large catalogs.
+Any field without a fast formatter falls back to the DRF field's own
+`to_representation`, so the output always matches (see product.tests).
+"""
+import datetime
+import decimal
+
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.settings import api_settings
+
+from product.models import Product, ProductVariant, ProductVariantImage
+from product.serializers import ProductSerializer, ProductVariantSerializer, ProductVariantImageSerializer
+
+
+def _str(value):
+    return value if type(value) is str else str(value)
+
+
+def _formatter(field):
+    """Pick the cheapest formatter that renders like `field.to_representation`."""
+    slow = field.to_representation
+
+    if isinstance(field, serializers.UUIDField) and field.uuid_format == 'hex_verbose':
+        return str
+
+    coerce_to_string = getattr(field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING)
+    if isinstance(field, serializers.DecimalField) and coerce_to_string and not field.localize \
+            and not field.normalize_output:
+        places = field.decimal_places
+
+        def decimal_formatter(value):
+            if type(value) is decimal.Decimal and value.as_tuple().exponent == -places:
+                return f'{value:f}'
+            return slow(value)
+        return decimal_formatter
+
+    if isinstance(field, serializers.DateTimeField) and getattr(field, 'format', None) in (None, 'iso-8601'):
+        # Only valid while the active timezone is UTC, which compile_fields checks
+        def datetime_formatter(value):
+            if type(value) is datetime.datetime and value.utcoffset() == datetime.timedelta(0):
+                text = value.isoformat()
+                return text[:-6] + 'Z' if text.endswith('+00:00') else slow(value)
+            return slow(value)
+        return datetime_formatter
+
+    if type(field) in (serializers.CharField, serializers.URLField, serializers.EmailField):
+        return _str
+
+    return slow
+
+
+def compile_fields(serializer_class, exclude=()):
+    """Return [(output name, model attribute, formatter)] for a ModelSerializer."""
+    utc = timezone.get_current_timezone_name() == 'UTC'
+    plan = []
+    for name, field in serializer_class().fields.items():
+        if name in exclude:
+            continue
+        if isinstance(field, serializers.DateTimeField) and not utc:
+            formatter = field.to_representation
+        else:
+            formatter = _formatter(field)
+        plan.append((name, field.source, formatter))
+    return plan
+
+
+def _row(values, plan):
+    ret = {}
+    for name, source, formatter in plan:
+        value = values[source]
+        ret[name] = None if value is None else formatter(value)
+    return ret
+
+
+def serialize_products(product_ids):
+    """
+    Serialize the given products in the order of `product_ids`, returning
+    {product_id: data}. Unknown ids are skipped. Costs three queries however
+    many products, variants and images there are.
+    """
+    product_plan = compile_fields(ProductSerializer, exclude=('variants',))
+    variant_plan = compile_fields(ProductVariantSerializer, exclude=('images',))
+    image_plan = compile_fields(ProductVariantImageSerializer)
+
+    product_ids = [Product._meta.pk.to_python(pk) for pk in product_ids]
+    if not product_ids:
+        return {}
+
+    products = {
+        row['id']: row for row in Product.objects.filter(pk__in=product_ids).values(
+            *[source for _, source, _ in product_plan]
+        )
+    }
+
+    # Same queries and ordering as prefetch_related('variants__images')
+    variants_by_product = {}
+    variant_rows = {}
+    for row in ProductVariant.objects.filter(product_id__in=list(products)).values(
+        'product_id', *[source for _, source, _ in variant_plan]
+    ):
+        data = _row(row, variant_plan)
+        data['images'] = []
+        variants_by_product.setdefault(row['product_id'], []).append(data)
+        variant_rows[row['id']] = data
+
+    if variant_rows:
+        for row in ProductVariantImage.objects.filter(variant_id__in=list(variant_rows)).values(
+            'variant_id', *[source for _, source, _ in image_plan]
+        ):
+            variant_rows[row['variant_id']]['images'].append(_row(row, image_plan))
+
+    # The nested lists are the last declared field of both serializers
+    result = {}
+    for pk in product_ids:
+        row = products.get(pk)
+        if row is None:
+            continue
+        data = _row(row, product_plan)
+        data['variants'] = variants_by_product.get(pk, [])
+        result[pk] = data
+    return result
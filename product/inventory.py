@@ -0,0 +1,80 @@
+import operator
+from collections import Counter
+from functools import reduce
+
+from django.db.models import Case, Exists, F, IntegerField, Q, Value, When
+
+from product.models import ProductVariant
+
+
+class InsufficientStock(Exception):
+    def __init__(self, variant_ids):
+        self.variant_ids = variant_ids
+        super().__init__(f"Insufficient stock for variants: {', '.join(str(v) for v in variant_ids)}")
+
+
+def quantities_by_variant(lines):
+    """Sum (variant_id, quantity) pairs into {variant_id: quantity}."""
+    totals = Counter()
+    for variant_id, quantity in lines:
+        totals[variant_id] += quantity
+    return dict(totals)
+
+
+def _delta(quantities):
+    return Case(
+        *[When(pk=variant_id, then=Value(quantity)) for variant_id, quantity in quantities.items()],
+        output_field=IntegerField(),
+    )
+
+
+def reserve_stock(quantities, untracked=()):
+    """
+    Take `quantities` ({variant_id: quantity}) out of stock with a single
+    conditional UPDATE. Each row is decremented only if it still has enough
+    units (re-checked by the database after any lock wait), so concurrent
+    buyers never need a SELECT ... FOR UPDATE read-modify-write. The row
+    locks last until commit, so reserve as late in the transaction as
+    possible.
+
+    Variants with NULL stock are not tracked: they always pass and the
+    UPDATE leaves their rows alone, so buyers of untracked SKUs never wait
+    on each other. Pass their ids as `untracked` when the caller already
+    loaded the variants; otherwise they cost one extra read.
+
+    The statement also refuses to touch any row when one of the variants is
+    already short, so a failed reservation normally changes nothing. Still,
+    call this inside transaction.atomic() and let InsufficientStock roll
+    the transaction back, in case a concurrent buyer won a race mid-way.
+    """
+    tracked = {pk: quantity for pk, quantity in quantities.items() if pk not in untracked}
+    if not tracked:
+        return
+    ids = list(tracked)
+    enough = reduce(operator.or_, [Q(pk=pk, stock__gte=quantity) for pk, quantity in tracked.items()])
+    short = reduce(operator.or_, [Q(pk=pk, stock__lt=quantity) for pk, quantity in tracked.items()])
+
+    updated = ProductVariant.objects.filter(pk__in=ids, stock__isnull=False).filter(enough).exclude(
+        Exists(ProductVariant.objects.filter(pk__in=ids).filter(short))
+    ).update(stock=F('stock') - _delta(tracked))
+
+    if updated != len(tracked):
+        # Either something is short/missing, or some rows are untracked
+        available = dict(ProductVariant.objects.filter(pk__in=ids).values_list('pk', 'stock'))
+        short_ids = [
+            pk for pk, quantity in tracked.items()
+            if pk not in available or (available[pk] is not None and available[pk] < quantity)
+        ]
+        untracked_count = sum(1 for pk in ids if pk in available and available[pk] is None)
+        if short_ids or updated + untracked_count != len(tracked):
+            raise InsufficientStock(short_ids)
+
+
+def release_stock(quantities):
+    """Put `quantities` back on the shelf in one UPDATE (untracked variants are skipped)."""
+    quantities = {variant_id: q for variant_id, q in quantities.items() if variant_id is not None}
+    if not quantities:
+        return
+    ProductVariant.objects.filter(pk__in=list(quantities), stock__isnull=False).update(
+        stock=F('stock') + _delta(quantities)
+    )
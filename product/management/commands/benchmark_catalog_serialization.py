@@ -0,0 +1,84 @@
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from product.fast_serializers import serialize_products
+from product.models import Product, ProductVariant, ProductVariantImage
+from product.serializers import ProductSerializer
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare ProductSerializer with product.fast_serializers on a seeded catalog. '
+        'Seed rows are created inside a transaction that is rolled back afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000])
+        parser.add_argument('--variants', type=int, default=3, help='Variants per product')
+        parser.add_argument('--images', type=int, default=2, help='Images per variant')
+        parser.add_argument('--repeat', type=int, default=3, help='Best of N timings')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                seeded = 0
+                for size in sorted(options['sizes']):
+                    self.seed(size - seeded, options['variants'], options['images'])
+                    seeded = size
+                    self.run(size, options['repeat'])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def seed(self, count, variants_per_product, images_per_variant):
+        products = Product.objects.bulk_create([
+            Product(
+                name=f'Product {i}',
+                description='Benchmark product ' * 4,
+                image_url=f'https://example.com/products/{i}.jpg',
+                base_price=Decimal('199.99'),
+            )
+            for i in range(count)
+        ], batch_size=1000)
+        variants = ProductVariant.objects.bulk_create([
+            ProductVariant(product=product, color=f'Color {v}', size='M', extra_price=Decimal('10.50'))
+            for product in products for v in range(variants_per_product)
+        ], batch_size=1000)
+        ProductVariantImage.objects.bulk_create([
+            ProductVariantImage(variant=variant, image_url=f'https://example.com/variants/{variant.pk}/{i}.jpg')
+            for variant in variants for i in range(images_per_variant)
+        ], batch_size=1000)
+
+    def best_of(self, repeat, func):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
+
+    def run(self, size, repeat):
+        renderer = JSONRenderer()
+        ids = list(Product.objects.order_by('-created_at', '-id').values_list('id', flat=True)[:size])
+
+        def drf():
+            queryset = Product.objects.filter(pk__in=ids).prefetch_related('variants__images')
+            return renderer.render(ProductSerializer(queryset, many=True).data)
+
+        def fast():
+            return renderer.render(list(serialize_products(ids).values()))
+
+        drf_time = self.best_of(repeat, drf)
+        fast_time = self.best_of(repeat, fast)
+        self.stdout.write(
+            f'{size:>7} products  drf {drf_time * 1000:9.1f} ms  '
+            f'fast {fast_time * 1000:9.1f} ms  speedup {drf_time / fast_time:5.1f}x'
+        )
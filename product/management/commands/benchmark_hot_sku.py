@@ -0,0 +1,85 @@
+import threading
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from product.inventory import InsufficientStock, reserve_stock
+from product.models import Product, ProductVariant
+
+
+class Command(BaseCommand):
+    help = (
+        'Hammer one variant with concurrent stock reservations and report throughput. '
+        'Creates a throwaway product and deletes it afterwards; meant for PostgreSQL.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=16)
+        parser.add_argument('--buyers', type=int, default=2000, help='Reservation attempts')
+        parser.add_argument('--stock', type=int, default=1000, help='Units on the hot SKU')
+        parser.add_argument('--quantity', type=int, default=1, help='Units per reservation')
+
+    def handle(self, *args, **options):
+        product = Product.objects.create(
+            name='Benchmark hot SKU', description='', image_url='https://example.com/hot.jpg',
+            base_price=Decimal('1.00'),
+        )
+        variant = ProductVariant.objects.create(product=product, color='Hot', size='M', stock=options['stock'])
+        outcomes = {'reserved': 0, 'sold_out': 0, 'errors': 0}
+        lock = threading.Lock()
+        latencies = []
+
+        remaining = iter(range(options['buyers']))
+
+        def buy():
+            start = time.perf_counter()
+            try:
+                with transaction.atomic():
+                    reserve_stock({variant.pk: options['quantity']})
+                outcome = 'reserved'
+            except InsufficientStock:
+                outcome = 'sold_out'
+            except Exception:
+                outcome = 'errors'
+            elapsed = time.perf_counter() - start
+            with lock:
+                outcomes[outcome] += 1
+                latencies.append(elapsed)
+
+        def worker():
+            # One connection per thread, closed when its share is done
+            try:
+                while True:
+                    with lock:
+                        if next(remaining, None) is None:
+                            return
+                    buy()
+            finally:
+                connection.close()
+
+        try:
+            start = time.perf_counter()
+            threads = [threading.Thread(target=worker) for _ in range(options['threads'])]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            wall = time.perf_counter() - start
+
+            variant.refresh_from_db()
+            sold = outcomes['reserved'] * options['quantity']
+            latencies.sort()
+            p50 = latencies[len(latencies) // 2] * 1000
+            p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+            self.stdout.write(
+                f"{options['buyers']} attempts on {options['threads']} threads in {wall:.2f}s "
+                f"({options['buyers'] / wall:.0f}/s)  reserved {outcomes['reserved']}  "
+                f"sold out {outcomes['sold_out']}  errors {outcomes['errors']}  "
+                f"p50 {p50:.1f} ms  p99 {p99:.1f} ms  stock left {variant.stock}"
+            )
+            if variant.stock != options['stock'] - sold or variant.stock < 0:
+                raise CommandError('Stock drifted: reservations and remaining stock disagree')
+        finally:
+            product.delete()
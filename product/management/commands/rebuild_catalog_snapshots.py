@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from product.models import Product
+from product.snapshots import rebuild_product_snapshots
+
+
+class Command(BaseCommand):
+    help = 'Re-render the stored public JSON snapshot of every product'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        ids = list(Product.objects.order_by('created_at', 'id').values_list('id', flat=True))
+        for start in range(0, len(ids), batch_size):
+            rebuild_product_snapshots(ids[start:start + batch_size])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {len(ids)} product snapshots'))
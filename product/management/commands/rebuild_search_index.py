@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from product.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the product full-text search index (search_vector / FTS5 table)'
+
+    def handle(self, *args, **options):
+        count = rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f'Indexed {count} products'))
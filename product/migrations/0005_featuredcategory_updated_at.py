@@ -0,0 +1,20 @@
+# Generated by Django 5.1.7 on 2026-10-18 10:03
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0004_productvariant_product_pro_product_733835_idx_productsnapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='featuredcategory',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
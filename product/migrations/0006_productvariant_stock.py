@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-18 10:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0005_featuredcategory_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productvariant',
+            name='stock',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
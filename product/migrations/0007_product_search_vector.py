@@ -0,0 +1,51 @@
+# Generated by Django 5.1.7 on 2026-10-18 10:39
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+# The GIN index and the FTS5 table only exist on their own database, so they
+# are created here by hand instead of through Meta.indexes.
+def create_search_structures(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(
+            "UPDATE product_product SET search_vector = "
+            "setweight(to_tsvector('simple', COALESCE(name, '')), 'A') || "
+            "setweight(to_tsvector('simple', COALESCE(description, '')), 'B')"
+        )
+        schema_editor.execute(
+            'CREATE INDEX product_search_vector_gin ON product_product USING gin (search_vector)'
+        )
+    elif vendor == 'sqlite':
+        schema_editor.execute(
+            'CREATE VIRTUAL TABLE product_search_fts USING fts5(product_id UNINDEXED, name, description)'
+        )
+        schema_editor.execute(
+            'INSERT INTO product_search_fts (product_id, name, description) '
+            'SELECT id, name, description FROM product_product'
+        )
+
+
+def drop_search_structures(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS product_search_vector_gin')
+    elif vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS product_search_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0006_productvariant_stock'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_structures, drop_search_structures),
+    ]
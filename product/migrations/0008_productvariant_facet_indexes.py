@@ -0,0 +1,21 @@
+# Generated by Django 5.1.7 on 2026-10-18 10:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0007_product_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='productvariant',
+            index=models.Index(fields=['color', 'size', 'product'], name='product_pro_color_592575_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productvariant',
+            index=models.Index(fields=['size', 'product'], name='product_pro_size_fa833d_idx'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.1.7 on 2026-10-18 10:42
+
+from django.db import migrations, models
+
+
+def backfill_ratings(apps, schema_editor):
+    Product = apps.get_model('product', 'Product')
+    Review = apps.get_model('engagement', 'Review')
+    ProductSnapshot = apps.get_model('product', 'ProductSnapshot')
+
+    totals = Review.objects.filter(is_visible=True).values('product').annotate(
+        s=models.Sum('rating'), c=models.Count('pk')
+    ).order_by()
+    for row in totals:
+        Product.objects.filter(pk=row['product']).update(
+            rating_sum=row['s'], rating_count=row['c'], rating_avg=round(row['s'] / row['c'], 2),
+        )
+    # Stored documents lack the new fields; the catalog rebuilds them lazily
+    ProductSnapshot.objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0008_productvariant_facet_indexes'),
+        ('engagement', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='rating_avg',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=6),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='rating_sum',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['rating_avg', 'rating_count', 'created_at', 'id'], name='product_rating_order_idx'),
+        ),
+        migrations.RunPython(backfill_ratings, migrations.RunPython.noop),
+    ]
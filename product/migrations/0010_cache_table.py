@@ -0,0 +1,28 @@
+from django.core.management.commands.createcachetable import Command as CreateCacheTable
+from django.db import migrations
+
+# LOCATION of the 'database' cache backend in settings._CACHE_BACKENDS
+CACHE_TABLE = 'yene_cache'
+
+
+def create_cache_table(apps, schema_editor):
+    # Created whatever backend the migrating process uses, so a deploy that
+    # selects YENE_CACHE_BACKEND=database finds it (no separate createcachetable)
+    command = CreateCacheTable()
+    command.verbosity = 0
+    command.create_table(schema_editor.connection.alias, CACHE_TABLE, dry_run=False)
+
+
+def drop_cache_table(apps, schema_editor):
+    schema_editor.execute(f'DROP TABLE IF EXISTS {schema_editor.quote_name(CACHE_TABLE)}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0009_product_ratings'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_cache_table, drop_cache_table),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.7 on 2026-10-18 12:40
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0010_cache_table'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='featuredcategory',
+            name='updated_at',
+        ),
+    ]
@@ -1,3 +1,4 @@
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 import uuid
 
@@ -9,6 +10,20 @@ class Product(models.Model):
     base_price = models.DecimalField(max_digits=10, decimal_places=2)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Weighted name/description tsvector, filled by product.search on
+    # PostgreSQL only (GIN index created in migration 0007)
+    search_vector = SearchVectorField(null=True, editable=False)
+    # Visible-review aggregates, kept in step by engagement.ratings
+    # (reconcile with `manage.py reconcile_product_ratings`)
+    rating_sum = models.IntegerField(default=0, editable=False)
+    rating_count = models.IntegerField(default=0, editable=False)
+    rating_avg = models.DecimalField(max_digits=6, decimal_places=2, default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            # ?ordering=rating keyset (see product.pagination)
+            models.Index(fields=['rating_avg', 'rating_count', 'created_at', 'id'], name='product_rating_order_idx'),
+        ]
     
     def __str__(self):
         return f'{self.name} - {self.id}'
@@ -19,12 +34,18 @@ class ProductVariant(models.Model):
     color = models.CharField(max_length=50)
     size = models.CharField(max_length=20)
     extra_price = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
+    # Units available to sell; NULL means stock is not tracked for this variant
+    stock = models.PositiveIntegerField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         indexes = [
             models.Index(fields=['product']),
+            # Facet filters/counts (product.facets): filter on color and/or
+            # size, then count distinct products
+            models.Index(fields=['color', 'size', 'product']),
+            models.Index(fields=['size', 'product']),
         ]
     
     def __str__(self):
@@ -36,8 +57,23 @@ class ProductVariantImage(models.Model):
     uploaded_at = models.DateTimeField(auto_now_add=True)
     
     def __str__(self):
-        return f'{self.variant.product.name} - {self.variant.color} - {self.variant.size} Image'
+        # Never query from __str__: describe the variant only when it was
+        # loaded along with the image (select_related('variant__product'))
+        variant_field = ProductVariantImage._meta.get_field('variant')
+        if variant_field.is_cached(self) and ProductVariant._meta.get_field('product').is_cached(self.variant):
+            return f'{self.variant.product.name} - {self.variant.color} - {self.variant.size} Image'
+        return f'Image {self.pk} of variant {self.variant_id}'
     
+class ProductSnapshot(models.Model):
+    # Pre-rendered public JSON for one product, rebuilt by product.snapshots
+    # whenever the dashboard writes the product, its variants or their images.
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, primary_key=True, related_name='snapshot')
+    document = models.TextField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'Snapshot {self.product_id}'
+
 class FeaturedCategory(models.Model):
     title = models.CharField(max_length=100)
     description = models.TextField()
@@ -0,0 +1,65 @@
+from django.conf import settings
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import _positive_int
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from ErmaxShop.pagination import KeysetPagination, prerendered_page
+
+
+class ProductCursorPagination(KeysetPagination):
+    # Same key as the catalog's '-created_at' ordering, with id as tie-breaker
+    ordering = ('-created_at', '-id')
+    page_size = getattr(settings, 'PRODUCT_PAGE_SIZE', 20)
+    max_page_size = getattr(settings, 'PRODUCT_MAX_PAGE_SIZE', 100)
+
+
+class ProductRatingPagination(ProductCursorPagination):
+    # Best rated first; among equal averages more reviews win, then newest
+    ordering = ('-rating_avg', '-rating_count', '-created_at', '-id')
+
+
+class ProductSearchPagination:
+    """
+    Page-number pagination over ranked search results. Ranks have no stable
+    keyset, so pages are OFFSET slices; one extra id is fetched to know
+    whether there is a next page, so no COUNT(*) is needed.
+    """
+    page_size = getattr(settings, 'PRODUCT_PAGE_SIZE', 20)
+    max_page_size = getattr(settings, 'PRODUCT_MAX_PAGE_SIZE', 100)
+    page_query_param = 'page'
+    page_size_query_param = 'page_size'
+    max_page = 50
+
+    def paginate(self, request, fetch_ids):
+        """Call fetch_ids(offset, limit) for the requested page and return its ids."""
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        try:
+            self.page = _positive_int(request.query_params.get(self.page_query_param, 1), strict=True, cutoff=self.max_page)
+        except ValueError:
+            raise NotFound('Invalid page')
+
+        ids = fetch_ids((self.page - 1) * self.page_size, self.page_size + 1)
+        self.has_next = len(ids) > self.page_size and self.page < self.max_page
+        return ids[:self.page_size]
+
+    def get_page_size(self, request):
+        try:
+            return _positive_int(request.query_params[self.page_size_query_param], strict=True, cutoff=self.max_page_size)
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return replace_query_param(self.base_url, self.page_query_param, self.page + 1)
+
+    def get_previous_link(self):
+        if self.page == 1:
+            return None
+        if self.page == 2:
+            return remove_query_param(self.base_url, self.page_query_param)
+        return replace_query_param(self.base_url, self.page_query_param, self.page - 1)
+
+    def get_prerendered_response(self, documents):
+        return prerendered_page(self.get_next_link(), self.get_previous_link(), documents)
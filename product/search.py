@@ -0,0 +1,107 @@
+"""
+Full-text search over Product.name / description.
+
+PostgreSQL: a stored `Product.search_vector` (name weighted above
+description) behind a GIN index, ranked with ts_rank.
+SQLite: an FTS5 virtual table, `product_search_fts`, ranked with bm25().
+Both are created by migration 0007 for the matching database only. They
+are refreshed from the Product post_save signal, and `manage.py
+rebuild_search_index` fills them from scratch.
+"""
+import re
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connection
+from django.db.models import F, Q
+
+from product.models import Product
+
+FTS_TABLE = 'product_search_fts'
+
+
+def _config():
+    return getattr(settings, 'PRODUCT_SEARCH_CONFIG', 'simple')
+
+
+def tokenize(text):
+    return re.findall(r'\w+', text.lower())
+
+
+def _vector():
+    config = _config()
+    return SearchVector('name', weight='A', config=config) + SearchVector('description', weight='B', config=config)
+
+
+# ----------------------------- Indexing
+def index_products(product_ids):
+    """Refresh the search index entries of `product_ids` (deleted ids are dropped)."""
+    product_ids = [pk for pk in product_ids if pk is not None]
+    if not product_ids:
+        return
+    if connection.vendor == 'postgresql':
+        Product.objects.filter(pk__in=product_ids).update(search_vector=_vector())
+    elif connection.vendor == 'sqlite':
+        params = [Product._meta.pk.get_db_prep_value(pk, connection) for pk in product_ids]
+        placeholders = ','.join(['%s'] * len(params))
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE product_id IN ({placeholders})', params)
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (product_id, name, description) '
+                f'SELECT id, name, description FROM {Product._meta.db_table} WHERE id IN ({placeholders})',
+                params,
+            )
+
+
+def rebuild_index():
+    if connection.vendor == 'postgresql':
+        return Product.objects.update(search_vector=_vector())
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (product_id, name, description) '
+                f'SELECT id, name, description FROM {Product._meta.db_table}'
+            )
+            return cursor.rowcount
+    return 0
+
+
+# ----------------------------- Querying
+def search_product_ids(text, offset, limit):
+    """
+    Ids of the products matching `text`, best match first, sliced to
+    [offset, offset + limit). Every word must match; the last one is also
+    matched as a prefix so partially typed queries find something.
+    """
+    tokens = tokenize(text)
+    if not tokens:
+        return []
+
+    if connection.vendor == 'postgresql':
+        query = SearchQuery(' & '.join(tokens[:-1] + [tokens[-1] + ':*']), search_type='raw', config=_config())
+        return list(
+            Product.objects.filter(search_vector=query)
+            .annotate(rank=SearchRank(F('search_vector'), query))
+            .order_by('-rank', '-created_at', '-id')
+            .values_list('id', flat=True)[offset:offset + limit]
+        )
+
+    if connection.vendor == 'sqlite':
+        match = ' '.join(f'"{token}"' for token in tokens) + '*'
+        with connection.cursor() as cursor:
+            # bm25 weights: product_id (unindexed), name, description
+            cursor.execute(
+                f'SELECT product_id FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+                f'ORDER BY bm25({FTS_TABLE}, 0.0, 10.0, 1.0), product_id LIMIT %s OFFSET %s',
+                [match, limit, offset],
+            )
+            return [Product._meta.pk.to_python(row[0]) for row in cursor.fetchall()]
+
+    # Anything else: unranked substring match, newest first
+    condition = Q()
+    for token in tokens:
+        condition &= Q(name__icontains=token) | Q(description__icontains=token)
+    return list(
+        Product.objects.filter(condition).order_by('-created_at', '-id').values_list('id', flat=True)[offset:offset + limit]
+    )
@@ -34,7 +34,7 @@ class ProductSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Product
-        fields = ['id', 'name', 'description', 'image_url', 'base_price', 'variants']
+        fields = ['id', 'name', 'description', 'image_url', 'base_price', 'rating_avg', 'rating_count', 'variants']
 
     def get_variants(self, obj):
         variants = obj.variants.all()
@@ -0,0 +1,50 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from ErmaxShop.cache import versioned_cache
+from product.models import Product, ProductVariant, ProductVariantImage, FeaturedCategory
+from product.search import index_products
+from product.snapshots import rebuild_on_commit
+
+
+# ----------------------------- Cache invalidation
+@receiver([post_save, post_delete], sender=Product)
+def bump_products(sender, **kwargs):
+    versioned_cache.bump_on_commit('products')
+
+@receiver([post_save, post_delete], sender=ProductVariant)
+@receiver([post_save, post_delete], sender=ProductVariantImage)
+def bump_variants(sender, **kwargs):
+    versioned_cache.bump_on_commit('variants')
+
+@receiver([post_save, post_delete], sender=FeaturedCategory)
+def bump_featured_categories(sender, **kwargs):
+    versioned_cache.bump_on_commit('featured_categories')
+
+
+# ----------------------------- Catalog snapshots
+# Every write path (dashboard, Django admin, shell) re-renders the affected
+# product's stored document, once per transaction, after it commits
+@receiver([post_save, post_delete], sender=Product)
+def rebuild_product_snapshot(sender, instance, **kwargs):
+    rebuild_on_commit(product_ids=[instance.pk])
+
+@receiver([post_save, post_delete], sender=ProductVariant)
+def rebuild_variant_snapshot(sender, instance, **kwargs):
+    rebuild_on_commit(product_ids=[instance.product_id])
+
+@receiver([post_save, post_delete], sender=ProductVariantImage)
+def rebuild_image_snapshot(sender, instance, **kwargs):
+    rebuild_on_commit(variant_ids=[instance.variant_id])
+
+
+# ----------------------------- Search index
+@receiver(post_save, sender=Product)
+def index_product(sender, instance, update_fields=None, **kwargs):
+    if update_fields and not {'name', 'description'} & set(update_fields):
+        return
+    index_products([instance.pk])
+
+@receiver(post_delete, sender=Product)
+def unindex_product(sender, instance, **kwargs):
+    index_products([instance.pk])
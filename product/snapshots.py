@@ -0,0 +1,97 @@
+import threading
+
+from django.db import connection, transaction
+from rest_framework.renderers import JSONRenderer
+
+from ErmaxShop.cache import versioned_cache
+from product.models import ProductSnapshot, ProductVariant
+from product.fast_serializers import serialize_products
+
+_pending = threading.local()
+
+
+def rebuild_product_snapshots(product_ids, bump=True):
+    """
+    Re-render the snapshot documents of the given products in one upsert.
+    Ids of products that no longer exist are ignored (their snapshot rows
+    were cascaded away with them). Returns {product_id: document}.
+
+    The upsert sends no signals, so the 'products' cache namespace is bumped
+    here once the new documents are committed; otherwise a read that raced
+    the write could keep the old document cached under the new version.
+    """
+    product_ids = {pk for pk in product_ids if pk is not None}
+    if not product_ids:
+        return {}
+
+    renderer = JSONRenderer()
+    snapshots = [
+        ProductSnapshot(product_id=pk, document=renderer.render(data).decode('utf-8'))
+        for pk, data in serialize_products(product_ids).items()
+    ]
+    ProductSnapshot.objects.bulk_create(
+        snapshots,
+        update_conflicts=True,
+        unique_fields=['product'],
+        update_fields=['document', 'updated_at'],
+    )
+    if bump:
+        versioned_cache.bump_on_commit('products')
+    return {snapshot.product_id: snapshot.document for snapshot in snapshots}
+
+
+class _PendingRebuild:
+    def __init__(self):
+        self.product_ids = set()
+        self.variant_ids = set()
+
+    def is_queued(self):
+        # Its on_commit callback is still waiting in the current transaction
+        return connection.in_atomic_block and any(func == self.run for _, func, _ in connection.run_on_commit)
+
+    def run(self):
+        if getattr(_pending, 'rebuild', None) is self:
+            del _pending.rebuild
+        product_ids = set(self.product_ids)
+        if self.variant_ids:
+            product_ids.update(
+                ProductVariant.objects.filter(pk__in=self.variant_ids).values_list('product_id', flat=True)
+            )
+        rebuild_product_snapshots(product_ids)
+
+
+def rebuild_on_commit(product_ids=(), variant_ids=()):
+    """
+    Rebuild the snapshots of these products (and of the products owning these
+    variants) once the current transaction commits, right away in autocommit.
+    Everything requested within one transaction is rebuilt together, once.
+    Rebuilding is idempotent, so ids left over from a rolled-back savepoint
+    only cost a redundant render.
+    """
+    pending = getattr(_pending, 'rebuild', None)
+    queued = pending is not None and pending.is_queued()
+    if not queued:
+        pending = _PendingRebuild()
+        _pending.rebuild = pending
+    pending.product_ids.update(pk for pk in product_ids if pk is not None)
+    pending.variant_ids.update(pk for pk in variant_ids if pk is not None)
+    if not queued:
+        transaction.on_commit(pending.run)
+
+
+def snapshot_documents(products):
+    """
+    Return the stored documents for `products` (fetched with
+    select_related('snapshot')) in order, building any that are missing.
+    """
+    documents = {}
+    missing = []
+    for product in products:
+        try:
+            documents[product.pk] = product.snapshot.document
+        except ProductSnapshot.DoesNotExist:
+            missing.append(product.pk)
+    if missing:
+        # Rendered from the current rows, so cached pages are still right
+        documents.update(rebuild_product_snapshots(missing, bump=False))
+    return [documents[product.pk] for product in products]
@@ -1,3 +1,445 @@
-from django.test import TestCase
+from datetime import timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.timezone import override as override_timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from product.models import Product, ProductVariant, ProductVariantImage, ProductSnapshot, FeaturedCategory
+from product.serializers import ProductSerializer
+from product.fast_serializers import serialize_products
+from user.models import User
+from ErmaxShop.cache import versioned_cache
+
+
+def make_product(name='Dress', created_at=None, variants=1, images=1):
+    product = Product.objects.create(
+        name=name,
+        description=f'{name} description',
+        image_url='https://example.com/p.jpg',
+        base_price=Decimal('100.00'),
+    )
+    if created_at is not None:
+        Product.objects.filter(pk=product.pk).update(created_at=created_at)
+        product.refresh_from_db()
+    for v in range(variants):
+        variant = ProductVariant.objects.create(product=product, color=f'C{v}', size='M', extra_price=Decimal('5.50'))
+        for i in range(images):
+            ProductVariantImage.objects.create(variant=variant, image_url=f'https://example.com/{v}-{i}.jpg')
+    return product
+
+
+class ProductCursorPaginationTests(TestCase):
+    url = '/yene_api/products/'
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        now = timezone.now()
+        # Pairs of products share a created_at so the id tie-breaker is exercised
+        self.products = [
+            make_product(f'P{i}', created_at=now - timedelta(minutes=i // 2))
+            for i in range(11)
+        ]
+
+    def walk(self, url):
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            pages.append(response.json())
+            url = pages[-1]['next']
+        return pages
+
+    def test_pages_cover_catalog_once_in_order(self):
+        pages = self.walk(f'{self.url}?page_size=3')
+        ids = [p['id'] for page in pages for p in page['results']]
+        expected = list(
+            Product.objects.order_by('-created_at', '-id').values_list('id', flat=True)
+        )
+        self.assertEqual(ids, [str(pk) for pk in expected])
+        self.assertEqual(len(pages), 4)
+        self.assertIsNone(pages[0]['previous'])
+
+    def test_previous_link_returns_same_page(self):
+        first = self.client.get(f'{self.url}?page_size=4').json()
+        second = self.client.get(first['next']).json()
+        back = self.client.get(second['previous']).json()
+        self.assertEqual(
+            [p['id'] for p in back['results']],
+            [p['id'] for p in first['results']],
+        )
+        self.assertIsNotNone(back['next'])
+
+    def test_page_size_is_capped(self):
+        response = self.client.get(f'{self.url}?page_size=100000')
+        self.assertEqual(len(response.json()['results']), 11)
+
+    def test_invalid_cursor_is_404(self):
+        response = self.client.get(f'{self.url}?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, 404)
+
+    def test_query_count_independent_of_depth(self):
+        pages = self.walk(f'{self.url}?page_size=2')
+        last_url = pages[-2]['next']
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(last_url)
+        # the walk built the snapshots and cached the page body, and the
+        # ETag needs no query
+        self.assertEqual(len(ctx.captured_queries), 0)
+
+
+class ProductSnapshotTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        # Committed, as it would be in production: the snapshot gets built
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product = make_product('Coat', variants=2, images=2)
+        self.admin = User.objects.create_user(email='admin@example.com', password='pw', is_staff=True)
+
+    def expected(self, product):
+        product = Product.objects.prefetch_related('variants__images').get(pk=product.pk)
+        return ProductSerializer(product).data
+
+    def test_missing_snapshot_is_built_on_read(self):
+        ProductSnapshot.objects.all().delete()
+        response = self.client.get(f'/yene_api/products/{self.product.pk}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), self.expected(self.product))
+        self.assertTrue(ProductSnapshot.objects.filter(product=self.product).exists())
+
+    def test_list_serves_stored_documents(self):
+        ProductSnapshot.objects.filter(product=self.product).update(document='{"stored":true}')
+        response = self.client.get('/yene_api/products/')
+        self.assertEqual(response.json()['results'], [{'stored': True}])
+
+    def test_admin_product_update_rebuilds_snapshot(self):
+        self.client.force_authenticate(self.admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.put(f'/yene_api/dashboard/yene_admin/products/{self.product.pk}/', {
+                'name': 'Renamed', 'description': 'd', 'image_url': 'https://example.com/x.jpg', 'base_price': '10.00',
+            }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.client.force_authenticate(None)
+        detail = self.client.get(f'/yene_api/products/{self.product.pk}/').json()
+        self.assertEqual(detail['name'], 'Renamed')
+
+    def test_admin_variant_delete_rebuilds_snapshot(self):
+        variant = self.product.variants.first()
+        self.client.force_authenticate(self.admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(f'/yene_api/dashboard/yene_admin/product-variants/{variant.pk}/')
+        self.assertEqual(response.status_code, 204)
+        self.client.force_authenticate(None)
+        detail = self.client.get(f'/yene_api/products/{self.product.pk}/').json()
+        self.assertEqual(len(detail['variants']), 1)
+        self.assertEqual(detail, self.expected(self.product))
+
+    def test_plain_model_saves_rebuild_snapshot(self):
+        # e.g. Django admin or a shell: no dashboard code involved
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.name = 'Parka'
+            self.product.save()
+        self.assertEqual(self.client.get(f'/yene_api/products/{self.product.pk}/').json()['name'], 'Parka')
+
+        image = ProductVariantImage.objects.filter(variant__product=self.product).first()
+        with self.captureOnCommitCallbacks(execute=True):
+            image.delete()
+        self.assertEqual(self.client.get(f'/yene_api/products/{self.product.pk}/').json(), self.expected(self.product))
+
+    def test_one_rebuild_per_transaction(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.product.save()
+            for variant in self.product.variants.all():
+                variant.save()
+        rebuilds = [callback for callback in callbacks if getattr(callback, '__name__', '') == 'run']
+        self.assertEqual(len(rebuilds), 1)
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product = make_product('Scarf')
+
+    def test_catalog_not_modified_until_catalog_changes(self):
+        first = self.client.get('/yene_api/products/')
+        etag = first['ETag']
+        self.assertEqual(first.status_code, 200)
+
+        with CaptureQueriesContext(connection) as ctx:
+            cached = self.client.get('/yene_api/products/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached.content, b'')
+        # the ETag comes from the cache namespace versions: no query at all
+        self.assertEqual(len(ctx.captured_queries), 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ProductVariant.objects.filter(product=self.product).delete()
+        changed = self.client.get('/yene_api/products/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed['ETag'], etag)
+
+    def test_pages_have_distinct_etags(self):
+        make_product('Hat')
+        first = self.client.get('/yene_api/products/?page_size=1')
+        second = self.client.get(first.json()['next'])
+        self.assertNotEqual(first['ETag'], second['ETag'])
+
+    def test_product_detail_revalidates_after_deletion(self):
+        url = f'/yene_api/products/{self.product.pk}/'
+        first = self.client.get(url)
+        # Deletions leave no timestamp, so no Last-Modified to misjudge them
+        self.assertFalse(first.has_header('Last-Modified'))
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ProductVariantImage.objects.filter(variant__product=self.product).delete()
+        changed = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(changed.status_code, 200)
+        self.assertEqual(changed.json()['variants'][0]['images'], [])
+
+    def test_featured_categories_etag(self):
+        FeaturedCategory.objects.create(title='New', description='d', image='https://example.com/c.jpg')
+        first = self.client.get('/yene_api/products/featured-categories/')
+        self.assertEqual(first.status_code, 200)
+        again = self.client.get('/yene_api/products/featured-categories/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(again.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            FeaturedCategory.objects.create(title='Sale', description='d', image='https://example.com/s.jpg')
+        changed = self.client.get('/yene_api/products/featured-categories/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(changed.status_code, 200)
+        self.assertEqual(len(changed.data), 2)
+
+
+class VersionedCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        versioned_cache.reset_stats()
+        self.client = APIClient()
+
+    def test_namespace_bump_invalidates_keys(self):
+        versioned_cache.set(('products', 'variants'), 'k', 'old')
+        self.assertEqual(versioned_cache.get(('products', 'variants'), 'k'), 'old')
+        versioned_cache.bump('variants')
+        self.assertIsNone(versioned_cache.get(('products', 'variants'), 'k'))
+
+    def test_model_signals_refresh_cached_catalog(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            product = make_product('Boots')
+        self.assertEqual(self.client.get('/yene_api/products/').json()['results'][0]['name'], 'Boots')
+
+        variant = product.variants.get()
+        variant.extra_price = Decimal('9.00')
+        with self.captureOnCommitCallbacks(execute=True):
+            variant.save()
+        results = self.client.get('/yene_api/products/').json()['results']
+        self.assertEqual(results[0]['variants'][0]['extra_price'], '9.00')
+
+    def test_read_racing_a_write_is_not_served_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            product = make_product('Boots')
+        url = f'/yene_api/products/{product.pk}/'
+        variant = product.variants.get()
+        with self.captureOnCommitCallbacks(execute=True):
+            variant.extra_price = Decimal('9.00')
+            variant.save()
+            # A storefront read before commit caches the old document...
+            self.assertEqual(self.client.get(url).json()['variants'][0]['extra_price'], '5.50')
+        # ...but the version bump comes after the new snapshot is written
+        self.assertEqual(self.client.get(url).json()['variants'][0]['extra_price'], '9.00')
+
+    def test_featured_categories_served_from_cache(self):
+        FeaturedCategory.objects.create(title='New', description='d', image='https://example.com/c.jpg')
+        self.client.get('/yene_api/products/featured-categories/')
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/yene_api/products/featured-categories/')
+        self.assertEqual(len(response.data), 1)
+        # cached body and a version-based ETag: no query
+        self.assertEqual(len(ctx.captured_queries), 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            FeaturedCategory.objects.create(title='Sale', description='d', image='https://example.com/s.jpg')
+        self.assertEqual(len(self.client.get('/yene_api/products/featured-categories/').data), 2)
+
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'yene_cache',
+    }})
+    def test_database_backend_reads_versions_once(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            make_product('Boots')
+        first = self.client.get('/yene_api/products/')
+        # versions once (ETag and body share them), then the cached body
+        with self.assertNumQueries(2):
+            self.client.get('/yene_api/products/')
+        with self.assertNumQueries(1):
+            self.client.get('/yene_api/products/', HTTP_IF_NONE_MATCH=first['ETag'])
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}})
+    def test_no_shared_cache_reads_the_snapshots(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            make_product('Boots')
+        with self.assertNumQueries(1):
+            response = self.client.get('/yene_api/products/')
+        self.assertEqual(response.json()['results'][0]['name'], 'Boots')
+        self.assertNotIn('ETag', response)
+
+    def test_stats_count_hits_and_misses(self):
+        FeaturedCategory.objects.create(title='New', description='d', image='https://example.com/c.jpg')
+        for _ in range(3):
+            self.client.get('/yene_api/products/featured-categories/')
+        stats = versioned_cache.stats()['featured_categories']
+        self.assertEqual((stats['hits'], stats['misses']), (2, 1))
+
+        admin = User.objects.create_user(email='admin@example.com', password='pw', is_staff=True)
+        self.client.force_authenticate(admin)
+        response = self.client.get('/yene_api/dashboard/yene_admin/cache-stats/')
+        self.assertEqual(response.data['featured_categories']['hits'], 2)
+
+
+class FastSerializerParityTests(TestCase):
+    def setUp(self):
+        make_product('Plain')
+        make_product('Many', variants=3, images=2)
+        make_product('No variants', variants=0)
+        make_product('No images', variants=2, images=0)
+        odd = make_product('Ünïcode “quotes” \u2028', variants=1)
+        Product.objects.filter(pk=odd.pk).update(base_price=Decimal('7.5'), description='')
+        ProductVariant.objects.filter(product=odd).update(extra_price=Decimal('0'))
+
+    def render_both(self):
+        queryset = Product.objects.order_by('-created_at', '-id').prefetch_related('variants__images')
+        ids = [p.pk for p in queryset]
+        renderer = JSONRenderer()
+        expected = renderer.render(ProductSerializer(queryset, many=True).data)
+        actual = renderer.render(list(serialize_products(ids).values()))
+        return expected, actual
+
+    def test_byte_identical_output(self):
+        expected, actual = self.render_both()
+        self.assertEqual(actual, expected)
+
+    def test_byte_identical_output_outside_utc(self):
+        with override_timezone('Africa/Addis_Ababa'):
+            expected, actual = self.render_both()
+        self.assertEqual(actual, expected)
+
+    def test_keeps_requested_order_and_skips_unknown(self):
+        ids = list(Product.objects.order_by('name').values_list('id', flat=True))
+        result = serialize_products([str(ids[1]), ids[0], ProductVariant().pk])
+        self.assertEqual(list(result), [ids[1], ids[0]])
+
+    def test_constant_query_count(self):
+        ids = list(Product.objects.values_list('id', flat=True))
+        with self.assertNumQueries(3):
+            serialize_products(ids)
+
+
+class ProductSearchTests(TestCase):
+    url = '/yene_api/products/search/'
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.habesha = make_product('Habesha Kemis', variants=2)
+        self.scarf = make_product('Netela Scarf')
+        Product.objects.filter(pk=self.scarf.pk).update(description='Pairs well with a habesha kemis')
+        self.scarf.refresh_from_db()
+        self.scarf.save()  # re-index with the new description
+        self.shoes = make_product('Leather Shoes')
+
+    def names(self, query):
+        response = self.client.get(f'{self.url}?{query}')
+        self.assertEqual(response.status_code, 200)
+        return [p['name'] for p in response.json()['results']]
+
+    def test_ranked_with_variants(self):
+        results = self.client.get(f'{self.url}?q=habesha').json()['results']
+        self.assertEqual([p['name'] for p in results], ['Habesha Kemis', 'Netela Scarf'])
+        self.assertEqual(len(results[0]['variants']), 2)
+        self.assertEqual(results[0]['variants'][0]['images'][0]['image_url'], 'https://example.com/0-0.jpg')
+
+    def test_all_words_and_prefix(self):
+        self.assertEqual(self.names('q=kemis+hab'), ['Habesha Kemis', 'Netela Scarf'])
+        self.assertEqual(self.names('q=leather+kemis'), [])
+        self.assertEqual(self.names('q=sho'), ['Leather Shoes'])
+        self.assertEqual(self.names('q=%22)*('), [])
+
+    def test_paginated(self):
+        first = self.client.get(f'{self.url}?q=habesha&page_size=1').json()
+        self.assertEqual([p['name'] for p in first['results']], ['Habesha Kemis'])
+        self.assertIsNone(first['previous'])
+        second = self.client.get(first['next']).json()
+        self.assertEqual([p['name'] for p in second['results']], ['Netela Scarf'])
+        self.assertIsNone(second['next'])
+        self.assertEqual(self.client.get(f'{self.url}?q=habesha&page=0').status_code, 404)
+
+    def test_index_follows_saves_and_deletes(self):
+        self.shoes.name = 'Leather Sandals'
+        self.shoes.description = 'Open toe'
+        self.shoes.save()
+        self.assertEqual(self.names('q=sandals'), ['Leather Sandals'])
+        self.assertEqual(self.names('q=shoes'), [])
+        self.shoes.delete()
+        self.assertEqual(self.names('q=leather'), [])
+
+
+class FacetTests(TestCase):
+    url = '/yene_api/products/'
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.dress = make_product('Dress', variants=0)
+        self.shirt = make_product('Shirt', variants=0)
+        self.cheap = make_product('Cheap', variants=0)
+        Product.objects.filter(pk=self.cheap.pk).update(base_price=Decimal('50.00'))
+        ProductVariant.objects.bulk_create([
+            ProductVariant(product=self.dress, color='Red', size='M', extra_price=Decimal('0.00')),
+            ProductVariant(product=self.dress, color='Blue', size='L', extra_price=Decimal('600.00')),
+            ProductVariant(product=self.shirt, color='Red', size='L', extra_price=Decimal('0.00')),
+            ProductVariant(product=self.cheap, color='Blue', size='M', extra_price=Decimal('0.00')),
+        ])
+
+    def names(self, query):
+        response = self.client.get(f'{self.url}?{query}')
+        self.assertEqual(response.status_code, 200)
+        return sorted(p['name'] for p in response.json()['results'])
+
+    def test_filters_apply_to_one_variant(self):
+        self.assertEqual(self.names('color=Red'), ['Dress', 'Shirt'])
+        self.assertEqual(self.names('color=Red&size=L'), ['Shirt'])
+        self.assertEqual(self.names('color=Blue,Red&size=M'), ['Cheap', 'Dress'])
+        self.assertEqual(self.names('min_price=600'), ['Dress'])
+        self.assertEqual(self.names('color=Blue&max_price=99.99'), ['Cheap'])
+        self.assertEqual(self.client.get(f'{self.url}?min_price=lots').status_code, 400)
+
+    def test_facet_counts_are_disjunctive_and_cached(self):
+        with CaptureQueriesContext(connection) as ctx:
+            body = self.client.get(f'{self.url}?color=Red&facets=1').json()
+        self.assertEqual(sorted(p['name'] for p in body['results']), ['Dress', 'Shirt'])
+        facets = body['facets']
+        # Colors are counted ignoring the color filter itself
+        self.assertEqual(facets['color'], [{'value': 'Blue', 'count': 2}, {'value': 'Red', 'count': 2}])
+        self.assertEqual(facets['size'], [{'value': 'L', 'count': 1}, {'value': 'M', 'count': 1}])
+        self.assertEqual([b['count'] for b in facets['price']], [2, 0, 0, 0, 0])
+        facet_queries = [q for q in ctx.captured_queries if 'COUNT(DISTINCT' in q['sql']]
+        self.assertEqual(len(facet_queries), 3)
+
+        # Another page of the same filters reuses the cached counts
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(f'{self.url}?color=Red&facets=1&page_size=1')
+        self.assertFalse([q for q in ctx.captured_queries if 'COUNT(DISTINCT' in q['sql']])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ProductVariant.objects.create(product=self.cheap, color='Red', size='S', extra_price=Decimal('0.00'))
+        facets = self.client.get(f'{self.url}?color=Red&facets=1').json()['facets']
+        self.assertEqual(facets['size'][-1], {'value': 'S', 'count': 1})
@@ -3,9 +3,11 @@ from product.views import ProductViewSet, FeaturedCategoryListView
 
 product_list = ProductViewSet.as_view({'get': 'list'})
 product_detail = ProductViewSet.as_view({'get': 'retrieve'})
+product_search = ProductViewSet.as_view({'get': 'search'})
 
 urlpatterns = [
     path('', product_list, name='product-list'),
+    path('search/', product_search, name='product-search'),
     path('<uuid:pk>/', product_detail, name='product-detail'),
     path('featured-categories/', FeaturedCategoryListView.as_view(), name='featured-category-list'),
 ]
@@ -1,19 +1,94 @@
+from django.http import HttpResponse
 from rest_framework import viewsets, status
 from rest_framework.views import APIView
 from rest_framework.response import Response
+from ErmaxShop.cache import versioned_cache
 from product.models import Product, FeaturedCategory
 from product.serializers import ProductSerializer, ProductDetailSerializer, FeaturedCategorySerializer
+from product.pagination import ProductCursorPagination, ProductRatingPagination, ProductSearchPagination
+from product.search import search_product_ids
+from product.facets import facet_counts, filter_products, parse_filters
+from product.snapshots import snapshot_documents
+from product.conditional import (
+    conditional,
+    catalog_validators,
+    product_validators,
+    featured_category_validators,
+)
 
 class ProductViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = Product.objects.prefetch_related('variants__images').order_by('-created_at')
+    # Reads are served from the pre-rendered ProductSnapshot documents, so a
+    # page costs one joined query; the serializers only (re)build snapshots.
+    queryset = Product.objects.select_related('snapshot').only(
+        'id', 'created_at', 'rating_avg', 'rating_count', 'snapshot__document'
+    ).order_by('-created_at', '-id')
+    pagination_class = ProductCursorPagination
+    cache_namespaces = ('products', 'variants')
+    orderings = {
+        'newest': ProductCursorPagination,
+        'rating': ProductRatingPagination,
+    }
+
+    @property
+    def paginator(self):
+        # ?ordering=rating sorts on the denormalized Product.rating_* columns
+        if not hasattr(self, '_paginator'):
+            ordering = self.request.query_params.get('ordering', 'newest')
+            self._paginator = self.orderings.get(ordering, self.pagination_class)()
+        return self._paginator
 
     def get_serializer_class(self):
         if self.action == 'retrieve':
             return ProductDetailSerializer
         return ProductSerializer
 
+    def filter_queryset(self, queryset):
+        # ?color=Red,Blue&size=M&min_price=100&max_price=500, all on one variant
+        if self.action != 'list':
+            return queryset
+        return filter_products(queryset, parse_filters(self.request.query_params))
+
+    @conditional(catalog_validators)
+    def list(self, request, *args, **kwargs):
+        def render_page():
+            products = self.paginate_queryset(self.filter_queryset(self.get_queryset()))
+            extra = None
+            if request.query_params.get('facets') in ('1', 'true'):
+                extra = {'facets': facet_counts(parse_filters(request.query_params))}
+            return self.paginator.get_prerendered_response(snapshot_documents(products), extra).content
+
+        body = versioned_cache.get_or_set(self.cache_namespaces, request.build_absolute_uri(), render_page)
+        return HttpResponse(body, content_type='application/json')
+
+    @conditional(product_validators)
+    def retrieve(self, request, *args, **kwargs):
+        def render_product():
+            document, = snapshot_documents([self.get_object()])
+            return document
+
+        document = versioned_cache.get_or_set(self.cache_namespaces, f'product:{kwargs["pk"]}', render_product)
+        return HttpResponse(document, content_type='application/json')
+
+    @conditional(catalog_validators)
+    def search(self, request, *args, **kwargs):
+        text = request.query_params.get('q', '').strip()[:200]
+
+        def render_results():
+            paginator = ProductSearchPagination()
+            ids = paginator.paginate(request, lambda offset, limit: search_product_ids(text, offset, limit))
+            products = self.get_queryset().in_bulk(ids)
+            ranked = [products[pk] for pk in ids if pk in products]
+            return paginator.get_prerendered_response(snapshot_documents(ranked)).content
+
+        body = versioned_cache.get_or_set(self.cache_namespaces, request.build_absolute_uri(), render_results)
+        return HttpResponse(body, content_type='application/json')
+
 class FeaturedCategoryListView(APIView):
+    @conditional(featured_category_validators)
     def get(self, request):
-        categories = FeaturedCategory.objects.all()
-        serializer = FeaturedCategorySerializer(categories, many=True, context={'request': request})
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        def serialize():
+            categories = FeaturedCategory.objects.all()
+            return FeaturedCategorySerializer(categories, many=True, context={'request': request}).data
+
+        data = versioned_cache.get_or_set(('featured_categories',), 'list', serialize)
+        return Response(data, status=status.HTTP_200_OK)
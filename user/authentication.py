@@ -0,0 +1,73 @@
+"""
+JWT authentication without a User query per request.
+
+The authenticated user is read from the shared versioned cache (per-user
+namespace, bumped by user.signals whenever that user is saved or deleted,
+so deactivation takes effect on the next request) for at most
+JWT_USER_CACHE_TIMEOUT seconds. The password hash is never cached.
+
+With JWT_TRUST_USER_CLAIMS on, access tokens minted by user.tokens (at
+login and on every refresh, from the current user row) carry signed
+is_staff / is_active claims and the user is built from the token alone; any
+other field loads lazily on first access. A change to those flags then
+only shows up when the access token is next refreshed, so keep access
+tokens short-lived if you turn it on.
+"""
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from ErmaxShop.cache import versioned_cache
+
+TRUSTED_CLAIMS = ('is_staff', 'is_active')
+
+
+def user_namespaces(user_id):
+    # Only the per-user namespace: nothing bumps all users at once
+    return (f'user:{user_id}',)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        if api_settings.CHECK_REVOKE_TOKEN:
+            # Needs the password hash, which is deliberately not cached
+            return super().get_user(validated_token)
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken('Token contained no recognizable user identification')
+
+        if getattr(settings, 'JWT_TRUST_USER_CLAIMS', False) and all(c in validated_token for c in TRUSTED_CLAIMS):
+            id_field = self.user_model._meta.get_field(api_settings.USER_ID_FIELD)
+            known = {c: bool(validated_token[c]) for c in TRUSTED_CLAIMS}
+            known[id_field.attname] = id_field.to_python(user_id)
+            # from_db() wants the values in model field order
+            fields = [f.attname for f in self.user_model._meta.concrete_fields if f.attname in known]
+            user = self.user_model.from_db(DEFAULT_DB_ALIAS, fields, [known[f] for f in fields])
+        else:
+            user = self.cached_user(user_id)
+
+        if user is None:
+            raise AuthenticationFailed('User not found', code='user_not_found')
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed('User is inactive', code='user_inactive')
+        return user
+
+    def cached_user(self, user_id):
+        fields = [f.attname for f in self.user_model._meta.concrete_fields if f.attname != 'password']
+
+        def load():
+            # None is cached too, so unknown ids do not hit the database either
+            return self.user_model.objects.filter(**{api_settings.USER_ID_FIELD: user_id}).values_list(
+                *fields
+            ).first()
+
+        row = versioned_cache.get_or_set(
+            user_namespaces(user_id), 'jwt-user', load, timeout=settings.JWT_USER_CACHE_TIMEOUT,
+            stats_namespace='users',
+        )
+        if row is None:
+            return None
+        return self.user_model.from_db(DEFAULT_DB_ALIAS, fields, row)
@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+# PBKDF2-SHA256 iteration counts per PASSWORD_HASH_PROFILE
+HASH_PROFILES = {
+    'django': PBKDF2PasswordHasher.iterations,  # Django's current default
+    'balanced': 600_000,                        # OWASP's minimum for PBKDF2-SHA256
+    'fast': 1_000,                              # local development / benchmarks only
+}
+
+
+class ProfiledPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    Django's PBKDF2 hasher with the work factor taken from settings
+    (PASSWORD_HASH_ITERATIONS, else the PASSWORD_HASH_PROFILE entry of
+    HASH_PROFILES). It keeps the 'pbkdf2_sha256' algorithm name, so existing
+    hashes verify unchanged and are re-encoded at the configured work factor
+    on the user's next successful login.
+    """
+
+    @property
+    def iterations(self):
+        explicit = getattr(settings, 'PASSWORD_HASH_ITERATIONS', None)
+        if explicit:
+            return int(explicit)
+        return HASH_PROFILES[getattr(settings, 'PASSWORD_HASH_PROFILE', 'django')]
@@ -0,0 +1,72 @@
+import time
+import uuid
+
+from django.contrib.auth.hashers import get_hasher
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from user.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        'Time the login endpoint end to end and report p50/p99 plus the share spent '
+        'in password hashing. Creates a throwaway user and deletes it afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logins', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=3, help='Untimed logins first')
+
+    def handle(self, *args, **options):
+        if options['logins'] < 1:
+            raise CommandError('--logins must be at least 1')
+
+        hasher = get_hasher()
+        hasher_class = type(hasher)
+        password = uuid.uuid4().hex
+        user = User.objects.create_user(
+            email=f'benchmark-{uuid.uuid4().hex[:12]}@example.com', password=password, full_name='Benchmark',
+        )
+        client = APIClient(SERVER_NAME='localhost')
+        url = reverse('login')
+        payload = {'email': user.email, 'password': password}
+
+        # Count time inside the hasher by wrapping verify() on its class
+        hashing = []
+        original_verify = hasher_class.verify
+
+        def timed_verify(self, *args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return original_verify(self, *args, **kwargs)
+            finally:
+                hashing.append(time.perf_counter() - start)
+
+        latencies = []
+        hasher_class.verify = timed_verify
+        try:
+            for _ in range(options['warmup']):
+                client.post(url, payload, format='json')
+            hashing.clear()
+            for _ in range(options['logins']):
+                start = time.perf_counter()
+                response = client.post(url, payload, format='json')
+                latencies.append(time.perf_counter() - start)
+                if response.status_code != 200:
+                    raise CommandError(f'Login failed with {response.status_code}: {response.content[:200]!r}')
+        finally:
+            hasher_class.verify = original_verify
+            user.delete()
+
+        latencies.sort()
+        total = sum(latencies)
+        p50 = latencies[len(latencies) // 2] * 1000
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+        self.stdout.write(
+            f"{options['logins']} logins with {hasher.algorithm} "
+            f"({getattr(hasher, 'iterations', '-')} iterations)  "
+            f"p50 {p50:.1f} ms  p99 {p99:.1f} ms  mean {total / len(latencies) * 1000:.1f} ms  "
+            f"hashing {sum(hashing) / total:.0%} of wall time"
+        )
@@ -2,7 +2,10 @@
 from django.contrib.auth import get_user_model
 from rest_framework import serializers
 from django.contrib.auth.password_validation import validate_password
-from rest_framework_simplejwt.tokens import RefreshToken  # Import RefreshToken
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from user.tokens import access_token_for, issue_tokens
 
 User = get_user_model()
 
@@ -33,9 +36,32 @@ class TokenSerializer(serializers.Serializer):
         if not user:
             raise serializers.ValidationError("Invalid credentials")
         
-        # Create and return JWT token using the RefreshToken class
-        refresh = RefreshToken.for_user(user)
-        return {
-            'access': str(refresh.access_token),  # Access token
-            'refresh': str(refresh)  # Refresh token
-        }
+        # Create and return the JWT pair (with is_staff/is_active claims)
+        return issue_tokens(user)
+
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    # simplejwt's validate() with the claims re-read from the user row it
+    # already loads, so a demoted/deactivated user loses them on refresh
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        user = User.objects.filter(
+            **{api_settings.USER_ID_FIELD: refresh.payload.get(api_settings.USER_ID_CLAIM)}
+        ).first()
+        if user is None or not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(self.error_messages['no_active_account'], 'no_active_account')
+
+        data = {'access': str(access_token_for(refresh, user))}
+
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if api_settings.BLACKLIST_AFTER_ROTATION:
+                try:
+                    refresh.blacklist()
+                except AttributeError:
+                    # token_blacklist app not installed
+                    pass
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            refresh.outstand()
+            data['refresh'] = str(refresh)
+        return data
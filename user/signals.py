@@ -0,0 +1,14 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from ErmaxShop.cache import versioned_cache
+from user.models import User
+
+
+# ----------------------------- Cache invalidation
+@receiver([post_save, post_delete], sender=User)
+def bump_user(sender, instance, **kwargs):
+    # Drops the cached copy used by user.authentication.CachedJWTAuthentication,
+    # after commit so a concurrent request can't re-cache the old row under
+    # the new version
+    versioned_cache.bump_on_commit(f'user:{instance.pk}')
@@ -1,3 +1,113 @@
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from ErmaxShop.cache import versioned_cache
+from user.models import User
+from user.tokens import issue_tokens
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    url = '/yene_api/engagement/notifications/unread-count/'  # one query of its own
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='jwt@example.com', password='pw', full_name='Jay')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {issue_tokens(self.user)['access']}")
+
+    def test_user_lookup_is_cached(self):
+        with self.assertNumQueries(2):
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+
+    def test_saving_the_user_invalidates(self):
+        self.client.get(self.url)
+        self.user.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+            # A request racing the write, before commit, caches the old row...
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+        # ...which the bump after commit leaves behind
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+    def test_stats_counted_under_users(self):
+        versioned_cache.reset_stats()
+        self.client.get(self.url)
+        self.client.get(self.url)
+        stats = versioned_cache.stats()['users']
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+
+    def test_password_hash_is_not_cached(self):
+        from user.authentication import CachedJWTAuthentication
+        user = CachedJWTAuthentication().cached_user(self.user.pk)
+        self.assertEqual(user.pk, self.user.pk)
+        self.assertIn('password', user.get_deferred_fields())
+
+    @override_settings(JWT_TRUST_USER_CLAIMS=True)
+    def test_trusted_claims_skip_the_lookup(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+
+        self.user.is_staff = True
+        self.user.save()
+        staff_client = APIClient()
+        staff_client.credentials(HTTP_AUTHORIZATION=f"Bearer {issue_tokens(self.user)['access']}")
+        with self.assertNumQueries(0):
+            self.assertEqual(staff_client.get('/yene_api/dashboard/yene_admin/cache-stats/').status_code, 200)
+        # The old token still says non-staff
+        self.assertEqual(self.client.get('/yene_api/dashboard/yene_admin/cache-stats/').status_code, 403)
+
+    @override_settings(JWT_TRUST_USER_CLAIMS=True)
+    def test_refresh_reads_claims_from_the_current_user(self):
+        self.user.is_staff = True
+        self.user.save()
+        refresh = issue_tokens(self.user)['refresh']
+        self.user.is_staff = False
+        self.user.save()
+
+        access = APIClient().post('/yene_api/user/token/refresh/', {'refresh': refresh}, format='json').json()['access']
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        self.assertEqual(client.get('/yene_api/dashboard/yene_admin/cache-stats/').status_code, 403)
+
+        self.user.is_active = False
+        self.user.save()
+        response = APIClient().post('/yene_api/user/token/refresh/', {'refresh': refresh}, format='json')
+        self.assertEqual(response.status_code, 401)
+
+
+class LoginTests(TestCase):
+    url = '/yene_api/user/login/'
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='login@example.com', password='secret-pw', full_name='Lee')
+
+    def test_login_is_one_lookup_and_tokens_work(self):
+        client = APIClient()
+        with self.assertNumQueries(1):
+            response = client.post(self.url, {'email': 'login@example.com', 'password': 'secret-pw'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.data), {'refresh', 'access'})
+
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+        self.assertEqual(client.get('/yene_api/engagement/notifications/unread-count/').status_code, 200)
+
+    def test_bad_password(self):
+        response = APIClient().post(self.url, {'email': 'login@example.com', 'password': 'nope'}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(PASSWORD_HASHERS=['user.hashers.ProfiledPBKDF2PasswordHasher'], PASSWORD_HASH_PROFILE='fast')
+class PasswordHashProfileTests(TestCase):
+    def test_profile_sets_the_work_factor(self):
+        user = User.objects.create_user(email='hash@example.com', password='pw', full_name='H')
+        self.assertTrue(user.password.startswith('pbkdf2_sha256$1000$'))
+
+        with self.settings(PASSWORD_HASH_ITERATIONS='1500'):
+            self.assertTrue(user.check_password('pw'))
+        # Re-encoded at the new cost on the successful check
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith('pbkdf2_sha256$1500$'))
@@ -0,0 +1,25 @@
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from user.authentication import TRUSTED_CLAIMS
+
+
+def access_token_for(refresh, user):
+    """
+    An access token from `refresh` carrying signed is_staff / is_active
+    claims for CachedJWTAuthentication, read from `user` as it is now.
+    Only the access token gets them: anything derived from the refresh
+    token would otherwise repeat whatever was true at login.
+    """
+    access = refresh.access_token
+    for claim in TRUSTED_CLAIMS:
+        access[claim] = getattr(user, claim)
+    return access
+
+
+def issue_tokens(user):
+    """Mint a refresh/access pair for `user`."""
+    refresh = RefreshToken.for_user(user)
+    return {
+        'refresh': str(refresh),
+        'access': str(access_token_for(refresh, user)),
+    }
@@ -1,10 +1,9 @@
 # user/views.py
 from rest_framework import status, generics
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.views import TokenRefreshView 
 from django.contrib.auth import get_user_model
-from .serializers import UserSerializer, TokenSerializer
+from .serializers import UserSerializer, TokenSerializer, ClaimsTokenRefreshSerializer
 
 User = get_user_model()
 
@@ -16,16 +15,10 @@ class LoginView(generics.GenericAPIView):
     serializer_class = TokenSerializer
     
     def post(self, request, *args, **kwargs):
+        # TokenSerializer authenticates and mints the pair in one pass
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        # Generate JWT token here for user login
-        email = request.data['email']
-        user = User.objects.get(email=email)
-        refresh = RefreshToken.for_user(user)
-        return Response({
-            'refresh': str(refresh),
-            'access': str(refresh.access_token),
-        }, status=status.HTTP_200_OK)
+        return Response(serializer.validated_data, status=status.HTTP_200_OK)
 
 class CustomTokenRefreshView(TokenRefreshView):
-    pass
+    serializer_class = ClaimsTokenRefreshSerializer